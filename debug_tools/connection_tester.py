@@ -7,6 +7,7 @@ diagnose "Failed to fetch" errors in the browser.
 """
 
 import requests
+import os
 import socket
 import subprocess
 import sys
@@ -19,6 +20,9 @@ import time
 BACKEND_URL = "http://127.0.0.1:5060"
 HEALTH_ENDPOINT = f"{BACKEND_URL}/health"
 API_ENDPOINT = f"{BACKEND_URL}/api/conversations"
+# Chat-completions API to check as well, e.g. http://127.0.0.1:5080/v1 for mock_together_server.py
+LLM_BASE_URL = os.getenv('TOGETHER_BASE_URL')
+LLM_API_KEY = os.getenv('TOGETHER_API_KEY', 'mock-key')
 
 def print_header(text):
     """Print a formatted header."""
@@ -160,6 +164,51 @@ def test_options_request():
         print(f"❌ OPTIONS request failed: {e}")
         return False
 
+def test_llm_api():
+    """Test a plain and a streaming chat completion against the LLM API."""
+    print_header("LLM API TEST")
+    endpoint = f"{LLM_BASE_URL.rstrip('/')}/chat/completions"
+    payload = {
+        "model": "mock-model",
+        "messages": [{"role": "user", "content": "Hello"}],
+        "max_tokens": 20
+    }
+    headers = {"Authorization": f"Bearer {LLM_API_KEY}"}
+
+    with requests.Session() as session:
+        try:
+            print(f"Testing POST {endpoint}")
+            start_time = time.time()
+            response = session.post(endpoint, json=payload, headers=headers, timeout=30)
+            elapsed = time.time() - start_time
+            response.raise_for_status()
+            content = response.json()["choices"][0]["message"]["content"]
+            print(f"✅ Completion succeeded in {elapsed:.2f}s: {content!r}")
+
+            print(f"\nTesting streaming POST {endpoint}")
+            start_time = time.time()
+            first_chunk = None
+            chunks = 0
+            with session.post(endpoint, json={**payload, "stream": True}, headers=headers,
+                              stream=True, timeout=30) as response:
+                response.raise_for_status()
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith("data: ") or line == "data: [DONE]":
+                        continue
+                    if first_chunk is None:
+                        first_chunk = time.time() - start_time
+                    chunks += 1
+            print(f"✅ Stream succeeded: {chunks} chunks, first after {first_chunk or 0:.2f}s, "
+                  f"done in {time.time() - start_time:.2f}s")
+        except requests.exceptions.RequestException as e:
+            print(f"❌ LLM API request failed: {e}")
+            return False
+        except (KeyError, IndexError, ValueError) as e:
+            print(f"❌ Unexpected LLM API response: {e}")
+            return False
+
+    return True
+
 def print_recommendations(all_tests_passed):
     """Print recommendations based on test results."""
     print_header("DIAGNOSIS & RECOMMENDATIONS")
@@ -205,6 +254,7 @@ if __name__ == "__main__":
         ping_test = run_ping_test(host)
     http_test = test_http_requests()
     options_test = test_options_request()
+    llm_test = test_llm_api() if LLM_BASE_URL else True
     
-    all_tests_passed = socket_test and ping_test and http_test and options_test
+    all_tests_passed = socket_test and ping_test and http_test and options_test and llm_test
     print_recommendations(all_tests_passed) 
\ No newline at end of file
@@ -5,9 +5,15 @@ CORS Proxy Server
 This script creates a simple proxy server that forwards requests to the backend
 while adding appropriate CORS headers. This effectively bypasses browser CORS
 restrictions by having both frontend and "backend" on the same origin.
+
+GET responses carrying an ETag are remembered, and later GETs of the same URL
+are revalidated with If-None-Match, so an unchanged conversation costs the
+backend a 304 even when the browser sends no validator of its own.
 """
 
 from flask import Flask, request, Response, jsonify
+from collections import OrderedDict
+import threading
 import requests
 import logging
 
@@ -21,6 +27,13 @@ logger = logging.getLogger(__name__)
 # Configuration
 BACKEND_URL = "http://127.0.0.1:5060"  # The actual backend server
 PROXY_PORT = 5070  # Port for this proxy server
+ETAG_CACHE_SIZE = 256  # GET responses kept for revalidation
+
+# Path and query -> last GET response with an ETag, least recently used first
+etag_cache = OrderedDict()
+etag_cache_lock = threading.Lock()
+
+ALLOW_HEADERS = 'Content-Type, Authorization, X-Requested-With, X-Custom-Header, If-None-Match'
 
 app = Flask(__name__)
 
@@ -69,7 +82,7 @@ def proxy(path):
         response = Response()
         response.headers.add('Access-Control-Allow-Origin', '*')
         response.headers.add('Access-Control-Allow-Methods', 'GET, POST, DELETE, PUT, OPTIONS')
-        response.headers.add('Access-Control-Allow-Headers', 'Content-Type, Authorization, X-Requested-With, X-Custom-Header')
+        response.headers.add('Access-Control-Allow-Headers', ALLOW_HEADERS)
         response.headers.add('Access-Control-Allow-Credentials', 'true')
         return response
 
@@ -81,6 +94,17 @@ def proxy(path):
         # Copy request headers
         headers = {key: value for (key, value) in request.headers if key != 'Host'}
         
+        # Revalidate our copy of this URL unless the client brought its own validator
+        cache_key = request.full_path
+        cached = None
+        if request.method == 'GET':
+            with etag_cache_lock:
+                cached = etag_cache.get(cache_key)
+                if cached:
+                    etag_cache.move_to_end(cache_key)
+            if cached and 'If-None-Match' not in headers:
+                headers['If-None-Match'] = cached['etag']
+        
         # Forward the request
         if request.method == 'GET':
             resp = requests.get(
@@ -97,7 +121,8 @@ def proxy(path):
                 data=request.get_data(),
                 params=request.args,
                 cookies=request.cookies,
-                timeout=30
+                timeout=30,
+                stream=True
             )
         elif request.method == 'DELETE':
             resp = requests.delete(
@@ -117,11 +142,31 @@ def proxy(path):
                 timeout=30
             )
         
-        # Create response
-        response = Response(resp.content, resp.status_code)
+        resp_headers = resp.headers
+        if request.method == 'GET' and resp.status_code == 200 and 'ETag' in resp.headers:
+            with etag_cache_lock:
+                etag_cache[cache_key] = {
+                    'etag': resp.headers['ETag'],
+                    'content': resp.content,
+                    'headers': dict(resp.headers)
+                }
+                etag_cache.move_to_end(cache_key)
+                while len(etag_cache) > ETAG_CACHE_SIZE:
+                    etag_cache.popitem(last=False)
+        
+        # Create response, passing Server-Sent Events through unbuffered
+        if resp.status_code == 304 and cached and not request.if_none_match.contains_weak(cached['etag'].strip('"')):
+            # Unchanged, but the client does not have this version: answer from our copy
+            logger.info(f"Serving {cache_key} from revalidated cache")
+            resp_headers = cached['headers']
+            response = Response(cached['content'], 200)
+        elif resp.headers.get('Content-Type', '').startswith('text/event-stream'):
+            response = Response(resp.iter_content(chunk_size=None), resp.status_code)
+        else:
+            response = Response(resp.content, resp.status_code)
         
         # Copy response headers
-        for key, value in resp.headers.items():
+        for key, value in resp_headers.items():
             if key.lower() not in ('access-control-allow-origin', 'access-control-allow-methods', 
                                   'access-control-allow-headers', 'access-control-allow-credentials'):
                 response.headers[key] = value
@@ -129,7 +174,8 @@ def proxy(path):
         # Add CORS headers
         response.headers.add('Access-Control-Allow-Origin', '*')
         response.headers.add('Access-Control-Allow-Methods', 'GET, POST, DELETE, PUT, OPTIONS')
-        response.headers.add('Access-Control-Allow-Headers', 'Content-Type, Authorization, X-Requested-With, X-Custom-Header')
+        response.headers.add('Access-Control-Allow-Headers', ALLOW_HEADERS)
+        response.headers['Access-Control-Expose-Headers'] = 'ETag'
         
         return response
     
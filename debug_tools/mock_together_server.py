@@ -0,0 +1,345 @@
+#!/usr/bin/env python
+"""
+Mock Together API Server
+
+A local stand-in for the Together `/v1/chat/completions` endpoint, including
+SSE streaming, so the real client and its connection pool, timeouts and
+retries can be exercised end to end without outside network access. It is
+built on http.server rather than Flask because the Werkzeug dev server
+closes every connection, which would hide keep-alive reuse.
+
+Point the app at it with:
+
+    TOGETHER_BASE_URL=http://127.0.0.1:5080/v1 python local_server.py
+
+Replies come from the same seeded generator as the in-process mock backend.
+Latency, rate limits and injected 429/500/stall responses are set with the
+MOCK_* environment variables below, or changed at runtime through the
+/admin endpoints:
+
+    POST /admin/config   {"latency_median": 2.0, "error_rate": 0.1}
+    POST /admin/script   {"responses": [429, 500, "stall", "ok"]}
+    GET  /admin/stats
+    POST /admin/reset
+"""
+
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+import logging
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.models.llm_backends import MockBackend, mock_usage
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Configuration
+SERVER_PORT = int(os.getenv('MOCK_SERVER_PORT', '5080'))
+
+settings = {
+    'seed': int(os.getenv('MOCK_SEED', '42')),
+    'latency_distribution': os.getenv('MOCK_LATENCY_DISTRIBUTION', 'lognormal'),
+    'latency_median': float(os.getenv('MOCK_LATENCY_MEDIAN', '0.5')),  # seconds to first token
+    'latency_sigma': float(os.getenv('MOCK_LATENCY_SIGMA', '0.5')),
+    'tokens_per_second': float(os.getenv('MOCK_TOKENS_PER_SECOND', '50')),
+    'error_rate': float(os.getenv('MOCK_ERROR_RATE', '0')),  # Share of requests answered with HTTP 500
+    'throttle_rate': float(os.getenv('MOCK_THROTTLE_RATE', '0')),  # Share of requests answered with HTTP 429
+    'retry_after': float(os.getenv('MOCK_RETRY_AFTER', '1')),  # Retry-After sent with injected 429s
+    'rate_limit': float(os.getenv('MOCK_RATE_LIMIT', '0')),  # Requests per second before 429s; 0 disables
+    'rate_burst': int(os.getenv('MOCK_RATE_BURST', '10')),
+    'stall_rate': float(os.getenv('MOCK_STALL_RATE', '0')),  # Share of requests that hang before replying
+    'stall_seconds': float(os.getenv('MOCK_STALL_SECONDS', '120'))
+}
+
+class MockProvider:
+    """Shared state behind the mock endpoint: generator, rate limiter, scripted faults and counters."""
+
+    def __init__(self, options):
+        self._lock = threading.Lock()
+        self.configure(options)
+        self.reset()
+
+    def configure(self, options):
+        with self._lock:
+            self.options = dict(options)
+            self.backend = MockBackend(
+                seed=self.options['seed'],
+                latency_distribution=self.options['latency_distribution'],
+                latency_median=self.options['latency_median'],
+                latency_sigma=self.options['latency_sigma'],
+                tokens_per_second=self.options['tokens_per_second'],
+                error_rate=self.options['error_rate'],
+                throttle_rate=self.options['throttle_rate'],
+                retry_after=self.options['retry_after']
+            )
+            self.rng = random.Random(self.options['seed'])
+            self.tokens = float(self.options['rate_burst'])
+            self.refilled_at = time.monotonic()
+
+    def reset(self):
+        with self._lock:
+            self.script = []
+            self.requests = 0
+            self.streams = 0
+            self.statuses = {}
+            self.connections = set()
+            self.in_flight = 0
+            self.max_in_flight = 0
+
+    def set_script(self, responses):
+        with self._lock:
+            self.script = [str(r) for r in responses]
+
+    def begin(self, connection):
+        """Count a request and decide its fate: 'ok', '429', '500', 'stall' or 'rate_limited'."""
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            self.connections.add(connection)
+            if self.script:
+                return self.script.pop(0)
+
+            rate = self.options['rate_limit']
+            if rate > 0:
+                now = time.monotonic()
+                self.tokens = min(self.options['rate_burst'], self.tokens + (now - self.refilled_at) * rate)
+                self.refilled_at = now
+                if self.tokens < 1:
+                    return 'rate_limited'
+                self.tokens -= 1
+
+            status = self.backend.sample_fault()
+            if status is not None:
+                return str(status)
+            if self.rng.random() < self.options['stall_rate']:
+                return 'stall'
+            return 'ok'
+
+    def retry_after(self, outcome):
+        if outcome == 'rate_limited':
+            with self._lock:
+                return max(0.0, (1 - self.tokens) / self.options['rate_limit'])
+        return self.options['retry_after']
+
+    def finish(self, status, stream=False):
+        with self._lock:
+            self.in_flight -= 1
+            self.statuses[str(status)] = self.statuses.get(str(status), 0) + 1
+            if stream:
+                self.streams += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'streams': self.streams,
+                'statuses': dict(self.statuses),
+                'connections': len(self.connections),
+                'in_flight': self.in_flight,
+                'max_in_flight': self.max_in_flight,
+                'scripted_remaining': len(self.script),
+                'settings': dict(self.options)
+            }
+
+provider = MockProvider(settings)
+
+SCRIPTABLE_OUTCOMES = ('ok', '429', '500', 'stall')
+
+def completion_chunk(completion_id, created, model, delta, finish_reason=None, usage=None):
+    """Format one streaming chunk as an SSE `data:` line."""
+    chunk = {
+        'id': completion_id,
+        'object': 'chat.completion.chunk',
+        'created': created,
+        'model': model,
+        'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}]
+    }
+    if usage is not None:
+        chunk['usage'] = usage
+    return f"data: {json.dumps(chunk)}\n\n"
+
+class MockTogetherHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so clients can keep connections alive; streams use chunked encoding
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        try:
+            return json.loads(body or b'{}')
+        except ValueError:
+            return None
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status, message, error_type, headers=None):
+        """Send an error in the Together/OpenAI error body format."""
+        self._send_json(status, {'error': {'message': message, 'type': error_type, 'param': None, 'code': None}}, headers)
+
+    def _write_chunk(self, text):
+        data = text.encode('utf-8')
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == '/v1/models':
+            # Minimal model list so clients probing the API see a live server
+            self._send_json(200, {'object': 'list', 'data': [{'id': 'mock-model', 'object': 'model'}]})
+        elif path == '/admin/config':
+            self._send_json(200, {'status': 'success', 'settings': provider.options})
+        elif path == '/admin/stats':
+            # `connections` stays low when clients reuse keep-alive sockets
+            self._send_json(200, provider.stats())
+        else:
+            self._send_error(404, f"Unknown path {path}", 'not_found')
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        data = self._read_json()
+        if data is None:
+            self._send_error(400, "Request body is not valid JSON", 'invalid_request_error')
+        elif path == '/v1/chat/completions':
+            self.chat_completions(data)
+        elif path == '/admin/config':
+            self.admin_config(data)
+        elif path == '/admin/script':
+            # Queue outcomes for the next requests, ahead of random injection
+            responses = data.get('responses', [])
+            invalid = [r for r in responses if str(r) not in SCRIPTABLE_OUTCOMES]
+            if invalid:
+                self._send_json(400, {'status': 'error', 'message': f"Invalid scripted responses: {invalid}"})
+                return
+            provider.set_script(responses)
+            self._send_json(200, {'status': 'success', 'scripted': len(responses)})
+        elif path == '/admin/reset':
+            provider.reset()
+            self._send_json(200, {'status': 'success'})
+        else:
+            self._send_error(404, f"Unknown path {path}", 'not_found')
+
+    def admin_config(self, updates):
+        """Update latency, fault and rate-limit settings."""
+        unknown = [key for key in updates if key not in settings]
+        if unknown:
+            self._send_json(400, {'status': 'error', 'message': f"Unknown settings: {', '.join(unknown)}"})
+            return
+        try:
+            options = dict(provider.options)
+            options.update({key: type(settings[key])(value) for key, value in updates.items()})
+        except (TypeError, ValueError) as e:
+            self._send_json(400, {'status': 'error', 'message': str(e)})
+            return
+        provider.configure(options)
+        logger.info(f"Updated mock settings: {updates}")
+        self._send_json(200, {'status': 'success', 'settings': provider.options})
+
+    def chat_completions(self, data):
+        """Chat completions in the Together wire format, streaming when `stream` is true."""
+        if not self.headers.get('Authorization', '').startswith('Bearer '):
+            self._send_error(401, "Missing API key", 'invalid_request_error')
+            return
+        messages = data.get('messages')
+        if not isinstance(messages, list) or not messages:
+            self._send_error(400, "`messages` must be a non-empty list", 'invalid_request_error')
+            return
+        model = data.get('model', 'mock-model')
+        stream = bool(data.get('stream'))
+
+        outcome = provider.begin(self.client_address)
+        backend = provider.backend
+        status = 'aborted'
+        try:
+            if outcome == 'stall':
+                time.sleep(provider.options['stall_seconds'])
+            else:
+                time.sleep(backend.sample_latency())
+
+            if outcome in ('429', 'rate_limited'):
+                status = 429
+                retry_after = provider.retry_after(outcome)
+                self._send_error(429, "Rate limit exceeded", 'rate_limit_exceeded',
+                                 {'Retry-After': f"{retry_after:.2f}"})
+                return
+            if outcome == '500':
+                status = 500
+                self._send_error(500, "Internal server error", 'server_error')
+                return
+
+            text = backend.generate(messages, data.get('max_tokens'), data.get('response_format'))
+            usage = mock_usage(messages, text)
+            completion_id = f"mock-{uuid.uuid4().hex[:16]}"
+            created = int(time.time())
+            tokens_per_second = provider.options['tokens_per_second']
+
+            if not stream:
+                time.sleep(usage['completion_tokens'] / tokens_per_second)
+                self._send_json(200, {
+                    'id': completion_id,
+                    'object': 'chat.completion',
+                    'created': created,
+                    'model': model,
+                    'choices': [{
+                        'index': 0,
+                        'message': {'role': 'assistant', 'content': text},
+                        'finish_reason': 'stop'
+                    }],
+                    'usage': usage
+                })
+                status = 200
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            self._write_chunk(completion_chunk(completion_id, created, model, {'role': 'assistant', 'content': ''}))
+            for i, word in enumerate(text.split(' ')):
+                time.sleep(1 / tokens_per_second)
+                self._write_chunk(completion_chunk(completion_id, created, model,
+                                                   {'content': word if i == 0 else ' ' + word}))
+            self._write_chunk(completion_chunk(completion_id, created, model, {}, finish_reason='stop', usage=usage))
+            self._write_chunk("data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+            status = 200
+        except ConnectionError:
+            # Client timed out or cancelled the request
+            self.close_connection = True
+        finally:
+            provider.finish(status, stream=stream and status == 200)
+
+if __name__ == '__main__':
+    server = ThreadingHTTPServer(('127.0.0.1', SERVER_PORT), MockTogetherHandler)
+    server.daemon_threads = True
+    logger.info(f"Starting mock Together API on port {SERVER_PORT}")
+    logger.info(f"Set TOGETHER_BASE_URL=http://127.0.0.1:{SERVER_PORT}/v1 to use it")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Server stopped.")
@@ -9,8 +9,13 @@ import os
 
 # Add parent directory to path so we can import from other packages
 sys.path.append(os.path.dirname(__file__))
-from src.models.ai_agents import simulate_student_turn, get_mini_ai_feedback, together
-from src.config.config import TOGETHER_API_KEY
+from src.models.ai_agents import simulate_student_turn, get_mini_ai_feedback, get_scheduled_feedback, llm_client
+from src.models.history import RenderedHistory
+from src.config.config import (
+    TOGETHER_API_KEY, CONVERSATION_STORE, CONVERSATION_DB_PATH, CONVERSATION_SPILL_DIR, CONVERSATION_SPILL_TTL,
+    CONVERSATION_MAX_RESIDENT, CONVERSATION_MEMORY_BUDGET, CONVERSATION_IDLE_TTL
+)
+from src.api.conversation_store import ConversationConflict, create_conversation_store
 
 # Set up logging
 logging.basicConfig(
@@ -28,17 +33,14 @@ logger.info(f"API Key loaded: {'Yes' if TOGETHER_API_KEY and TOGETHER_API_KEY !=
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
-# Store active conversations
-active_conversations = {}
-
 class Conversation:
-    def __init__(self, conversation_id):
+    def __init__(self, conversation_id, created_at=None):
         self.conversation_id = conversation_id
-        self.history = []
-        self.created_at = datetime.datetime.utcnow()
-        logger.info(f"Conversation created: {conversation_id}")
+        self.history = RenderedHistory()
+        self.created_at = created_at or datetime.datetime.utcnow()
+        self.version = 0
     
-    def add_message(self, speaker, text):
+    def add_message(self, speaker, text, expected_version=None):
         """Add a message to the conversation history."""
         message = {
             'id': str(uuid.uuid4()),
@@ -46,7 +48,7 @@ class Conversation:
             'text': text,
             'timestamp': datetime.datetime.utcnow().isoformat()
         }
-        self.history.append(message)
+        active_conversations.append(self, message, expected_version)
         logger.info(f"Message added - {speaker}: {text[:50]}...")
         return message
     
@@ -54,16 +56,28 @@ class Conversation:
         """Get the full conversation transcript."""
         return self.history
 
+# Store active conversations
+active_conversations = create_conversation_store(
+    CONVERSATION_STORE,
+    Conversation,
+    path=CONVERSATION_DB_PATH,
+    spill_dir=CONVERSATION_SPILL_DIR,
+    spill_ttl=CONVERSATION_SPILL_TTL,
+    max_resident=CONVERSATION_MAX_RESIDENT,
+    memory_budget=CONVERSATION_MEMORY_BUDGET,
+    idle_ttl=CONVERSATION_IDLE_TTL
+)
+
 @app.route('/api/conversations', methods=['POST'])
 def start_conversation():
     """Start a new conversation."""
     try:
         conversation_id = str(uuid.uuid4())
-        conversation = Conversation(conversation_id)
-        active_conversations[conversation_id] = conversation
+        conversation = active_conversations.create(conversation_id)
+        logger.info(f"Conversation created: {conversation_id}")
         
         # Generate initial student message
-        student_message = simulate_student_turn([])
+        student_message = simulate_student_turn(conversation.history)
         conversation.add_message('student', student_message)
         
         # Get initial suggestions
@@ -86,7 +100,8 @@ def start_conversation():
 def send_message(conversation_id):
     """Send a message from the educator and get student's response."""
     try:
-        if conversation_id not in active_conversations:
+        conversation = active_conversations.get(conversation_id)
+        if conversation is None:
             return jsonify({
                 'status': 'error',
                 'message': 'Conversation not found'
@@ -100,17 +115,16 @@ def send_message(conversation_id):
                 'message': 'No message provided'
             }), 400
         
-        conversation = active_conversations[conversation_id]
-        
         # Add educator's message
-        conversation.add_message('educator', data['message'])
+        version = conversation.version
+        conversation.add_message('educator', data['message'], expected_version=version)
         
         # Generate student's response
         student_message = simulate_student_turn(conversation.history)
-        conversation.add_message('student', student_message)
+        conversation.add_message('student', student_message, expected_version=version + 1)
         
         # Get suggestions for next response
-        feedback = get_mini_ai_feedback(conversation.history)
+        feedback = get_scheduled_feedback(conversation.history)
         
         return jsonify({
             'status': 'success',
@@ -118,6 +132,12 @@ def send_message(conversation_id):
             'transcript': conversation.get_transcript(),
             'suggestions': feedback
         }), 200
+    except ConversationConflict as e:
+        logger.warning(str(e))
+        return jsonify({
+            'status': 'error',
+            'message': 'Conversation was modified by another request; reload it and retry'
+        }), 409
     except Exception as e:
         logger.error(f"Error sending message: {e}", exc_info=True)
         return jsonify({
@@ -129,20 +149,13 @@ def send_message(conversation_id):
 def health_check():
     """Check the health of the server and API connections."""
     try:
-        if together is None:
-            return jsonify({
-                'status': 'degraded',
-                'api_status': 'disconnected',
-                'error': 'Together client not initialized',
-                'active_conversations': len(active_conversations),
-                'timestamp': datetime.datetime.utcnow().isoformat()
-            }), 503
-            
-        if not together.api_key:
+        backend = llm_client.backend.status()
+        if not backend['configured']:
             return jsonify({
                 'status': 'degraded',
                 'api_status': 'disconnected',
-                'error': 'Together API key not set',
+                'backend': backend['backend'],
+                'error': backend['error'],
                 'active_conversations': len(active_conversations),
                 'timestamp': datetime.datetime.utcnow().isoformat()
             }), 503
@@ -150,6 +163,7 @@ def health_check():
         return jsonify({
             'status': 'healthy',
             'api_status': 'connected',
+            'backend': backend['backend'],
             'active_conversations': len(active_conversations),
             'timestamp': datetime.datetime.utcnow().isoformat()
         })
@@ -0,0 +1,786 @@
+import base64
+import bisect
+import datetime
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import logging
+from collections import OrderedDict
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Rough per-message memory cost on top of its text: the message dict, its id and
+# timestamp strings and the copy kept in the rendered history
+MESSAGE_OVERHEAD_BYTES = 600
+CONVERSATION_OVERHEAD_BYTES = 2000
+
+# Orders a conversation listing can be paged in, newest first
+LIST_ORDERS = ('created', 'activity')
+
+def _message_size(message: Dict) -> int:
+    return MESSAGE_OVERHEAD_BYTES + 2 * len(message.get('text', ''))
+
+def encode_cursor(order: str, value, conversation_id: str) -> str:
+    """Opaque listing cursor pointing just past the entry with sort key (value, conversation_id)."""
+    raw = json.dumps([order, value, conversation_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor: str, order: str) -> Tuple:
+    """Return the sort key of a cursor from `encode_cursor`; ValueError if malformed or for another order."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_order, value, conversation_id = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    expected = str if order == 'created' else (int, float)
+    if cursor_order != order or not isinstance(value, expected) or not isinstance(conversation_id, str):
+        raise ValueError(f"Cursor does not belong to a listing ordered by {order}")
+    return value, conversation_id
+
+class ConversationIndex:
+    """Listing summaries of conversations, ordered by creation and by last activity.
+
+    Each order is a sorted list of (sort value, conversation id) keys, so a
+    page is found by bisecting to the cursor and reading back from there,
+    newest first, rather than by visiting every conversation. Summaries
+    carry what a listing shows: `id`, `created_at` (ISO string),
+    `updated_at` (epoch seconds), `message_count` and `last_message`. Not
+    thread-safe; the owning store serialises access.
+    """
+
+    def __init__(self):
+        self._summaries = {}  # conversation_id -> summary
+        self._keys = {order: [] for order in LIST_ORDERS}
+
+    @staticmethod
+    def _sort_values(summary: Dict) -> Dict:
+        return {'created': summary['created_at'], 'activity': summary['updated_at']}
+
+    def _unlink(self, summary: Dict):
+        for order, value in self._sort_values(summary).items():
+            keys = self._keys[order]
+            del keys[bisect.bisect_left(keys, (value, summary['id']))]
+
+    def put(self, summary: Dict):
+        """Add or replace the summary of a conversation."""
+        previous = self._summaries.get(summary['id'])
+        if previous is not None:
+            self._unlink(previous)
+        self._summaries[summary['id']] = summary
+        for order, value in self._sort_values(summary).items():
+            bisect.insort(self._keys[order], (value, summary['id']))
+
+    def record_append(self, conversation_id: str, message: Dict, updated_at: float):
+        """Account for a message appended at `updated_at`."""
+        summary = self._summaries.get(conversation_id)
+        if summary is None:
+            return
+        keys = self._keys['activity']
+        del keys[bisect.bisect_left(keys, (summary['updated_at'], conversation_id))]
+        summary['updated_at'] = updated_at
+        summary['message_count'] += 1
+        summary['last_message'] = message
+        # The newest activity sorts last, so this is an append in practice
+        bisect.insort(keys, (updated_at, conversation_id))
+
+    def get(self, conversation_id: str, default=None) -> Optional[Dict]:
+        return self._summaries.get(conversation_id, default)
+
+    def remove(self, conversation_id: str):
+        summary = self._summaries.pop(conversation_id, None)
+        if summary is not None:
+            self._unlink(summary)
+
+    def page(self, order: str = 'activity', cursor: Optional[str] = None, limit: int = 50,
+             min_idle: Optional[float] = None, max_idle: Optional[float] = None,
+             min_messages: Optional[int] = None, max_messages: Optional[int] = None) -> Tuple[List[Dict], Optional[str]]:
+        """See `ConversationStore.page`."""
+        keys = self._keys[order]
+        end = len(keys) if cursor is None else bisect.bisect_left(keys, decode_cursor(cursor, order))
+        now = time.time()
+        if order == 'activity' and min_idle is not None:
+            # Everything after this point was active too recently
+            end = min(end, bisect.bisect_right(keys, (now - min_idle, '\U0010ffff')))
+
+        found = []
+        for index in range(end - 1, -1, -1):
+            summary = self._summaries[keys[index][1]]
+            if max_idle is not None and summary['updated_at'] < now - max_idle:
+                if order == 'activity':
+                    break  # Older entries are idle for even longer
+                continue
+            if ((min_idle is not None and summary['updated_at'] > now - min_idle)
+                    or (min_messages is not None and summary['message_count'] < min_messages)
+                    or (max_messages is not None and summary['message_count'] > max_messages)):
+                continue
+            if len(found) == limit:
+                last = found[-1]
+                return found, encode_cursor(order, self._sort_values(last)[order], last['id'])
+            found.append(dict(summary))
+        return found, None
+
+    def __len__(self) -> int:
+        return len(self._summaries)
+
+class ConversationConflict(Exception):
+    """Raised when an append was based on a stale version of the conversation."""
+
+    def __init__(self, conversation_id: str, expected: int, actual: Optional[int]):
+        super().__init__(
+            f"Conversation {conversation_id} was modified concurrently "
+            f"(expected version {expected}, found {actual})"
+        )
+        self.conversation_id = conversation_id
+        self.expected = expected
+        self.actual = actual
+
+class ConversationStore:
+    """Where conversations live between requests.
+
+    Conversations are created through `factory(conversation_id, created_at)`
+    and must expose `conversation_id`, `created_at`, `history` and an integer
+    `version` that counts the appends made to it. Appends are optimistic:
+    the caller passes the version its change was based on and gets a
+    `ConversationConflict` if anyone appended in between.
+
+    Conversations held in memory (resident) are kept in LRU order and
+    bounded by `max_resident`, an estimated `memory_budget` in bytes and an
+    `idle_ttl` in seconds; subclasses decide what `_release` does with a
+    conversation that falls out. `on_evict(conversation_id)` is called for
+    a conversation that left memory but can still be loaded, and
+    `on_remove(conversation_id)` for one that is gone for good (deleted,
+    expired, or evicted with nowhere to keep it), so state kept about
+    conversations elsewhere can follow the store's bounds.
+
+    `generation()` returns a token that changes whenever a conversation is
+    created, appended to or deleted, so listings can be revalidated
+    without reading any conversation, and `page()` serves listings from an
+    index kept up to date on every write.
+    """
+
+    name = 'base'
+
+    def __init__(self, factory: Callable, max_resident: Optional[int] = None,
+                 memory_budget: Optional[int] = None, idle_ttl: Optional[float] = None,
+                 on_evict: Optional[Callable[[str], None]] = None,
+                 on_remove: Optional[Callable[[str], None]] = None):
+        self.factory = factory
+        self.max_resident = max_resident
+        self.memory_budget = memory_budget
+        self.idle_ttl = idle_ttl
+        self.on_evict = on_evict
+        self.on_remove = on_remove
+
+        self._resident = OrderedDict()  # conversation_id -> conversation, least recently used first
+        self._last_used = {}  # conversation_id -> time.monotonic() of the last access
+        self._sizes = {}  # conversation_id -> estimated bytes
+        self._bytes = 0
+        self._lock = threading.RLock()
+
+        self.appends = 0
+        self.conflicts = 0
+        self.evictions = 0
+
+    def create(self, conversation_id: str):
+        """Create, store and return an empty conversation."""
+        raise NotImplementedError
+
+    def get(self, conversation_id: str):
+        """Return the up-to-date conversation, or None when it does not exist."""
+        raise NotImplementedError
+
+    def append(self, conversation, message: Dict, expected_version: Optional[int] = None) -> int:
+        """Append `message` if the conversation is still at `expected_version`; return the new version."""
+        raise NotImplementedError
+
+    def delete(self, conversation_id: str) -> bool:
+        """Remove a conversation, returning whether it existed."""
+        raise NotImplementedError
+
+    def conversations(self) -> Iterator:
+        """Iterate over every stored conversation."""
+        raise NotImplementedError
+
+    def generation(self) -> str:
+        """Return a token that differs after any conversation is created, appended to or deleted."""
+        raise NotImplementedError
+
+    def page(self, order: str = 'activity', cursor: Optional[str] = None, limit: int = 50,
+             min_idle: Optional[float] = None, max_idle: Optional[float] = None,
+             min_messages: Optional[int] = None, max_messages: Optional[int] = None) -> Tuple[List[Dict], Optional[str]]:
+        """Return one page of conversation summaries, newest first, and the cursor of the next page.
+
+        `order` is 'created' or 'activity' (last append). `cursor` continues
+        a previous listing in the same order. `min_idle`/`max_idle` bound the
+        seconds since the last activity and `min_messages`/`max_messages` the
+        message count. Summaries are dicts with `id`, `created_at` (ISO
+        string), `updated_at` (epoch seconds), `message_count` and
+        `last_message`; no conversation is loaded to build them. Raises
+        ValueError for a malformed cursor.
+        """
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def exists(self, conversation_id: str) -> bool:
+        """Whether the conversation exists, without loading it."""
+        return self.get(conversation_id) is not None
+
+    def __contains__(self, conversation_id: str) -> bool:
+        return self.exists(conversation_id)
+
+    def resident(self, conversation_id: str):
+        """Return the conversation if this worker holds it in memory, without loading or touching it."""
+        with self._lock:
+            return self._resident.get(conversation_id)
+
+    def resident_conversations(self) -> List:
+        """Return the conversations this worker holds in memory, without loading any others."""
+        with self._lock:
+            return list(self._resident.values())
+
+    def _admit(self, conversation):
+        """Make `conversation` the most recently used resident conversation."""
+        conversation_id = conversation.conversation_id
+        if conversation_id in self._resident:
+            self._bytes -= self._sizes[conversation_id]
+        size = CONVERSATION_OVERHEAD_BYTES + sum(_message_size(m) for m in conversation.history)
+        self._resident[conversation_id] = conversation
+        self._resident.move_to_end(conversation_id)
+        self._last_used[conversation_id] = time.monotonic()
+        self._sizes[conversation_id] = size
+        self._bytes += size
+
+    def _touch(self, conversation_id: str):
+        self._resident.move_to_end(conversation_id)
+        self._last_used[conversation_id] = time.monotonic()
+
+    def _grow(self, conversation_id: str, message: Dict):
+        size = _message_size(message)
+        self._sizes[conversation_id] += size
+        self._bytes += size
+
+    def _forget(self, conversation_id: str):
+        """Drop a conversation from the resident set without releasing it."""
+        conversation = self._resident.pop(conversation_id, None)
+        if conversation is not None:
+            self._bytes -= self._sizes.pop(conversation_id)
+            self._last_used.pop(conversation_id, None)
+        return conversation
+
+    def _release(self, conversation) -> bool:
+        """Called when `conversation` is evicted from memory; returns whether it can still be loaded."""
+        return True
+
+    def _removed(self, conversation_id: str):
+        """Report a conversation that is gone for good."""
+        if self.on_remove is not None:
+            self.on_remove(conversation_id)
+
+    def _enforce_bounds(self):
+        """Evict idle conversations, then least recently used ones until within budget."""
+        evicted = []
+        if self.idle_ttl is not None:
+            cutoff = time.monotonic() - self.idle_ttl
+            while self._resident:
+                conversation_id = next(iter(self._resident))
+                if self._last_used[conversation_id] > cutoff:
+                    break
+                evicted.append(self._forget(conversation_id))
+        # Never evict the most recently used conversation; the caller is about to use it
+        while len(self._resident) > 1 and (
+                (self.max_resident is not None and len(self._resident) > self.max_resident)
+                or (self.memory_budget is not None and self._bytes > self.memory_budget)):
+            evicted.append(self._forget(next(iter(self._resident))))
+
+        for conversation in evicted:
+            if not self._release(conversation):
+                self._removed(conversation.conversation_id)
+            elif self.on_evict is not None:
+                self.on_evict(conversation.conversation_id)
+            self.evictions += 1
+        if evicted:
+            logger.info(f"Evicted {len(evicted)} conversation(s) from memory")
+
+    def stats(self) -> Dict:
+        """Return the backend name, size, memory use and append/conflict/eviction counters."""
+        with self._lock:
+            self._enforce_bounds()
+            return {
+                'backend': self.name,
+                'conversations': len(self),
+                'resident': len(self._resident),
+                'resident_bytes': self._bytes,
+                'evicted': self.evictions,
+                'appends': self.appends,
+                'conflicts': self.conflicts
+            }
+
+class InMemoryConversationStore(ConversationStore):
+    """Conversations in process memory, spilling evicted ones to disk; limited to a single worker.
+
+    Evicted conversations are written to `spill_dir` as JSON and loaded
+    back on the next access, so an abandoned conversation costs disk
+    rather than memory. Derived per-history state (rendered prompt,
+    feedback and usage bookkeeping) is not spilled and starts afresh after
+    rehydration. Spilled files older than `spill_ttl` seconds are deleted,
+    and files left by a previous run are picked up at start. The directory
+    is created on the first spill.
+    """
+
+    name = 'memory'
+
+    def __init__(self, factory: Callable, spill_dir: Optional[str] = None,
+                 spill_ttl: float = 7 * 24 * 3600, **bounds):
+        super().__init__(factory, **bounds)
+        self.spill_dir = spill_dir
+        self.spill_ttl = spill_ttl
+        self._spilled = OrderedDict()  # conversation_id -> time.time() it was spilled, oldest first
+        self.rehydrations = 0
+        # Changes counted since start; the epoch keeps tokens from a previous run from matching
+        self._epoch = uuid.uuid4().hex[:8]
+        self._changes = 0
+        self._index = ConversationIndex()
+
+        if spill_dir and os.path.isdir(spill_dir):
+            cutoff = time.time() - spill_ttl
+            entries = []
+            for filename in os.listdir(spill_dir):
+                if not filename.endswith('.json'):
+                    continue
+                path = os.path.join(spill_dir, filename)
+                mtime = os.path.getmtime(path)
+                if mtime < cutoff:
+                    os.remove(path)
+                else:
+                    entries.append((mtime, filename[:-len('.json')]))
+            for mtime, conversation_id in sorted(entries):
+                self._spilled[conversation_id] = mtime
+                self._index_spilled(conversation_id, mtime)
+            if entries:
+                logger.info(f"Found {len(entries)} spilled conversation(s) in {spill_dir}")
+
+    def _spill_path(self, conversation_id: str) -> str:
+        return os.path.join(self.spill_dir, f"{conversation_id}.json")
+
+    def _index_spilled(self, conversation_id: str, mtime: float):
+        """Add a conversation spilled by a previous run to the listing index."""
+        try:
+            with open(self._spill_path(conversation_id)) as f:
+                payload = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not index spilled conversation {conversation_id}: {e}")
+            return
+        messages = payload['messages']
+        self._index.put({
+            'id': conversation_id,
+            'created_at': payload['created_at'],
+            'updated_at': payload.get('updated_at', mtime),
+            'message_count': len(messages),
+            'last_message': messages[-1] if messages else None
+        })
+
+    def _release(self, conversation) -> bool:
+        if not self.spill_dir:
+            self._index.remove(conversation.conversation_id)
+            self._changes += 1
+            return False
+        os.makedirs(self.spill_dir, exist_ok=True)
+        path = self._spill_path(conversation.conversation_id)
+        payload = {
+            'conversation_id': conversation.conversation_id,
+            'created_at': conversation.created_at.isoformat(),
+            'version': conversation.version,
+            'updated_at': self._index.get(conversation.conversation_id, {}).get('updated_at', time.time()),
+            'messages': list(conversation.history)
+        }
+        with open(path + '.tmp', 'w') as f:
+            json.dump(payload, f)
+        os.replace(path + '.tmp', path)
+        self._spilled[conversation.conversation_id] = time.time()
+        return True
+
+    def _load(self, conversation_id: str):
+        """Read a spilled conversation back from disk, or None if it is gone."""
+        try:
+            with open(self._spill_path(conversation_id)) as f:
+                payload = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not rehydrate conversation {conversation_id}: {e}")
+            if self._spilled.pop(conversation_id, None) is not None:
+                self._index.remove(conversation_id)
+                self._changes += 1
+                self._removed(conversation_id)
+            return None
+        conversation = self.factory(conversation_id, datetime.datetime.fromisoformat(payload['created_at']))
+        for message in payload['messages']:
+            conversation.history.append(message)
+        conversation.version = payload['version']
+        return conversation
+
+    def _unspill(self, conversation_id: str):
+        self._spilled.pop(conversation_id, None)
+        try:
+            os.remove(self._spill_path(conversation_id))
+        except OSError:
+            pass
+
+    def _enforce_bounds(self):
+        super()._enforce_bounds()
+        cutoff = time.time() - self.spill_ttl
+        while self._spilled:
+            conversation_id, spilled_at = next(iter(self._spilled.items()))
+            if spilled_at > cutoff:
+                break
+            self._unspill(conversation_id)
+            self._index.remove(conversation_id)
+            self._changes += 1
+            self._removed(conversation_id)
+
+    def create(self, conversation_id: str):
+        conversation = self.factory(conversation_id, datetime.datetime.utcnow())
+        with self._lock:
+            self._admit(conversation)
+            self._index.put({
+                'id': conversation_id,
+                'created_at': conversation.created_at.isoformat(),
+                'updated_at': time.time(),
+                'message_count': 0,
+                'last_message': None
+            })
+            self._changes += 1
+            self._enforce_bounds()
+        return conversation
+
+    def get(self, conversation_id: str):
+        with self._lock:
+            conversation = self._resident.get(conversation_id)
+            if conversation is not None:
+                self._touch(conversation_id)
+            elif conversation_id in self._spilled:
+                conversation = self._load(conversation_id)
+                if conversation is None:
+                    return None
+                self._unspill(conversation_id)
+                self._admit(conversation)
+                self.rehydrations += 1
+            self._enforce_bounds()
+            return conversation
+
+    def append(self, conversation, message: Dict, expected_version: Optional[int] = None) -> int:
+        conversation_id = conversation.conversation_id
+        with self._lock:
+            current = self._resident.get(conversation_id)
+            if current is not conversation:
+                # The caller's copy was evicted (or rehydrated by someone else) while it was in use
+                if current is None and conversation_id in self._spilled:
+                    current = self._load(conversation_id)
+                if current is None or current.version != conversation.version:
+                    self.conflicts += 1
+                    raise ConversationConflict(conversation_id, conversation.version,
+                                               current.version if current is not None else None)
+                self._unspill(conversation_id)
+                self._admit(conversation)
+            if expected_version is not None and conversation.version != expected_version:
+                self.conflicts += 1
+                raise ConversationConflict(conversation_id, expected_version, conversation.version)
+            conversation.history.append(message)
+            conversation.version += 1
+            self._grow(conversation_id, message)
+            self._touch(conversation_id)
+            self._index.record_append(conversation_id, message, time.time())
+            self.appends += 1
+            self._changes += 1
+            self._enforce_bounds()
+            return conversation.version
+
+    def delete(self, conversation_id: str) -> bool:
+        with self._lock:
+            existed = self._forget(conversation_id) is not None or conversation_id in self._spilled
+            if conversation_id in self._spilled:
+                self._unspill(conversation_id)
+            if existed:
+                self._index.remove(conversation_id)
+                self._changes += 1
+                self._removed(conversation_id)
+            return existed
+
+    def exists(self, conversation_id: str) -> bool:
+        with self._lock:
+            return conversation_id in self._resident or conversation_id in self._spilled
+
+    def conversations(self) -> Iterator:
+        # Spilled conversations are read without being made resident again
+        with self._lock:
+            resident = list(self._resident.values())
+            spilled = list(self._spilled)
+        yield from resident
+        for conversation_id in spilled:
+            with self._lock:
+                conversation = self._resident.get(conversation_id)
+                if conversation is None and conversation_id in self._spilled:
+                    conversation = self._load(conversation_id)
+            if conversation is not None:
+                yield conversation
+
+    def generation(self) -> str:
+        with self._lock:
+            self._enforce_bounds()
+            return f"{self._epoch}.{self._changes}"
+
+    def page(self, order: str = 'activity', cursor: Optional[str] = None, limit: int = 50,
+             **filters) -> Tuple[List[Dict], Optional[str]]:
+        with self._lock:
+            self._enforce_bounds()
+            return self._index.page(order, cursor, limit, **filters)
+
+    def __len__(self) -> int:
+        return len(self._resident) + len(self._spilled)
+
+    def stats(self) -> Dict:
+        stats = super().stats()
+        stats['spilled'] = len(self._spilled)
+        stats['rehydrations'] = self.rehydrations
+        return stats
+
+class SQLiteConversationStore(ConversationStore):
+    """Conversations in an SQLite database in WAL mode, shared by every worker on the host.
+
+    Each worker keeps the conversations it has touched in memory and, on
+    every `get`, compares their version with the database and loads only
+    the messages appended elsewhere since, so per-conversation caches on
+    the history (rendered prompt, feedback state) survive between
+    requests. Appends bump the version with a compare-and-set inside an
+    immediate transaction. Conversations evicted from memory are simply
+    dropped, since the database already holds them.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, factory: Callable, path: str, busy_timeout: float = 5, **bounds):
+        super().__init__(factory, **bounds)
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self.refreshes = 0  # Resident conversations brought up to date from the database
+
+        db = self._db()
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS conversations "
+            "(id TEXT PRIMARY KEY, created_at TEXT NOT NULL, version INTEGER NOT NULL, updated_at REAL NOT NULL)"
+        )
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS messages "
+            "(conversation_id TEXT NOT NULL, seq INTEGER NOT NULL, body TEXT NOT NULL, "
+            "PRIMARY KEY (conversation_id, seq))"
+        )
+        # Listing indexes; the version doubles as the message count
+        db.execute("CREATE INDEX IF NOT EXISTS conversations_by_created ON conversations (created_at, id)")
+        db.execute("CREATE INDEX IF NOT EXISTS conversations_by_activity ON conversations (updated_at, id)")
+        # Single row counting every create, append and delete, shared by all workers
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS store_generation "
+            "(id INTEGER PRIMARY KEY CHECK (id = 0), epoch TEXT NOT NULL, changes INTEGER NOT NULL)"
+        )
+        db.execute("INSERT OR IGNORE INTO store_generation (id, epoch, changes) VALUES (0, ?, 0)",
+                   (uuid.uuid4().hex[:8],))
+
+    def _db(self) -> sqlite3.Connection:
+        # One connection per thread; WAL lets readers proceed while another worker writes
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None,
+                                 check_same_thread=False)
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def create(self, conversation_id: str):
+        created_at = datetime.datetime.utcnow()
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.execute(
+                "INSERT INTO conversations (id, created_at, version, updated_at) VALUES (?, ?, 0, ?)",
+                (conversation_id, created_at.isoformat(), time.time())
+            )
+            db.execute("UPDATE store_generation SET changes = changes + 1")
+            db.execute("COMMIT")
+        except sqlite3.Error:
+            db.execute("ROLLBACK")
+            raise
+        conversation = self.factory(conversation_id, created_at)
+        with self._lock:
+            self._admit(conversation)
+            self._enforce_bounds()
+        return conversation
+
+    def get(self, conversation_id: str):
+        db = self._db()
+        row = db.execute("SELECT created_at, version FROM conversations WHERE id = ?", (conversation_id,)).fetchone()
+        with self._lock:
+            if row is None:
+                self._forget(conversation_id)
+                return None
+            created_at, version = row
+            conversation = self._resident.get(conversation_id)
+            if conversation is None:
+                conversation = self.factory(conversation_id, datetime.datetime.fromisoformat(created_at))
+                self._admit(conversation)
+            if version > conversation.version:
+                rows = db.execute(
+                    "SELECT body FROM messages WHERE conversation_id = ? AND seq >= ? ORDER BY seq",
+                    (conversation_id, len(conversation.history))
+                ).fetchall()
+                for (body,) in rows:
+                    message = json.loads(body)
+                    conversation.history.append(message)
+                    self._grow(conversation_id, message)
+                # Every append adds exactly one message, so the version is the message count
+                conversation.version = len(conversation.history)
+                self.refreshes += 1
+            self._touch(conversation_id)
+            self._enforce_bounds()
+            return conversation
+
+    def append(self, conversation, message: Dict, expected_version: Optional[int] = None) -> int:
+        conversation_id = conversation.conversation_id
+        with self._lock:
+            if expected_version is None:
+                expected_version = conversation.version
+            if conversation.version != expected_version:
+                self.conflicts += 1
+                raise ConversationConflict(conversation_id, expected_version, conversation.version)
+
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                updated = db.execute(
+                    "UPDATE conversations SET version = version + 1, updated_at = ? WHERE id = ? AND version = ?",
+                    (time.time(), conversation_id, expected_version)
+                ).rowcount
+                if not updated:
+                    row = db.execute("SELECT version FROM conversations WHERE id = ?", (conversation_id,)).fetchone()
+                    db.execute("ROLLBACK")
+                    self.conflicts += 1
+                    raise ConversationConflict(conversation_id, expected_version, row[0] if row else None)
+                db.execute(
+                    "INSERT INTO messages (conversation_id, seq, body) VALUES (?, ?, ?)",
+                    (conversation_id, len(conversation.history), json.dumps(message))
+                )
+                db.execute("UPDATE store_generation SET changes = changes + 1")
+                db.execute("COMMIT")
+            except sqlite3.Error:
+                db.execute("ROLLBACK")
+                raise
+
+            conversation.history.append(message)
+            conversation.version += 1
+            if self._resident.get(conversation_id) is conversation:
+                self._grow(conversation_id, message)
+                self._touch(conversation_id)
+            else:
+                # The caller's copy was evicted while in use; it is current, so keep it
+                self._admit(conversation)
+            self.appends += 1
+            self._enforce_bounds()
+            return conversation.version
+
+    def delete(self, conversation_id: str) -> bool:
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            deleted = db.execute("DELETE FROM conversations WHERE id = ?", (conversation_id,)).rowcount
+            db.execute("DELETE FROM messages WHERE conversation_id = ?", (conversation_id,))
+            if deleted:
+                db.execute("UPDATE store_generation SET changes = changes + 1")
+            db.execute("COMMIT")
+        except sqlite3.Error:
+            db.execute("ROLLBACK")
+            raise
+        with self._lock:
+            self._forget(conversation_id)
+            if deleted:
+                self._removed(conversation_id)
+        return bool(deleted)
+
+    def exists(self, conversation_id: str) -> bool:
+        row = self._db().execute("SELECT 1 FROM conversations WHERE id = ?", (conversation_id,)).fetchone()
+        return row is not None
+
+    def conversations(self) -> Iterator:
+        ids = [row[0] for row in self._db().execute("SELECT id FROM conversations ORDER BY created_at")]
+        for conversation_id in ids:
+            conversation = self.get(conversation_id)
+            if conversation is not None:
+                yield conversation
+
+    def generation(self) -> str:
+        epoch, changes = self._db().execute("SELECT epoch, changes FROM store_generation").fetchone()
+        return f"{epoch}.{changes}"
+
+    def page(self, order: str = 'activity', cursor: Optional[str] = None, limit: int = 50,
+             min_idle: Optional[float] = None, max_idle: Optional[float] = None,
+             min_messages: Optional[int] = None, max_messages: Optional[int] = None) -> Tuple[List[Dict], Optional[str]]:
+        column = 'c.created_at' if order == 'created' else 'c.updated_at'
+        now = time.time()
+        clauses, params = [], []
+        if cursor is not None:
+            clauses.append(f"({column}, c.id) < (?, ?)")
+            params.extend(decode_cursor(cursor, order))
+        for clause, value in (("c.updated_at <= ?", None if min_idle is None else now - min_idle),
+                              ("c.updated_at >= ?", None if max_idle is None else now - max_idle),
+                              ("c.version >= ?", min_messages),
+                              ("c.version <= ?", max_messages)):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        rows = self._db().execute(
+            "SELECT c.id, c.created_at, c.updated_at, c.version, m.body FROM conversations c "
+            "LEFT JOIN messages m ON m.conversation_id = c.id AND m.seq = c.version - 1 "
+            f"{where} ORDER BY {column} DESC, c.id DESC LIMIT ?",
+            (*params, limit + 1)
+        ).fetchall()
+
+        found = [{
+            'id': conversation_id,
+            'created_at': created_at,
+            'updated_at': updated_at,
+            'message_count': version,
+            'last_message': json.loads(body) if body else None
+        } for conversation_id, created_at, updated_at, version, body in rows[:limit]]
+        if len(rows) <= limit:
+            return found, None
+        last = found[-1]
+        return found, encode_cursor(order, last['created_at'] if order == 'created' else last['updated_at'], last['id'])
+
+    def __len__(self) -> int:
+        return self._db().execute("SELECT COUNT(*) FROM conversations").fetchone()[0]
+
+    def stats(self) -> Dict:
+        stats = super().stats()
+        stats['refreshes'] = self.refreshes
+        return stats
+
+def create_conversation_store(name: str, factory: Callable, path: Optional[str] = None,
+                              spill_dir: Optional[str] = None, spill_ttl: float = 7 * 24 * 3600,
+                              **bounds) -> ConversationStore:
+    """Build the conversation store selected in config.
+
+    `memory` spills evicted conversations to `spill_dir`; `sqlite` keeps
+    everything in the database at `path`. `bounds` (max_resident,
+    memory_budget, idle_ttl) limit the conversations kept in memory, and
+    the `on_evict`/`on_remove` callbacks are passed through.
+    """
+    if name == InMemoryConversationStore.name:
+        return InMemoryConversationStore(factory, spill_dir=spill_dir, spill_ttl=spill_ttl, **bounds)
+    if name == SQLiteConversationStore.name:
+        return SQLiteConversationStore(factory, path, **bounds)
+    raise ValueError(f"Unknown conversation store: {name}")
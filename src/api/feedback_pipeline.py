@@ -0,0 +1,109 @@
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class FeedbackPipeline:
+    """Run Mini-AI feedback jobs on a worker pool and hand results to long-polling readers.
+    
+    Every submitted job gets a per-conversation sequence number. Readers wait
+    for a result newer than the last sequence they have seen; results from a
+    job that was superseded by a newer submission are dropped. Results are
+    kept only while their conversation is in memory: `release` drops the
+    result of one that was evicted and `discard` forgets one that is gone.
+    """
+    
+    def __init__(self, feedback_fn: Callable[[List[Dict[str, str]]], Dict], max_workers: int = 4):
+        self.feedback_fn = feedback_fn
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='feedback')
+        self._condition = threading.Condition()
+        self._submitted = {}  # conversation_id -> latest submitted sequence
+        self._results = {}    # conversation_id -> latest completed result
+    
+    def submit(self, conversation_id: str, history: List[Dict[str, str]]) -> int:
+        """Queue a feedback job for a snapshot of the history and return its sequence number."""
+        snapshot = history.copy()
+        with self._condition:
+            sequence = self._submitted.get(conversation_id, 0) + 1
+            self._submitted[conversation_id] = sequence
+        self._executor.submit(self._run, conversation_id, sequence, snapshot)
+        return sequence
+    
+    def publish(self, conversation_id: str, feedback: Dict) -> int:
+        """Record feedback that was computed ahead of time and return its sequence number."""
+        with self._condition:
+            sequence = self._submitted.get(conversation_id, 0) + 1
+            self._submitted[conversation_id] = sequence
+        self._store(conversation_id, sequence, {'status': 'ready', 'feedback': feedback})
+        return sequence
+    
+    def _run(self, conversation_id: str, sequence: int, history: List[Dict[str, str]]):
+        try:
+            result = {'status': 'ready', 'feedback': self.feedback_fn(history)}
+        except Exception as e:
+            logger.error(f"Feedback job failed for {conversation_id}: {e}", exc_info=True)
+            result = {'status': 'error', 'error': str(e)}
+        self._store(conversation_id, sequence, result)
+    
+    def _store(self, conversation_id: str, sequence: int, result: Dict):
+        result['sequence'] = sequence
+        result['completed_at'] = time.time()
+        
+        with self._condition:
+            if conversation_id not in self._submitted:
+                # Conversation was discarded while the job was running
+                return
+            current = self._results.get(conversation_id)
+            if current is None or current['sequence'] < sequence:
+                self._results[conversation_id] = result
+                self._condition.notify_all()
+    
+    def wait(self, conversation_id: str, since: int = 0, timeout: float = 30) -> Dict:
+        """Block until a result newer than `since` is available or the timeout expires."""
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                result = self._results.get(conversation_id)
+                if result is not None and result['sequence'] > since:
+                    return dict(result)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or conversation_id not in self._submitted:
+                    return {
+                        'status': 'pending',
+                        'sequence': result['sequence'] if result else 0,
+                        'latest_sequence': self._submitted.get(conversation_id, 0)
+                    }
+                self._condition.wait(remaining)
+    
+    def latest(self, conversation_id: str) -> Optional[Dict]:
+        """Return the most recent completed result without waiting."""
+        with self._condition:
+            result = self._results.get(conversation_id)
+            return dict(result) if result else None
+    
+    def release(self, conversation_id: str):
+        """Drop the result held for an evicted conversation, keeping its sequence so later results stay newer."""
+        with self._condition:
+            self._results.pop(conversation_id, None)
+    
+    def discard(self, conversation_id: str):
+        """Forget a conversation and wake any readers waiting on it."""
+        with self._condition:
+            self._submitted.pop(conversation_id, None)
+            self._results.pop(conversation_id, None)
+            self._condition.notify_all()
+    
+    def stats(self) -> Dict:
+        """Return how many conversations have sequences and results held."""
+        with self._condition:
+            return {
+                'conversations': len(self._submitted),
+                'results': len(self._results)
+            }
+    
+    def shutdown(self, wait: bool = False):
+        """Stop accepting jobs and release the worker threads."""
+        self._executor.shutdown(wait=wait)
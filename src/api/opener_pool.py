@@ -0,0 +1,150 @@
+import threading
+import time
+import logging
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+from src.models.history import RenderedHistory
+
+logger = logging.getLogger(__name__)
+
+class OpenerPool:
+    """Background-refilled pool of ready-made opening student turns.
+
+    Every entry holds an opening student message together with the Mini-AI
+    feedback for it, so a new conversation can start without waiting on any
+    completion. Each entry is handed out once; entries older than `ttl`
+    seconds are discarded. When the pool drops below `low_water` a refill
+    thread tops it back up to `size`. Openers whose feedback is the
+    degraded fallback (served while the provider is failing) are dropped
+    rather than pooled, so they are not handed out after it recovers.
+    Each opener is generated on its own `RenderedHistory`, which travels
+    with the entry so the conversation that takes it inherits the feedback,
+    route and usage state built while generating it.
+    """
+
+    def __init__(self, student_fn: Callable[[List[Dict[str, str]]], str],
+                 feedback_fn: Callable[[List[Dict[str, str]]], Dict],
+                 size: int = 8, low_water: int = 3, ttl: float = 1800,
+                 retry_delay: float = 5):
+        self.student_fn = student_fn
+        self.feedback_fn = feedback_fn
+        self.size = size
+        self.low_water = low_water
+        self.ttl = ttl
+        self.retry_delay = retry_delay
+
+        self._entries = deque()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._running = False
+
+        self.generated = 0
+        self.served = 0
+        self.misses = 0  # take() calls that found the pool empty
+        self.expired = 0
+        self.degraded = 0  # Openers dropped because their feedback was the fallback
+        self.refills = 0  # Times a take() left the pool below the low-water mark
+
+    def start(self):
+        """Start the refill thread if it is not already running."""
+        with self._lock:
+            if self._running or self.size <= 0:
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._refill_loop, name='opener-pool', daemon=True)
+            self._thread.start()
+        logger.info(f"Opener pool started (size={self.size}, low_water={self.low_water})")
+
+    def stop(self):
+        """Stop the refill thread."""
+        self._running = False
+        self._wakeup.set()
+
+    def take(self) -> Optional[Dict]:
+        """Remove and return a fresh opener, or None when the pool is empty."""
+        self.start()
+        with self._lock:
+            self._evict_expired()
+            entry = self._entries.popleft() if self._entries else None
+            remaining = len(self._entries)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.served += 1
+            if remaining < self.low_water:
+                self.refills += 1
+
+        if remaining < self.low_water:
+            self._wakeup.set()
+        return entry
+
+    def stats(self) -> Dict:
+        """Return the pool occupancy and how many openers were generated, served and dropped."""
+        with self._lock:
+            self._evict_expired()
+            return {
+                'available': len(self._entries),
+                'size': self.size,
+                'low_water': self.low_water,
+                'running': self._running,
+                'generated': self.generated,
+                'served': self.served,
+                'misses': self.misses,
+                'refills': self.refills,
+                'expired': self.expired,
+                'degraded': self.degraded
+            }
+
+    def _evict_expired(self):
+        cutoff = time.time() - self.ttl
+        while self._entries and self._entries[0]['created_at'] < cutoff:
+            self._entries.popleft()
+            self.expired += 1
+
+    def _generate(self) -> Optional[Dict]:
+        """Build an opener, or return None when its feedback is the degraded fallback."""
+        history = RenderedHistory()
+        text = self.student_fn(history)
+        history.append({'speaker': 'student', 'text': text})
+        feedback = self.feedback_fn(history)
+        if feedback.get('degraded'):
+            with self._lock:
+                self.degraded += 1
+            return None
+        return {
+            'text': text,
+            'feedback': feedback,
+            'history': history,
+            'created_at': time.time()
+        }
+
+    def _refill_loop(self):
+        while self._running:
+            with self._lock:
+                self._evict_expired()
+                missing = self.size - len(self._entries)
+
+            if missing > 0:
+                try:
+                    entry = self._generate()
+                except Exception as e:
+                    logger.error(f"Failed to generate opener: {e}", exc_info=True)
+                    entry = None
+                if entry is None:
+                    # Provider failing or degraded; back off before trying again
+                    self._wakeup.wait(self.retry_delay)
+                    self._wakeup.clear()
+                    continue
+                with self._lock:
+                    self._entries.append(entry)
+                    self.generated += 1
+                continue
+
+            # Pool is full: sleep until it drains below the low-water mark or
+            # the oldest entry is due to expire
+            with self._lock:
+                oldest = self._entries[0]['created_at'] if self._entries else time.time()
+            self._wakeup.wait(max(1, oldest + self.ttl - time.time()))
+            self._wakeup.clear()
@@ -1,4 +1,4 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context
 from flask_cors import CORS
 import json
 import uuid
@@ -7,14 +7,27 @@ import datetime
 import logging
 import sys
 import os
+import zlib
 import traceback
 
 # Add parent directory to path so we can import from other packages
 sys.path.append(os.path.join(os.path.dirname(__file__), '../../'))
 from src.config.config import *
-from src.models.ai_agents import simulate_student_turn, get_mini_ai_feedback, together
+from src.models.circuit_breaker import CircuitOpenError
+from src.models.rate_limiter import RateLimitExceeded
+from src.models.ai_agents import (
+    simulate_student_turn, stream_student_turn, get_mini_ai_feedback, get_scheduled_feedback, reusable_feedback,
+    llm_client, response_cache, feedback_parser, incremental_feedback, feedback_scheduler, model_router,
+    usage_tracker, semantic_cache, text_scanner, detect_risk
+)
+from src.models.history import RenderedHistory
+from src.models.usage_accounting import UsageLedger
+from src.api.feedback_pipeline import FeedbackPipeline
+from src.api.opener_pool import OpenerPool
+from src.api.conversation_store import LIST_ORDERS, ConversationConflict, create_conversation_store
 
 # Set up logging
+os.makedirs(os.path.dirname(LOG_FILE) or '.', exist_ok=True)
 logging.basicConfig(
     level=getattr(logging, LOG_LEVEL),
     format='%(asctime)s - %(levelname)s - %(message)s',
@@ -47,31 +60,68 @@ ALLOWED_ORIGINS = [
     "https://zippy-kitsune-1bbced.netlify.app"
 ]
 
-# Store active conversations
-active_conversations = {}
+# Background worker pool for Mini-AI feedback
+feedback_pipeline = FeedbackPipeline(get_mini_ai_feedback, max_workers=FEEDBACK_WORKERS)
+
+# Pre-generated opening student turns for instant conversation start
+opener_pool = OpenerPool(
+    simulate_student_turn,
+    get_mini_ai_feedback,
+    size=OPENER_POOL_SIZE,
+    low_water=OPENER_POOL_LOW_WATER,
+    ttl=OPENER_POOL_TTL
+)
 
 class Conversation:
-    def __init__(self, conversation_id):
+    def __init__(self, conversation_id, created_at=None):
         self.conversation_id = conversation_id
-        self.history = []
-        self.created_at = datetime.datetime.utcnow()
-        logger.info(f"Conversation created: {conversation_id}")
+        self.history = RenderedHistory()
+        self.created_at = created_at or datetime.datetime.utcnow()
+        self.version = 0  # Appends so far; checked by the store to detect concurrent writers
     
-    def add_message(self, speaker, text):
-        """Add a message to the conversation history."""
-        message = {
+    def add_message(self, speaker, text, expected_version=None):
+        """Add a message to the conversation history.
+        
+        Raises ConversationConflict when `expected_version` is given and another
+        request has appended to the conversation since.
+        """
+        return self.commit_message(self.make_message(speaker, text), expected_version)
+    
+    def make_message(self, speaker, text, seq=None):
+        """Build a message entry without adding it; `seq` defaults to the next position."""
+        return {
             'id': str(uuid.uuid4()),
+            'seq': len(self.history) if seq is None else seq,
             'speaker': speaker,
             'text': text,
             'timestamp': datetime.datetime.utcnow().isoformat()
         }
-        self.history.append(message)
-        logger.info(f"Message added - {speaker}: {text[:50]}...")
+    
+    def commit_message(self, message, expected_version=None):
+        """Add a message built by `make_message`; raises ConversationConflict like `add_message`."""
+        conversation_store.append(self, message, expected_version)
+        logger.info(f"Message added - {message['speaker']}: {message['text'][:50]}...")
         return message
     
-    def get_transcript(self):
-        """Get the full conversation transcript."""
-        return self.history
+    def get_transcript(self, start=0, end=None):
+        """Get the full conversation transcript, or the messages from `start` up to `end`."""
+        if start == 0 and end is None:
+            return self.history
+        return self.history[start:end]
+    
+    def message_index(self, since):
+        """Return the index of the first message after the cursor `since`.
+        
+        `since` is a message sequence number or message id. Raises ValueError
+        for an id that is not in the conversation.
+        """
+        if since.lstrip('-').isdigit():
+            return max(0, min(int(since) + 1, len(self.history)))
+        # Cursors almost always point at recent messages, so search from the end
+        for index in range(len(self.history) - 1, -1, -1):
+            if self.history[index].get('id') == since:
+                return index + 1
+        raise ValueError(f"Unknown message id: {since}")
     
     def get_metadata(self):
         """Get conversation metadata."""
@@ -79,30 +129,148 @@ class Conversation:
             'id': self.conversation_id,
             'created_at': self.created_at.isoformat(),
             'message_count': len(self.history),
-            'last_message': self.history[-1] if self.history else None
+            'last_message': self.history[-1] if self.history else None,
+            'usage': usage_tracker.ledger_for(self.history).totals()
+        }
+
+# Store active conversations, shared between workers when CONVERSATION_STORE is 'sqlite';
+# idle ones are evicted from memory and, for the 'memory' store, spilled to disk.
+# Feedback results follow them out, so they are bounded the same way
+conversation_store = create_conversation_store(
+    CONVERSATION_STORE,
+    Conversation,
+    path=CONVERSATION_DB_PATH,
+    spill_dir=CONVERSATION_SPILL_DIR,
+    spill_ttl=CONVERSATION_SPILL_TTL,
+    max_resident=CONVERSATION_MAX_RESIDENT,
+    memory_budget=CONVERSATION_MEMORY_BUDGET,
+    idle_ttl=CONVERSATION_IDLE_TTL,
+    on_evict=feedback_pipeline.release,
+    on_remove=feedback_pipeline.discard
+)
+
+# Feedback results are held in this worker's memory, so a poll served by another worker
+# sharing the SQLite store would wait forever; compute feedback inline there instead
+async_feedback = ASYNC_FEEDBACK and conversation_store.name != 'sqlite'
+if ASYNC_FEEDBACK and not async_feedback:
+    logger.warning("ASYNC_FEEDBACK is ignored with the sqlite conversation store; feedback is computed inline")
+
+def transcript_fields(conversation, start):
+    """Response fields for a turn: the messages from `start` on, plus the full transcript if requested."""
+    fields = {
+        'messages': conversation.get_transcript(start),
+        'version': conversation.version
+    }
+    # Older clients rebuild their view from the whole transcript every turn
+    if request.args.get('transcript') == 'full':
+        fields['transcript'] = conversation.get_transcript()
+    return fields
+
+def conflict_response(error):
+    """Build the 409 response for an append based on a stale conversation."""
+    logger.warning(str(error))
+    return jsonify({
+        'status': 'error',
+        'message': 'Conversation was modified by another request; reload it and retry',
+        'version': error.actual
+    }), 409
+
+def unavailable_response(error, action):
+    """Build the 503 response for a call rejected by the circuit breaker or the rate limiter."""
+    logger.warning(f"Error {action}: {error}")
+    return jsonify({
+        'status': 'error',
+        'message': str(error),
+        'retry_after': round(error.retry_after)
+    }), 503, {'Retry-After': str(max(1, round(error.retry_after)))}
+
+def make_etag(*parts):
+    """Strong ETag for the representation identified by `parts` and the request's query string."""
+    tag = '.'.join(str(part) for part in parts)
+    if request.query_string:
+        # Every page or view of a resource is a representation of its own
+        tag += '-' + format(zlib.crc32(request.query_string), '08x')
+    return f'"{tag}"'
+
+def cache_headers(etag):
+    """Headers that let clients cache a response but revalidate it on every use."""
+    return {'ETag': etag, 'Cache-Control': 'no-cache'}
+
+def not_modified(etag):
+    """Return a 304 response if the client's If-None-Match already matches `etag`, otherwise None."""
+    if request.if_none_match.contains_weak(etag.strip('"')):
+        return '', 304, cache_headers(etag)
+    return None
+
+def request_feedback(conversation, precomputed=None):
+    """Compute feedback inline or queue it, returning the response fields for the turn."""
+    if precomputed is not None:
+        feedback_scheduler.record(conversation.history, precomputed)
+    else:
+        # Low-value turns keep the current suggestions instead of calling the feedback model
+        reused = reusable_feedback(conversation.history)
+        if reused is not None:
+            if not async_feedback:
+                return {'suggestions': reused}
+            latest = feedback_pipeline.latest(conversation.conversation_id)
+            return {
+                'suggestions': reused,
+                'feedback': {'status': 'reused', 'sequence': latest['sequence'] if latest else 0}
+            }
+    
+    if not async_feedback:
+        return {'suggestions': precomputed or get_mini_ai_feedback(conversation.history)}
+    
+    if precomputed is not None:
+        sequence = feedback_pipeline.publish(conversation.conversation_id, precomputed)
+        return {
+            'suggestions': precomputed,
+            'feedback': {'status': 'ready', 'sequence': sequence}
         }
+    
+    sequence = feedback_pipeline.submit(conversation.conversation_id, conversation.history)
+    return {
+        'suggestions': None,
+        'feedback': {
+            'status': 'pending',
+            'sequence': sequence,
+            'url': f"/api/conversations/{conversation.conversation_id}/feedback?since={sequence - 1}"
+        }
+    }
 
 @app.route('/api/conversations', methods=['POST'])
 def start_conversation():
     """Start a new conversation."""
     try:
         conversation_id = str(uuid.uuid4())
-        conversation = Conversation(conversation_id)
-        active_conversations[conversation_id] = conversation
-        
-        # Generate initial student message
-        student_message = simulate_student_turn([])
-        conversation.add_message('student', student_message)
+        conversation = conversation_store.create(conversation_id)
+        logger.info(f"Conversation created: {conversation_id}")
         
-        # Get initial suggestions
-        feedback = get_mini_ai_feedback(conversation.history)
+        # Use a pre-generated opener when available, otherwise generate one live
+        opener = opener_pool.take()
+        if opener:
+            # Carry over the feedback, route and usage state built while generating the opener,
+            # so the first real turn is analyzed incrementally and charged for the opener's calls
+            if opener.get('history') is not None:
+                conversation.history.adopt(opener['history'])
+            conversation.add_message('student', opener['text'])
+            feedback = request_feedback(conversation, precomputed=opener['feedback'])
+        else:
+            student_message = simulate_student_turn(conversation.history)
+            conversation.add_message('student', student_message)
+            
+            # Get initial suggestions
+            feedback = request_feedback(conversation)
         
         return jsonify({
             'status': 'success',
             'conversation_id': conversation_id,
-            'transcript': conversation.get_transcript(),
-            'suggestions': feedback
+            **transcript_fields(conversation, 0),
+            'risk_signals': detect_risk(conversation.history[-1]['text']),
+            **feedback
         }), 200
+    except (CircuitOpenError, RateLimitExceeded) as e:
+        return unavailable_response(e, 'starting conversation')
     except Exception as e:
         logger.error(f"Error starting conversation: {e}", exc_info=True)
         return jsonify({
@@ -114,7 +282,8 @@ def start_conversation():
 def send_message(conversation_id):
     """Send a message from the educator and get student's response."""
     try:
-        if conversation_id not in active_conversations:
+        conversation = conversation_store.get(conversation_id)
+        if conversation is None:
             return jsonify({
                 'status': 'error',
                 'message': 'Conversation not found'
@@ -128,24 +297,40 @@ def send_message(conversation_id):
                 'message': 'No message provided'
             }), 400
         
-        conversation = active_conversations[conversation_id]
+        # Messages to return: those after the client's cursor, or just this turn's
+        try:
+            since = request.args.get('since')
+            start = conversation.message_index(since) if since else len(conversation.history)
+        except ValueError as e:
+            return jsonify({
+                'status': 'error',
+                'message': str(e)
+            }), 400
         
-        # Add educator's message
-        conversation.add_message('educator', data['message'])
+        # Generate student's response on a snapshot first, so a rejected or failed call
+        # leaves the conversation untouched and a client retrying after 503 sends no duplicate
+        version = conversation.version
+        pending = conversation.history.copy()
+        pending.append({'speaker': 'educator', 'text': data['message']})
+        student_message = simulate_student_turn(pending)
         
-        # Generate student's response
-        student_message = simulate_student_turn(conversation.history)
-        conversation.add_message('student', student_message)
+        conversation.add_message('educator', data['message'], expected_version=version)
+        conversation.add_message('student', student_message, expected_version=version + 1)
         
         # Get suggestions for next response
-        feedback = get_mini_ai_feedback(conversation.history)
+        feedback = request_feedback(conversation)
         
         return jsonify({
             'status': 'success',
             'conversation_id': conversation_id,
-            'transcript': conversation.get_transcript(),
-            'suggestions': feedback
+            **transcript_fields(conversation, start),
+            'risk_signals': detect_risk(student_message),
+            **feedback
         }), 200
+    except ConversationConflict as e:
+        return conflict_response(e)
+    except (CircuitOpenError, RateLimitExceeded) as e:
+        return unavailable_response(e, 'sending message')
     except Exception as e:
         logger.error(f"Error sending message: {e}", exc_info=True)
         return jsonify({
@@ -153,24 +338,178 @@ def send_message(conversation_id):
             'message': str(e)
         }), 500
 
+def format_sse(event, data):
+    """Format a Server-Sent Events frame with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route('/api/conversations/<conversation_id>/message/stream', methods=['POST'])
+def stream_message(conversation_id):
+    """Send a message from the educator and stream the student's response as SSE."""
+    conversation = conversation_store.get(conversation_id)
+    if conversation is None:
+        return jsonify({
+            'status': 'error',
+            'message': 'Conversation not found'
+        }), 404
+    
+    # Get educator's message from request
+    data = request.json
+    if not data or 'message' not in data:
+        return jsonify({
+            'status': 'error',
+            'message': 'No message provided'
+        }), 400
+    
+    version = conversation.version
+    try:
+        # Fail fast while the provider is down rather than open a stream that gets no reply
+        llm_client.breaker.check()
+    except CircuitOpenError as e:
+        return unavailable_response(e, 'streaming message')
+    
+    # Stream the reply to a snapshot and store both messages only once it is complete, so a
+    # provider failure mid-stream leaves the conversation untouched for the client to retry
+    educator_entry = conversation.make_message('educator', data['message'])
+    pending = conversation.history.copy()
+    pending.append(educator_entry)
+    
+    def generate():
+        try:
+            yield format_sse('educator', educator_entry)
+            
+            # Forward the student's response as it is generated
+            fragments = []
+            for fragment in stream_student_turn(pending):
+                fragments.append(fragment)
+                yield format_sse('token', {'text': fragment})
+            
+            student_entry = conversation.make_message('student', ''.join(fragments).strip(),
+                                                      seq=educator_entry['seq'] + 1)
+            conversation.commit_message(educator_entry, expected_version=version)
+            conversation.commit_message(student_entry, expected_version=version + 1)
+            yield format_sse('message', student_entry)
+            
+            # Flag risk phrases before the slower feedback call
+            signals = detect_risk(student_entry['text'])
+            if signals:
+                yield format_sse('risk', {'message_id': student_entry['id'], 'signals': signals})
+            
+            # Get suggestions for next response
+            feedback = get_scheduled_feedback(conversation.history)
+            yield format_sse('feedback', feedback)
+            
+            yield format_sse('done', {
+                'status': 'success',
+                'conversation_id': conversation_id,
+                'version': conversation.version
+            })
+        except ConversationConflict as e:
+            logger.warning(str(e))
+            yield format_sse('error', {
+                'status': 'error',
+                'message': 'Conversation was modified by another request; reload it and retry',
+                'version': e.actual
+            })
+        except Exception as e:
+            logger.error(f"Error streaming message: {e}", exc_info=True)
+            yield format_sse('error', {
+                'status': 'error',
+                'message': str(e)
+            })
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
+@app.route('/api/conversations/<conversation_id>/feedback', methods=['GET'])
+def get_feedback(conversation_id):
+    """Long-poll for Mini-AI feedback newer than the `since` sequence number."""
+    try:
+        if not conversation_store.exists(conversation_id):
+            return jsonify({
+                'status': 'error',
+                'message': 'Conversation not found'
+            }), 404
+        
+        since = request.args.get('since', 0, type=int)
+        timeout = request.args.get('timeout', LONG_POLLING_TIMEOUT, type=float)
+        timeout = max(0, min(timeout, LONG_POLLING_TIMEOUT))
+        
+        result = feedback_pipeline.wait(conversation_id, since=since, timeout=timeout)
+        
+        return jsonify({
+            'status': 'success',
+            'conversation_id': conversation_id,
+            'feedback_status': result['status'],
+            'sequence': result['sequence'],
+            'suggestions': result.get('feedback'),
+            'error': result.get('error')
+        }), 200
+    except Exception as e:
+        logger.error(f"Error getting feedback: {e}", exc_info=True)
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
 @app.route('/api/conversations/<conversation_id>', methods=['GET'])
 def get_conversation(conversation_id):
-    """Get the full conversation."""
+    """Get the conversation, optionally one page of its transcript.
+    
+    `offset`/`limit` select a range of messages; `since` (a sequence number or
+    message id) returns the messages after that cursor instead of `offset`.
+    Without any of them the whole transcript is returned. The ETag follows
+    the conversation version, its usage and the sequence of the latest
+    completed feedback, so a client polling with If-None-Match gets a 304
+    until any of them changes.
+    """
     try:
-        if conversation_id not in active_conversations:
+        conversation = conversation_store.get(conversation_id)
+        if conversation is None:
             return jsonify({
                 'status': 'error',
                 'message': 'Conversation not found'
             }), 404
         
-        conversation = active_conversations[conversation_id]
+        latest = feedback_pipeline.latest(conversation_id)
+        feedback_sequence = latest['sequence'] if latest else 0
+        etag = make_etag(conversation.version, usage_tracker.ledger_for(conversation.history).revision,
+                         feedback_sequence)
+        cached = not_modified(etag)
+        if cached:
+            return cached
+        
+        total = len(conversation.history)
+        try:
+            since = request.args.get('since')
+            start = conversation.message_index(since) if since else max(0, request.args.get('offset', 0, type=int))
+        except ValueError as e:
+            return jsonify({
+                'status': 'error',
+                'message': str(e)
+            }), 400
+        limit = request.args.get('limit', type=int)
+        end = total if limit is None else min(total, start + min(max(limit, 1), TRANSCRIPT_MAX_PAGE_SIZE))
         
         return jsonify({
             'status': 'success',
             'conversation_id': conversation_id,
-            'transcript': conversation.get_transcript(),
+            'transcript': conversation.get_transcript(start, end),
+            'version': conversation.version,
+            'feedback_sequence': feedback_sequence,
+            'page': {
+                'offset': start,
+                'total': total,
+                'has_more': end < total,
+                'next_cursor': end - 1 if end < total else None
+            },
             'metadata': conversation.get_metadata()
-        }), 200
+        }), 200, cache_headers(etag)
     except Exception as e:
         logger.error(f"Error getting conversation: {e}", exc_info=True)
         return jsonify({
@@ -178,20 +517,118 @@ def get_conversation(conversation_id):
             'message': str(e)
         }), 500
 
+def summary_metadata(summary):
+    """Listing metadata for a store summary; usage is only known for conversations held by this worker."""
+    conversation = conversation_store.resident(summary['id'])
+    ledger = usage_tracker.ledger_for(conversation.history) if conversation is not None else None
+    return {
+        'id': summary['id'],
+        'created_at': summary['created_at'],
+        'last_activity': datetime.datetime.utcfromtimestamp(summary['updated_at']).isoformat(),
+        'message_count': summary['message_count'],
+        'last_message': summary['last_message'],
+        'usage': (ledger or UsageLedger()).totals()
+    }
+
 @app.route('/api/conversations', methods=['GET'])
 def list_conversations():
-    """List all active conversations."""
+    """List active conversations one page at a time.
+    
+    `order` is 'activity' (most recently active first, the default) or
+    'created' (newest first) and `cursor` continues from the `next_cursor`
+    of the previous page. `min_idle`/`max_idle` (seconds since the last
+    message) and `min_messages`/`max_messages` filter the listing. Pages
+    come from the store's index, so their cost follows the page size, not
+    the number of conversations. The ETag changes whenever a listed
+    conversation or its usage does, so an unchanged page costs a 304.
+    """
     try:
+        order = request.args.get('order', 'activity')
+        if order not in LIST_ORDERS:
+            return jsonify({
+                'status': 'error',
+                'message': f"Unknown order: {order}"
+            }), 400
+        limit = request.args.get('limit', CONVERSATION_LIST_PAGE_SIZE, type=int)
+        limit = min(max(limit, 1), CONVERSATION_LIST_MAX_PAGE_SIZE)
+        filters = {
+            'min_idle': request.args.get('min_idle', type=float),
+            'max_idle': request.args.get('max_idle', type=float),
+            'min_messages': request.args.get('min_messages', type=int),
+            'max_messages': request.args.get('max_messages', type=int)
+        }
+        
+        # Read before the page so a write in between can only make the tag older
+        generation = conversation_store.generation()
+        try:
+            summaries, next_cursor = conversation_store.page(order, request.args.get('cursor'), limit, **filters)
+        except ValueError as e:
+            return jsonify({
+                'status': 'error',
+                'message': str(e)
+            }), 400
+        
+        # Idle filters depend on the clock, so which conversations made the page is part of the tag,
+        # as is the usage revision of each one; calls made for other conversations leave it alone
+        usage_revisions = []
+        for summary in summaries:
+            conversation = conversation_store.resident(summary['id'])
+            usage_revisions.append(usage_tracker.ledger_for(conversation.history).revision
+                                   if conversation is not None else None)
+        listed = json.dumps([[summary['id'] for summary in summaries], usage_revisions, next_cursor])
+        etag = make_etag(generation, format(zlib.crc32(listed.encode()), '08x'))
+        cached = not_modified(etag)
+        if cached:
+            return cached
+        
+        return jsonify({
+            'status': 'success',
+            'conversations': [summary_metadata(summary) for summary in summaries],
+            'page': {
+                'order': order,
+                'limit': limit,
+                'has_more': next_cursor is not None,
+                'next_cursor': next_cursor
+            }
+        }), 200, cache_headers(etag)
+    except Exception as e:
+        logger.error(f"Error listing conversations: {e}", exc_info=True)
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+@app.route('/api/stats', methods=['GET'])
+def get_stats():
+    """Aggregate token and latency usage per role and model, with the most expensive conversations.
+    
+    Per-conversation usage is kept on the in-memory history, so the ranking
+    covers the conversations this worker holds in memory; evicted ones are
+    not loaded back just to be counted.
+    """
+    try:
+        limit = min(max(request.args.get('limit', 10, type=int), 1), 100)
         conversations = []
-        for conversation_id, conversation in active_conversations.items():
-            conversations.append(conversation.get_metadata())
+        for conversation in conversation_store.resident_conversations():
+            usage = usage_tracker.ledger_for(conversation.history).totals()
+            conversations.append({
+                'id': conversation.conversation_id,
+                'message_count': len(conversation.history),
+                'total_tokens': usage['total']['total_tokens'],
+                'wall_time': usage['total']['wall_time'],
+                'usage': usage
+            })
+        conversations.sort(key=lambda c: c['total_tokens'], reverse=True)
         
         return jsonify({
             'status': 'success',
-            'conversations': conversations
+            'usage': usage_tracker.stats(),
+            'active_conversations': len(conversation_store),
+            'resident_conversations': len(conversations),
+            'top_conversations': conversations[:limit]
         }), 200
     except Exception as e:
-        logger.error(f"Error listing conversations: {e}", exc_info=True)
+        logger.error(f"Error getting stats: {e}", exc_info=True)
         return jsonify({
             'status': 'error',
             'message': str(e)
@@ -201,17 +638,17 @@ def list_conversations():
 def end_conversation(conversation_id):
     """End a conversation."""
     try:
-        if conversation_id not in active_conversations:
+        conversation = conversation_store.get(conversation_id)
+        if conversation is None:
             return jsonify({
                 'status': 'error',
                 'message': 'Conversation not found'
             }), 404
         
-        conversation = active_conversations[conversation_id]
         transcript = conversation.get_transcript()
         metadata = conversation.get_metadata()
         
-        del active_conversations[conversation_id]
+        conversation_store.delete(conversation_id)
         logger.info(f"Conversation ended: {conversation_id}")
         
         return jsonify({
@@ -236,7 +673,8 @@ def add_cors_headers(response):
     if any(origin.startswith(allowed) for allowed in ALLOWED_ORIGINS):
         response.headers['Access-Control-Allow-Origin'] = origin
         response.headers['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS, DELETE'
-        response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, X-Requested-With, X-Custom-Header'
+        response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, X-Requested-With, X-Custom-Header, If-None-Match'
+        response.headers['Access-Control-Expose-Headers'] = 'ETag'
         response.headers['Access-Control-Allow-Credentials'] = 'true'
         response.headers['Access-Control-Max-Age'] = '3600'
     
@@ -250,30 +688,63 @@ def options_route(path=''):
 
 @app.route('/health', methods=['GET'])
 def health_check():
-    """Check the health of the server and API connections."""
+    """Check the health of the server and API connections.
+    
+    An open circuit breaker is reported as degraded with a 200: the server
+    still answers reads and serves fallback feedback, so it should stay in
+    rotation. Only a misconfigured backend or a failing check is a 503.
+    """
     try:
-        if together is None:
+        backend = llm_client.backend.status()
+        breaker = llm_client.breaker.stats()
+        if not backend['configured']:
             return jsonify({
                 'status': 'degraded',
+                'degraded': True,
                 'api_status': 'disconnected',
-                'error': 'Together client not initialized',
-                'active_conversations': len(active_conversations),
+                'backend': backend['backend'],
+                'error': backend['error'],
+                'breaker': breaker['state'],
+                'circuit_breaker': breaker,
+                'rate_limiter': llm_client.limiter.stats(),
+                'active_conversations': len(conversation_store),
+                'conversation_store': conversation_store.stats(),
                 'timestamp': datetime.datetime.utcnow().isoformat()
             }), 503
-            
-        if not together.api_key:
-            return jsonify({
+        
+        if breaker['state'] == 'open':
+            status = {
                 'status': 'degraded',
-                'api_status': 'disconnected',
-                'error': 'Together API key not set',
-                'active_conversations': len(active_conversations),
-                'timestamp': datetime.datetime.utcnow().isoformat()
-            }), 503
+                'degraded': True,
+                'api_status': 'circuit_open',
+                'error': 'LLM provider failing; serving fallback feedback'
+            }
+        else:
+            status = {
+                'status': 'healthy',
+                'degraded': False,
+                'api_status': 'probing' if breaker['state'] == 'half_open' else 'connected'
+            }
             
         return jsonify({
-            'status': 'healthy',
-            'api_status': 'connected',
-            'active_conversations': len(active_conversations),
+            **status,
+            'backend': backend['backend'],
+            'breaker': breaker['state'],
+            'circuit_breaker': breaker,
+            'active_conversations': len(conversation_store),
+            'conversation_store': conversation_store.stats(),
+            'feedback_pipeline': feedback_pipeline.stats(),
+            'opener_pool': opener_pool.stats(),
+            'response_cache': response_cache.stats(),
+            'semantic_cache': semantic_cache.stats(),
+            'text_scanner': text_scanner.stats(),
+            'rate_limiter': llm_client.limiter.stats(),
+            'hedging': llm_client.hedging.stats(),
+            'latency': llm_client.latency.stats(),
+            'model_router': model_router.stats(),
+            'feedback_parser': feedback_parser.stats(),
+            'incremental_feedback': incremental_feedback.stats(),
+            'feedback_scheduler': feedback_scheduler.stats(),
             'timestamp': datetime.datetime.utcnow().isoformat()
         })
         
@@ -281,15 +752,21 @@ def health_check():
         logger.error(f"Health check failed: {str(e)}")
         return jsonify({
             'status': 'degraded',
+            'degraded': True,
             'api_status': 'disconnected',
             'error': str(e),
-            'active_conversations': len(active_conversations),
+            'rate_limiter': llm_client.limiter.stats(),
+            'active_conversations': len(conversation_store),
+            'conversation_store': conversation_store.stats(),
             'timestamp': datetime.datetime.utcnow().isoformat()
         }), 503
 
 if __name__ == '__main__':
     logger.info("Starting AI Co-Pilot Mental Health Support backend server")
     
+    # Start warming opening turns before the first conversation arrives
+    opener_pool.start()
+    
     # Check if SSL certificates exist and use them if they do
     cert_path = "/etc/letsencrypt/live/cpmhs.harshrajj.com/fullchain.pem"
     key_path = "/etc/letsencrypt/live/cpmhs.harshrajj.com/privkey.pem"
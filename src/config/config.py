@@ -14,15 +14,155 @@ CORS_ALLOW_ORIGINS = ['*']  # For development. In production, specify exact orig
 
 # Logging Configuration
 LOG_LEVEL = 'INFO'
-LOG_FILE = 'logs/backend.log'
+LOG_FILE = os.getenv('LOG_FILE', 'logs/backend.log')  # Relative paths resolve against the working directory
 
 # API Keys
 TOGETHER_API_KEY = os.getenv('TOGETHER_API_KEY', 'your-together-api-key')  # Replace with your actual API key
+TOGETHER_BASE_URL = os.getenv('TOGETHER_BASE_URL') or None  # e.g. http://127.0.0.1:5080/v1 for debug_tools/mock_together_server.py
 
 # Conversation Configuration
 TYPING_DELAY_STUDENT = 2  # seconds
 TYPING_DELAY_EDUCATOR = 3  # seconds
 LONG_POLLING_TIMEOUT = 30  # seconds
+TRANSCRIPT_MAX_PAGE_SIZE = 500  # Most messages returned by one paginated transcript request
+CONVERSATION_LIST_PAGE_SIZE = 50  # Conversations per listing page when no limit is given
+CONVERSATION_LIST_MAX_PAGE_SIZE = 500  # Most conversations returned by one listing request
+
+# Conversation Store Configuration
+CONVERSATION_STORE = os.getenv('CONVERSATION_STORE', 'memory')  # 'memory' (single worker) or 'sqlite' (shared by workers)
+CONVERSATION_DB_PATH = os.getenv('CONVERSATION_DB_PATH', 'conversations.db')  # SQLite file used by the 'sqlite' store
+CONVERSATION_MAX_RESIDENT = 2000  # Conversations kept in memory per worker before the least recently used is evicted
+CONVERSATION_MEMORY_BUDGET = 64 * 1024 * 1024  # Estimated bytes of resident conversations per worker
+CONVERSATION_IDLE_TTL = 1800  # seconds without access before a conversation is evicted from memory
+CONVERSATION_SPILL_DIR = os.getenv('CONVERSATION_SPILL_DIR', 'conversation_spill')  # Where the 'memory' store writes evicted conversations
+CONVERSATION_SPILL_TTL = 7 * 24 * 3600  # seconds a spilled conversation is kept on disk
+
+# Feedback Pipeline Configuration
+ASYNC_FEEDBACK = True  # Return the student reply immediately and compute feedback in the background (single worker only; ignored with the 'sqlite' store)
+FEEDBACK_WORKERS = 4  # Worker threads for background feedback jobs
+
+# Opener Pool Configuration
+OPENER_POOL_SIZE = 8  # Pre-generated opening turns to keep ready (0 disables the pool)
+OPENER_POOL_LOW_WATER = 3  # Refill once fewer than this many openers remain
+OPENER_POOL_TTL = 1800  # seconds before an unused opener is discarded
+
+# LLM Backend Configuration
+LLM_BACKEND = os.getenv('LLM_BACKEND', 'together')  # 'together' or 'mock' for offline load testing
+
+# Mock Backend Configuration (used when LLM_BACKEND = 'mock')
+MOCK_SEED = int(os.getenv('MOCK_SEED', '42'))  # Same seed and prompt always give the same output
+MOCK_LATENCY_DISTRIBUTION = os.getenv('MOCK_LATENCY_DISTRIBUTION', 'lognormal')  # 'lognormal', 'uniform' or 'fixed'
+MOCK_LATENCY_MEDIAN = float(os.getenv('MOCK_LATENCY_MEDIAN', '0.5'))  # seconds to first token
+MOCK_LATENCY_SIGMA = float(os.getenv('MOCK_LATENCY_SIGMA', '0.5'))  # Spread of the latency distribution
+MOCK_TOKENS_PER_SECOND = float(os.getenv('MOCK_TOKENS_PER_SECOND', '50'))
+MOCK_ERROR_RATE = float(os.getenv('MOCK_ERROR_RATE', '0'))  # Share of calls failing with HTTP 500
+MOCK_THROTTLE_RATE = float(os.getenv('MOCK_THROTTLE_RATE', '0'))  # Share of calls failing with HTTP 429
+
+# LLM Client Configuration
+LLM_MAX_CONNECTIONS = 100  # Pooled HTTP connections to the provider
+LLM_MAX_KEEPALIVE_CONNECTIONS = 20  # Idle connections kept open for reuse
+LLM_KEEPALIVE_EXPIRY = 30  # seconds an idle connection stays open
+LLM_REQUEST_TIMEOUT = 60  # seconds per completion call
+LLM_MAX_CONCURRENCY = 64  # Upper bound for the adaptive concurrency limit
+LLM_INITIAL_CONCURRENCY = 16  # Concurrency limit before any feedback from the provider
+LLM_MIN_CONCURRENCY = 1  # Lower bound the limit backs off to under throttling
+LLM_RATE_LIMIT = 10  # Requests per second admitted by the token bucket
+LLM_RATE_BURST = 20  # Token bucket capacity
+LLM_QUEUE_TIMEOUT = 30  # seconds a call may wait for admission before being rejected
+LLM_MAX_RETRIES = 3  # Retries on 429, timeouts and 5xx responses
+LLM_BACKOFF_BASE = 0.5  # seconds, doubled per retry before jitter
+LLM_BACKOFF_MAX = 20  # seconds
+
+# Circuit Breaker Configuration
+BREAKER_WINDOW = 20  # Recent provider calls the breaker evaluates
+BREAKER_MIN_CALLS = 10  # Calls needed before the breaker can trip
+BREAKER_ERROR_RATE = 0.5  # Error share that trips the breaker
+BREAKER_SLOW_CALL_SECONDS = 20  # Calls slower than this count as slow
+BREAKER_SLOW_CALL_RATE = 0.5  # Slow-call share that trips the breaker
+BREAKER_RESET_TIMEOUT = 30  # seconds to fail fast before probing again
+BREAKER_HALF_OPEN_PROBES = 2  # Successful probes needed to close the breaker
+
+# Feedback Output Configuration
+FEEDBACK_OUTPUT_FORMAT = os.getenv('FEEDBACK_OUTPUT_FORMAT', 'text')  # 'text' for the established format, 'json' to opt in to schema-constrained output
+
+# Incremental Feedback Configuration
+INCREMENTAL_FEEDBACK = True  # Send only new turns plus the previous analysis instead of the whole conversation
+FEEDBACK_FULL_REANALYSIS_INTERVAL = 5  # Every Nth feedback call re-reads the whole conversation to prevent drift
+FEEDBACK_DELTA_MAX_MESSAGES = 8  # Re-analyse in full when more new messages than this have piled up
+
+# Adaptive Feedback Scheduling Configuration
+ADAPTIVE_FEEDBACK = True  # Reuse the previous feedback on low-value turns instead of calling the feedback model
+FEEDBACK_MIN_WORDS = 5  # Student messages shorter than this never trigger a refresh on their own
+FEEDBACK_LONG_MESSAGE_WORDS = 40  # A student message this long always triggers a refresh
+FEEDBACK_REFRESH_TURNS = 2  # Refresh after this many substantive student messages
+FEEDBACK_MAX_AGE = 90  # seconds before feedback is refreshed on any substantive message
+FEEDBACK_SUGGESTION_MATCH = 0.6  # Word overlap at which an educator message counts as using a suggestion
+
+# Phrase Scanning Configuration
+SCAN_PHRASE_SETS = {
+    # Student messages signalling the conversation can wrap up
+    'end_of_conversation': [
+        "i feel better", "thanks for talking", "that helps a lot", "i should go now",
+        "thank you for your help"
+    ],
+    # Direct references to self-harm or suicide; phrase forms only, since bare words
+    # like "die" or "cutting" also turn up in everyday talk ("dead tired", "cutting class")
+    'self_harm': [
+        "hurt myself", "hurting myself", "kill myself", "suicide", "suicidal", "self-harm", "self harm",
+        "cutting myself", "cut myself", "want to die", "wanna die", "wish i was dead", "wish i were dead",
+        "better off dead", "end it all", "don't want to be here", "better off without me"
+    ],
+    # Other signals that the student may be in crisis or unsafe
+    'crisis': [
+        "hopeless", "worthless", "give up", "no point", "abuse", "abused", "unsafe",
+        "scared to go home", "nobody cares", "can't take it anymore"
+    ]
+}
+RISK_SCAN_CATEGORIES = ['self_harm', 'crisis']  # Sets reported as risk signals and that force a feedback refresh
+
+# Suggested questions served while the feedback model is unavailable (also used to repair short responses)
+FALLBACK_SUGGESTED_QUESTIONS = [
+    "Can you tell me more about what has been on your mind lately?",
+    "How has this been affecting your sleep, schoolwork or time with friends?",
+    "Who do you feel comfortable turning to when things get hard?",
+    "When did you first start noticing these feelings?",
+    "What usually helps you feel even a little bit better?",
+    "How are you feeling right now, talking about this with me?"
+]
+
+# Hedged Request Configuration
+HEDGE_STUDENT_REQUESTS = False  # Race a duplicate student completion once it runs past the model's p95
+HEDGE_FEEDBACK_REQUESTS = False  # Same for Mini-AI feedback completions
+HEDGE_QUANTILE = 0.95  # Latency quantile after which a hedge is fired
+HEDGE_MAX_RATIO = 0.1  # Hedges allowed per eligible call (1.0 at most doubles spend)
+HEDGE_MIN_SAMPLES = 20  # Latency samples needed before hedging a model
+LATENCY_WINDOW = 200  # Recent calls per model used for latency percentiles
+
+# Response Cache Configuration
+RESPONSE_CACHE_MAX_BYTES = 16 * 1024 * 1024  # Memory budget for the in-process LRU tier
+RESPONSE_CACHE_TTL = 3600  # seconds a cached completion stays valid
+RESPONSE_CACHE_DB_PATH = os.getenv('RESPONSE_CACHE_DB_PATH')  # SQLite file for the on-disk tier (unset disables it)
+CACHE_STUDENT_RESPONSES = False  # Student turns keep their randomness unless a caller opts in
+CACHE_FEEDBACK_RESPONSES = True
+
+# Semantic Feedback Cache Configuration
+SEMANTIC_FEEDBACK_CACHE = os.getenv('SEMANTIC_FEEDBACK_CACHE', 'false').lower() == 'true'  # Reuse feedback computed for a near-identical conversation
+SEMANTIC_CACHE_THRESHOLD = 0.92  # Cosine similarity needed for a hit
+SEMANTIC_CACHE_CAPACITY = 512  # Entries kept before eviction
+SEMANTIC_CACHE_TTL = 1800  # seconds an entry stays valid
+SEMANTIC_CACHE_EVICTION = 'lru'  # 'lru' or 'fifo'
+SEMANTIC_CACHE_FEATURES = 4096  # Hashed feature dimensions per embedding
+SEMANTIC_CACHE_MAX_MESSAGES = 6  # Only conversations this short are matched; later turns diverge
+
+# Context Window Configuration
+CONTEXT_VERBATIM_TURNS = 8  # Most recent messages always sent verbatim
+CONTEXT_TOKEN_BUDGETS = {  # Estimated tokens of conversation history per prompt
+    'student': 1500,
+    'educator': 1500,
+    'feedback': 2500
+}
+SUMMARY_MAX_TOKENS = 200  # Length of the rolling summary of older turns
+SUMMARY_WORKERS = 2  # Worker threads regenerating rolling summaries
 
 # AI Agent Names
 STUDENT_NAME = "Alex"
@@ -32,6 +172,32 @@ EDUCATOR_NAME = "Ms. Morgan"
 STUDENT_MODEL = "meta-llama/Llama-3.3-70B-Instruct-Turbo-Free"  # Using Llama 3.3 70B for better responses
 EDUCATOR_MODEL = "meta-llama/Llama-3.3-70B-Instruct-Turbo-Free"  # Using Llama 3.3 70B for better responses
 FEEDBACK_MODEL = "meta-llama/Llama-3.3-70B-Instruct-Turbo-Free"  # Using Llama 3.3 70B for better responses
+SUMMARY_MODEL = FEEDBACK_MODEL  # Model that folds older turns into the rolling summary
+
+# Model Routing Configuration
+ALLOW_PAID_FALLBACKS = os.getenv('ALLOW_PAID_FALLBACKS', 'false').lower() == 'true'  # Fail over to billed models when the free ones are down
+PAID_FALLBACK_MODELS = {  # Billed per token; only used when ALLOW_PAID_FALLBACKS is set
+    'student': ["meta-llama/Llama-3.3-70B-Instruct-Turbo"],
+    'educator': ["meta-llama/Llama-3.3-70B-Instruct-Turbo"],
+    'feedback': ["meta-llama/Llama-3.3-70B-Instruct-Turbo", "meta-llama/Meta-Llama-3.1-8B-Instruct-Turbo"],
+    'summary': ["meta-llama/Meta-Llama-3.1-8B-Instruct-Turbo"]
+}
+MODEL_CANDIDATES = {  # Ordered by preference; the router fails over down each list
+    role: [model] + (PAID_FALLBACK_MODELS[role] if ALLOW_PAID_FALLBACKS else [])
+    for role, model in (('student', STUDENT_MODEL), ('educator', EDUCATOR_MODEL),
+                        ('feedback', FEEDBACK_MODEL), ('summary', SUMMARY_MODEL))
+}
+MODEL_LATENCY_SLOS = {  # seconds; p95 latency a candidate must stay under to be preferred
+    'student': 5,
+    'educator': 5,
+    'feedback': 10,
+    'summary': 20
+}
+ROUTER_MIN_SAMPLES = 5  # Latency samples needed before a candidate's p95 is trusted
+ROUTER_ERROR_WINDOW = 20  # Recent calls per model used for its error rate
+ROUTER_MIN_CALLS = 5  # Calls needed before a model can be benched
+ROUTER_MAX_ERROR_RATE = 0.5  # Error rate at which a model is benched
+ROUTER_COOLDOWN = 30  # seconds a benched model is skipped
 
 # Prompt Templates
 STUDENT_PROMPT_TEMPLATE = """[IMPORTANT: Respond ONLY in character as the student. Do not include any thinking, planning, or meta-commentary. No <think> tags.]
@@ -126,12 +292,115 @@ Conversation:
 
 Provide your analysis in EXACTLY this format:"""
 
+FEEDBACK_JSON_PROMPT_TEMPLATE = """Analyze this counseling conversation and respond with ONLY a JSON object with these fields:
+
+- "emotional_state": the student's emotions as short words, e.g. ["Anxious", "Sad", "Overwhelmed"]
+- "key_concerns": the 3 most specific issues the student has raised
+- "suggested_questions": exactly 3 complete questions for the counselor to ask next, each ending with a question mark: one about triggers/causes, one about impact on daily life and one about support/coping
+- "warning_signs": specific concerns the counselor should watch for
+
+Conversation:
+{conversation}"""
+
+FEEDBACK_DELTA_PROMPT_TEMPLATE = """[IMPORTANT: Provide ONLY the analysis in the exact format below. No meta-commentary.]
+
+You analysed this counseling conversation earlier. Your previous analysis was:
+{previous}
+
+These messages have been added since then:
+{new_messages}
+
+Update the analysis to reflect the whole conversation so far and provide EXACTLY these four sections:
+
+1. Emotional State:
+[Simple list of emotions, e.g., "Anxious, Sad, Overwhelmed"]
+
+2. Key Concerns:
+- [Specific issue 1]
+- [Specific issue 2]
+- [Specific issue 3]
+
+3. Suggested Questions:
+1. [Question about triggers/causes]?
+2. [Question about impact on daily life]?
+3. [Question about support/coping]?
+
+4. Warning Signs:
+- [Specific concern 1]
+- [Specific concern 2]
+- [Specific concern 3]
+
+IMPORTANT:
+- Keep concerns and warning signs from the previous analysis unless the new messages resolve them
+- Suggest 3 new questions that follow from the latest messages
+- Each question must be a complete sentence ending with a question mark
+
+Provide your analysis in EXACTLY this format:"""
+
+FEEDBACK_DELTA_JSON_PROMPT_TEMPLATE = """You analysed this counseling conversation earlier. Your previous analysis was:
+{previous}
+
+These messages have been added since then:
+{new_messages}
+
+Update the analysis to reflect the whole conversation so far, keeping earlier concerns and warning signs unless the new messages resolve them. Respond with ONLY a JSON object with these fields:
+
+- "emotional_state": the student's emotions as short words, e.g. ["Anxious", "Sad", "Overwhelmed"]
+- "key_concerns": the 3 most specific issues the student has raised
+- "suggested_questions": exactly 3 new complete questions that follow from the latest messages, each ending with a question mark
+- "warning_signs": specific concerns the counselor should watch for"""
+
+SUMMARY_PROMPT_TEMPLATE = """[IMPORTANT: Provide ONLY the summary. No meta-commentary.]
+
+You are maintaining a running summary of a counseling conversation between a student and a school counselor.
+Update the existing summary with the new messages below. Keep it under 150 words and preserve:
+- The student's emotional state and how it has changed
+- Concerns and events the student has disclosed
+- Any warning signs or safety concerns
+- Coping strategies or next steps the counselor has suggested
+
+Existing summary:
+{summary}
+
+New messages:
+{messages}
+
+Updated summary:"""
+
 # Export all variables
 __all__ = [
     'SERVER_PORT', 'DEBUG_MODE', 'CORS_ALLOW_ORIGINS', 'CORS_PROXY_PORT',
-    'LOG_LEVEL', 'LOG_FILE', 'TOGETHER_API_KEY',
-    'TYPING_DELAY_STUDENT', 'TYPING_DELAY_EDUCATOR', 'LONG_POLLING_TIMEOUT',
+    'LOG_LEVEL', 'LOG_FILE', 'TOGETHER_API_KEY', 'TOGETHER_BASE_URL',
+    'TYPING_DELAY_STUDENT', 'TYPING_DELAY_EDUCATOR', 'LONG_POLLING_TIMEOUT', 'TRANSCRIPT_MAX_PAGE_SIZE',
+    'CONVERSATION_LIST_PAGE_SIZE', 'CONVERSATION_LIST_MAX_PAGE_SIZE',
+    'CONVERSATION_STORE', 'CONVERSATION_DB_PATH', 'CONVERSATION_MAX_RESIDENT', 'CONVERSATION_MEMORY_BUDGET',
+    'CONVERSATION_IDLE_TTL', 'CONVERSATION_SPILL_DIR', 'CONVERSATION_SPILL_TTL',
+    'ASYNC_FEEDBACK', 'FEEDBACK_WORKERS',
+    'LLM_BACKEND', 'MOCK_SEED', 'MOCK_LATENCY_DISTRIBUTION', 'MOCK_LATENCY_MEDIAN', 'MOCK_LATENCY_SIGMA',
+    'MOCK_TOKENS_PER_SECOND', 'MOCK_ERROR_RATE', 'MOCK_THROTTLE_RATE',
+    'OPENER_POOL_SIZE', 'OPENER_POOL_LOW_WATER', 'OPENER_POOL_TTL',
+    'LLM_MAX_CONNECTIONS', 'LLM_MAX_KEEPALIVE_CONNECTIONS', 'LLM_KEEPALIVE_EXPIRY',
+    'LLM_REQUEST_TIMEOUT', 'LLM_MAX_CONCURRENCY', 'LLM_INITIAL_CONCURRENCY', 'LLM_MIN_CONCURRENCY',
+    'LLM_RATE_LIMIT', 'LLM_RATE_BURST', 'LLM_QUEUE_TIMEOUT', 'LLM_MAX_RETRIES',
+    'LLM_BACKOFF_BASE', 'LLM_BACKOFF_MAX',
+    'BREAKER_WINDOW', 'BREAKER_MIN_CALLS', 'BREAKER_ERROR_RATE', 'BREAKER_SLOW_CALL_SECONDS',
+    'BREAKER_SLOW_CALL_RATE', 'BREAKER_RESET_TIMEOUT', 'BREAKER_HALF_OPEN_PROBES',
+    'FEEDBACK_OUTPUT_FORMAT', 'FALLBACK_SUGGESTED_QUESTIONS',
+    'INCREMENTAL_FEEDBACK', 'FEEDBACK_FULL_REANALYSIS_INTERVAL', 'FEEDBACK_DELTA_MAX_MESSAGES',
+    'ADAPTIVE_FEEDBACK', 'FEEDBACK_MIN_WORDS', 'FEEDBACK_LONG_MESSAGE_WORDS', 'FEEDBACK_REFRESH_TURNS',
+    'FEEDBACK_MAX_AGE', 'FEEDBACK_SUGGESTION_MATCH', 'SCAN_PHRASE_SETS', 'RISK_SCAN_CATEGORIES',
+    'HEDGE_STUDENT_REQUESTS', 'HEDGE_FEEDBACK_REQUESTS', 'HEDGE_QUANTILE', 'HEDGE_MAX_RATIO',
+    'HEDGE_MIN_SAMPLES', 'LATENCY_WINDOW',
+    'RESPONSE_CACHE_MAX_BYTES', 'RESPONSE_CACHE_TTL', 'RESPONSE_CACHE_DB_PATH',
+    'CACHE_STUDENT_RESPONSES', 'CACHE_FEEDBACK_RESPONSES',
+    'SEMANTIC_FEEDBACK_CACHE', 'SEMANTIC_CACHE_THRESHOLD', 'SEMANTIC_CACHE_CAPACITY', 'SEMANTIC_CACHE_TTL',
+    'SEMANTIC_CACHE_EVICTION', 'SEMANTIC_CACHE_FEATURES', 'SEMANTIC_CACHE_MAX_MESSAGES',
+    'CONTEXT_VERBATIM_TURNS', 'CONTEXT_TOKEN_BUDGETS', 'SUMMARY_MAX_TOKENS', 'SUMMARY_WORKERS',
     'STUDENT_NAME', 'EDUCATOR_NAME',
-    'STUDENT_MODEL', 'EDUCATOR_MODEL', 'FEEDBACK_MODEL',
-    'STUDENT_PROMPT_TEMPLATE', 'EDUCATOR_PROMPT_TEMPLATE', 'FEEDBACK_PROMPT_TEMPLATE'
+    'STUDENT_MODEL', 'EDUCATOR_MODEL', 'FEEDBACK_MODEL', 'SUMMARY_MODEL',
+    'ALLOW_PAID_FALLBACKS', 'PAID_FALLBACK_MODELS', 'MODEL_CANDIDATES', 'MODEL_LATENCY_SLOS', 'ROUTER_MIN_SAMPLES', 'ROUTER_ERROR_WINDOW',
+    'ROUTER_MIN_CALLS', 'ROUTER_MAX_ERROR_RATE', 'ROUTER_COOLDOWN',
+    'STUDENT_PROMPT_TEMPLATE', 'EDUCATOR_PROMPT_TEMPLATE', 'FEEDBACK_PROMPT_TEMPLATE',
+    'FEEDBACK_JSON_PROMPT_TEMPLATE', 'FEEDBACK_DELTA_PROMPT_TEMPLATE', 'FEEDBACK_DELTA_JSON_PROMPT_TEMPLATE',
+    'SUMMARY_PROMPT_TEMPLATE'
 ] 
@@ -1,44 +1,215 @@
 import os
 import random
+import re
 import sys
 import logging
 import time
-from typing import List, Dict, Optional
-from together import Together
+from typing import AsyncIterator, List, Dict, Iterator, Optional
 
 # Add parent directory to path so we can import from src.config
 sys.path.append(os.path.join(os.path.dirname(__file__), '../../'))
 from src.config.config import *
+from src.models.llm_client import BreakerScope, CallMetrics, LLMClient, provider_failure
+from src.models.llm_backends import create_backend
+from src.models.rate_limiter import AdaptiveLimiter
+from src.models.hedging import HedgePolicy, LatencyTracker
+from src.models.circuit_breaker import CircuitBreaker, CircuitOpenError
+from src.models.response_cache import ResponseCache
+from src.models.semantic_cache import HashingVectorizer, SemanticCache
+from src.models.feedback_parser import FEEDBACK_JSON_SCHEMA, FeedbackParser, render_analysis
+from src.models.incremental_feedback import IncrementalFeedback, render_state
+from src.models.feedback_scheduler import FeedbackScheduler
+from src.models.text_scanner import PhraseScanner
+from src.models.model_router import ModelRouter
+from src.models.usage_accounting import UsageTracker
+from src.models.history import format_history
+from src.models.context_window import ContextManager, estimate_tokens
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
-# Initialize Together client
-try:
-    together = Together()
-    together.api_key = TOGETHER_API_KEY
-    logger.info("Together client initialized successfully")
-except Exception as e:
-    logger.error(f"Failed to initialize Together client: {e}")
-    together = None
+def build_backend(name: str = LLM_BACKEND):
+    """Build the LLM backend selected by `LLM_BACKEND`."""
+    if name == 'mock':
+        return create_backend(
+            'mock',
+            seed=MOCK_SEED,
+            latency_distribution=MOCK_LATENCY_DISTRIBUTION,
+            latency_median=MOCK_LATENCY_MEDIAN,
+            latency_sigma=MOCK_LATENCY_SIGMA,
+            tokens_per_second=MOCK_TOKENS_PER_SECOND,
+            error_rate=MOCK_ERROR_RATE,
+            throttle_rate=MOCK_THROTTLE_RATE
+        )
+    return create_backend(
+        name,
+        api_key=TOGETHER_API_KEY,
+        base_url=TOGETHER_BASE_URL,
+        max_connections=LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+        timeout=LLM_REQUEST_TIMEOUT
+    )
+
+# Shared asyncio client used for all completions
+llm_client = LLMClient(
+    build_backend(),
+    timeout=LLM_REQUEST_TIMEOUT,
+    limiter=AdaptiveLimiter(
+        rate=LLM_RATE_LIMIT,
+        burst=LLM_RATE_BURST,
+        initial_limit=LLM_INITIAL_CONCURRENCY,
+        min_limit=LLM_MIN_CONCURRENCY,
+        max_limit=LLM_MAX_CONCURRENCY,
+        backoff_base=LLM_BACKOFF_BASE,
+        backoff_max=LLM_BACKOFF_MAX
+    ),
+    queue_timeout=LLM_QUEUE_TIMEOUT,
+    max_retries=LLM_MAX_RETRIES,
+    hedging=HedgePolicy(
+        LatencyTracker(window=LATENCY_WINDOW),
+        quantile=HEDGE_QUANTILE,
+        max_ratio=HEDGE_MAX_RATIO,
+        min_samples=HEDGE_MIN_SAMPLES
+    ),
+    breaker=CircuitBreaker(
+        window=BREAKER_WINDOW,
+        min_calls=BREAKER_MIN_CALLS,
+        error_rate=BREAKER_ERROR_RATE,
+        slow_call_seconds=BREAKER_SLOW_CALL_SECONDS,
+        slow_call_rate=BREAKER_SLOW_CALL_RATE,
+        reset_timeout=BREAKER_RESET_TIMEOUT,
+        half_open_probes=BREAKER_HALF_OPEN_PROBES
+    )
+)
+
+# Latency- and error-aware choice of model per role, sharing the client's latency samples
+model_router = ModelRouter(
+    MODEL_CANDIDATES,
+    llm_client.latency,
+    MODEL_LATENCY_SLOS,
+    min_samples=ROUTER_MIN_SAMPLES,
+    error_window=ROUTER_ERROR_WINDOW,
+    min_calls=ROUTER_MIN_CALLS,
+    max_error_rate=ROUTER_MAX_ERROR_RATE,
+    cooldown=ROUTER_COOLDOWN
+)
+
+# Near-duplicate lookup of feedback for short conversations
+semantic_cache = SemanticCache(
+    HashingVectorizer(n_features=SEMANTIC_CACHE_FEATURES),
+    capacity=SEMANTIC_CACHE_CAPACITY,
+    threshold=SEMANTIC_CACHE_THRESHOLD,
+    ttl=SEMANTIC_CACHE_TTL,
+    eviction=SEMANTIC_CACHE_EVICTION
+)
+
+# Token and latency accounting per conversation and role
+usage_tracker = UsageTracker()
+
+# Content-addressed cache of completion text
+response_cache = ResponseCache(
+    max_bytes=RESPONSE_CACHE_MAX_BYTES,
+    ttl=RESPONSE_CACHE_TTL,
+    db_path=RESPONSE_CACHE_DB_PATH
+)
+
+# Sampling parameters shared by the student and feedback completions
+STUDENT_SAMPLING = {
+    'max_tokens': 150,
+    'temperature': 0.7,
+    'top_k': 50,
+    'top_p': 0.7,
+    'repetition_penalty': 1.1
+}
+
+EDUCATOR_SAMPLING = {
+    'max_tokens': 200,
+    'temperature': 0.7,
+    'top_k': 50,
+    'top_p': 0.7,
+    'repetition_penalty': 1.1
+}
+
+FEEDBACK_SAMPLING = {
+    'max_tokens': 300,
+    'temperature': 0.7,
+    'top_k': 50,
+    'top_p': 0.7,
+    'repetition_penalty': 1.1
+}
+
+# Constrains structured feedback to FEEDBACK_JSON_SCHEMA
+FEEDBACK_STRUCTURED_SAMPLING = {
+    **FEEDBACK_SAMPLING,
+    'response_format': {
+        'type': 'json_schema',
+        'json_schema': {'name': 'counselor_feedback', 'schema': FEEDBACK_JSON_SCHEMA, 'strict': True}
+    }
+}
+
+# Parses feedback completions and repairs bad ones without another request
+feedback_parser = FeedbackParser(FALLBACK_SUGGESTED_QUESTIONS)
+
+# Chooses between delta and full feedback analysis per call
+incremental_feedback = IncrementalFeedback(
+    full_every=FEEDBACK_FULL_REANALYSIS_INTERVAL,
+    max_delta_messages=FEEDBACK_DELTA_MAX_MESSAGES
+)
+
+# Single-pass matching of end-of-conversation and risk phrases
+text_scanner = PhraseScanner(SCAN_PHRASE_SETS)
+
+# Decides per turn whether feedback is worth refreshing
+feedback_scheduler = FeedbackScheduler(
+    risk_scanner=text_scanner,
+    risk_categories=RISK_SCAN_CATEGORIES,
+    min_words=FEEDBACK_MIN_WORDS,
+    long_message_words=FEEDBACK_LONG_MESSAGE_WORDS,
+    refresh_turns=FEEDBACK_REFRESH_TURNS,
+    max_age=FEEDBACK_MAX_AGE,
+    suggestion_match=FEEDBACK_SUGGESTION_MATCH
+)
 
 def format_conversation_history(history: List[Dict[str, str]]) -> str:
     """Format the conversation history into a string."""
-    if not history:
-        return "No previous conversation."
-    
-    formatted = []
-    for msg in history:
-        speaker = msg.get("speaker", "unknown").title()
-        text = msg.get("text", "")
-        formatted.append(f"{speaker}: {text}")
-    
-    return "\n".join(formatted)
+    return format_history(history)
 
-def simulate_student_turn(conversation_history: List[Dict[str, str]]) -> str:
-    """Simulate the student's turn in the conversation."""
+SUMMARY_SAMPLING = {
+    'max_tokens': SUMMARY_MAX_TOKENS,
+    'temperature': 0.3,
+    'top_p': 0.7
+}
+
+def summarize_history(previous_summary: str, new_lines: List[str],
+                      conversation_history: Optional[List[Dict[str, str]]] = None) -> str:
+    """Fold newly aged-out conversation lines of `conversation_history` into the rolling summary."""
+    prompt = SUMMARY_PROMPT_TEMPLATE.format(
+        summary=previous_summary or "None yet.",
+        messages="\n".join(new_lines)
+    )
+    return llm_client.run(acomplete_routed(
+        'summary',
+        conversation_history,
+        [
+            {"role": "system", "content": "You summarize counseling conversations accurately and concisely."},
+            {"role": "user", "content": prompt}
+        ],
+        SUMMARY_SAMPLING
+    ))
+
+# Token-budgeted prompt context with rolling summaries of older turns
+context_manager = ContextManager(
+    summarize_history,
+    budgets=CONTEXT_TOKEN_BUDGETS,
+    verbatim_turns=CONTEXT_VERBATIM_TURNS,
+    max_workers=SUMMARY_WORKERS
+)
+
+def build_student_messages(conversation_history: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """Build the chat messages used to generate the student's next turn."""
     # Format conversation history
-    history_text = format_conversation_history(conversation_history)
+    history_text = context_manager.render(conversation_history, 'student')
     
     # Generate prompt
     prompt = STUDENT_PROMPT_TEMPLATE.format(
@@ -47,65 +218,327 @@ def simulate_student_turn(conversation_history: List[Dict[str, str]]) -> str:
         conversation_history=history_text
     )
     
+    return [
+        {"role": "system", "content": "You are a teenage student speaking to a counselor sharing about your mental health. Respond ONLY in character, with NO meta-commentary or thinking process."},
+        {"role": "user", "content": prompt}
+    ]
+
+def estimate_usage(metrics: CallMetrics, messages: List[Dict[str, str]], text: str):
+    """Fill in estimated token counts when the provider did not report usage."""
+    if not metrics.cached and not metrics.prompt_tokens:
+        metrics.prompt_tokens = sum(estimate_tokens(m['content']) for m in messages)
+        metrics.completion_tokens = estimate_tokens(text)
+
+async def acomplete(model: str, messages: List[Dict[str, str]], sampling: Dict,
+                    use_cache: bool = False, hedge: bool = False,
+                    metrics: Optional[CallMetrics] = None, scope: Optional[BreakerScope] = None) -> str:
+    """Get the completion text for a prompt, consulting the response cache when `use_cache` is set."""
+    metrics = metrics or CallMetrics()
+    key = ResponseCache.make_key(model, messages, sampling) if use_cache else None
+    if key is not None:
+        cached = await response_cache.aget(key)
+        if cached is not None:
+            metrics.cached = True
+            return cached
+    
+    response = await llm_client.acreate(model=model, messages=messages, hedge=hedge, metrics=metrics,
+                                        scope=scope, **sampling)
+    text = response.choices[0].message.content.strip()
+    estimate_usage(metrics, messages, text)
+    
+    if key is not None:
+        await response_cache.aset(key, text)
+    return text
+
+async def acomplete_routed(role: str, conversation_history: Optional[List[Dict[str, str]]],
+                           messages: List[Dict[str, str]], sampling: Dict,
+                           use_cache: bool = False, hedge: bool = False) -> str:
+    """Complete a prompt for `role` on the model the router picks, failing over down its candidates.
+    
+    Only provider failures fail over; the whole call, failovers included,
+    is one outcome for the circuit breaker.
+    """
+    metrics = CallMetrics()
+    started = time.monotonic()
+    tried = []
+    async with llm_client.breaker_scope() as scope:
+        while True:
+            model = model_router.choose(role, conversation_history, exclude=tried)
+            try:
+                text = await acomplete(model, messages, sampling, use_cache=use_cache, hedge=hedge,
+                                       metrics=metrics, scope=scope)
+            except CircuitOpenError:
+                raise
+            except Exception as e:
+                if provider_failure(e):
+                    model_router.record(model, False)
+                    tried.append(model)
+                if not provider_failure(e) or len(tried) >= len(model_router.candidates[role]):
+                    usage_tracker.record(conversation_history, role, model, metrics,
+                                         time.monotonic() - started, False)
+                    raise
+                model_router.record_failover(role, model, e)
+                continue
+            model_router.record(model, True)
+            usage_tracker.record(conversation_history, role, model, metrics, time.monotonic() - started)
+            return text
+
+async def asimulate_student_turn(conversation_history: List[Dict[str, str]], use_cache: Optional[bool] = None,
+                                 hedge: Optional[bool] = None) -> str:
+    """Simulate the student's turn in the conversation on the LLM client's event loop."""
+    if use_cache is None:
+        use_cache = CACHE_STUDENT_RESPONSES
+    if hedge is None:
+        hedge = HEDGE_STUDENT_REQUESTS
+    
     # Get response from model with system message
-    response = together.chat.completions.create(
-        model=STUDENT_MODEL,
-        messages=[
-            {"role": "system", "content": "You are a teenage student speaking to a counselor sharing about your mental health. Respond ONLY in character, with NO meta-commentary or thinking process."},
-            {"role": "user", "content": prompt}
-        ],
-        max_tokens=150,
-        temperature=0.7,
-        top_k=50,
-        top_p=0.7,
-        repetition_penalty=1.1
+    return await acomplete_routed(
+        'student',
+        conversation_history,
+        build_student_messages(conversation_history),
+        STUDENT_SAMPLING,
+        use_cache=use_cache,
+        hedge=hedge
     )
-    
-    return response.choices[0].message.content.strip()
 
-def get_mini_ai_feedback(conversation_history: List[Dict[str, str]]) -> Dict:
-    """Get feedback and suggestions from the mini AI about the conversation."""
+def simulate_student_turn(conversation_history: List[Dict[str, str]], use_cache: Optional[bool] = None,
+                          hedge: Optional[bool] = None) -> str:
+    """Simulate the student's turn in the conversation."""
+    return llm_client.run(asimulate_student_turn(conversation_history, use_cache=use_cache, hedge=hedge))
+
+async def astream_student_turn(conversation_history: List[Dict[str, str]]) -> AsyncIterator[str]:
+    """Stream the student's turn as text fragments on the LLM client's event loop."""
+    messages = build_student_messages(conversation_history)
+    metrics = CallMetrics()
+    started_at = time.monotonic()
+    fragments = []
+    tried = []
+    async with llm_client.breaker_scope() as scope:
+        while True:
+            model = model_router.choose('student', conversation_history, exclude=tried)
+            started = False
+            try:
+                async for fragment in llm_client.astream(model=model, messages=messages, metrics=metrics,
+                                                         scope=scope, **STUDENT_SAMPLING):
+                    started = True
+                    fragments.append(fragment)
+                    yield fragment
+            except CircuitOpenError:
+                raise
+            except Exception as e:
+                if provider_failure(e):
+                    model_router.record(model, False)
+                    tried.append(model)
+                # Text already sent cannot be taken back, so only fail over before the first fragment
+                if (started or not provider_failure(e)
+                        or len(tried) >= len(model_router.candidates['student'])):
+                    usage_tracker.record(conversation_history, 'student', model, metrics,
+                                         time.monotonic() - started_at, False)
+                    raise
+                model_router.record_failover('student', model, e)
+                continue
+            model_router.record(model, True)
+            estimate_usage(metrics, messages, ''.join(fragments))
+            usage_tracker.record(conversation_history, 'student', model, metrics, time.monotonic() - started_at)
+            return
+
+def stream_student_turn(conversation_history: List[Dict[str, str]]) -> Iterator[str]:
+    """Simulate the student's turn, yielding text fragments as the model produces them."""
+    return llm_client.iterate(astream_student_turn(conversation_history))
+
+def build_educator_messages(conversation_history: List[Dict[str, str]], feedback: Optional[Dict] = None) -> List[Dict[str, str]]:
+    """Build the chat messages used to generate the educator's next turn."""
     # Format conversation history
-    history_text = format_conversation_history(conversation_history)
+    history_text = context_manager.render(conversation_history, 'educator')
     
     # Generate prompt
-    prompt = FEEDBACK_PROMPT_TEMPLATE.format(conversation=history_text)
+    prompt = EDUCATOR_PROMPT_TEMPLATE.format(
+        educator_name=EDUCATOR_NAME,
+        student_name=STUDENT_NAME,
+        conversation_history=history_text,
+        feedback=feedback.get("analysis", "None") if feedback else "None"
+    )
     
-    # Get response from model with system message
-    response = together.chat.completions.create(
-        model=FEEDBACK_MODEL,
-        messages=[
-            {"role": "system", "content": "You are an expert counselor providing analysis. Give ONLY the analysis in the specified format in bullet points, with NO meta-commentary."},
-            {"role": "user", "content": prompt}
-        ],
-        max_tokens=300,
-        temperature=0.7,
-        top_k=50,
-        top_p=0.7,
-        repetition_penalty=1.1
+    return [
+        {"role": "system", "content": "You are a school counselor supporting a student. Respond ONLY as the counselor, with NO meta-commentary."},
+        {"role": "user", "content": prompt}
+    ]
+
+async def asimulate_educator_turn(conversation_history: List[Dict[str, str]], feedback: Optional[Dict] = None) -> str:
+    """Simulate the educator's turn in the conversation on the LLM client's event loop."""
+    return await acomplete_routed(
+        'educator',
+        conversation_history,
+        build_educator_messages(conversation_history, feedback),
+        EDUCATOR_SAMPLING
     )
+
+def simulate_educator_turn(conversation_history: List[Dict[str, str]], feedback: Optional[Dict] = None) -> str:
+    """Simulate the educator's turn in the conversation."""
+    return llm_client.run(asimulate_educator_turn(conversation_history, feedback))
+
+def build_feedback_messages(conversation_history: List[Dict[str, str]],
+                            structured: Optional[bool] = None, previous: Optional[Dict] = None,
+                            start: int = 0) -> List[Dict[str, str]]:
+    """Build the chat messages used to request Mini-AI feedback.
     
-    analysis = response.choices[0].message.content.strip()
-    
-    # Parse the response to extract questions
-    questions = []
-    in_questions_section = False
-    lines = analysis.split('\n')
-    
-    for line in lines:
-        line = line.strip()
-        if line.startswith('3. Suggested Questions:'):
-            in_questions_section = True
-            continue
-        elif in_questions_section and line.startswith('4. Warning Signs:'):
-            break
-        elif in_questions_section and line and line[0].isdigit() and line.endswith('?'):
-            # Extract just the question part (remove the number and dot)
-            question = line.split('.', 1)[1].strip()
-            questions.append(question)
+    With `previous` analysis fields, only the messages from index `start`
+    onwards are sent, together with the compact previous analysis.
+    """
+    if structured is None:
+        structured = FEEDBACK_OUTPUT_FORMAT == 'json'
+    
+    if previous is not None:
+        template = FEEDBACK_DELTA_JSON_PROMPT_TEMPLATE if structured else FEEDBACK_DELTA_PROMPT_TEMPLATE
+        new_messages = conversation_history[start:]
+        prompt = template.format(
+            previous=render_state(previous),
+            new_messages=format_conversation_history(new_messages)
+        )
+        if structured:
+            system = "You are an expert counselor providing analysis. Respond with ONLY a JSON object matching the requested schema, with NO meta-commentary."
+        else:
+            system = "You are an expert counselor providing analysis. Give ONLY the analysis in the specified format in bullet points, with NO meta-commentary."
+        return [
+            {"role": "system", "content": system},
+            {"role": "user", "content": prompt}
+        ]
+    
+    # Format conversation history
+    history_text = context_manager.render(conversation_history, 'feedback')
+    
+    if structured:
+        return [
+            {"role": "system", "content": "You are an expert counselor providing analysis. Respond with ONLY a JSON object matching the requested schema, with NO meta-commentary."},
+            {"role": "user", "content": FEEDBACK_JSON_PROMPT_TEMPLATE.format(conversation=history_text)}
+        ]
+    
+    # Generate prompt
+    prompt = FEEDBACK_PROMPT_TEMPLATE.format(conversation=history_text)
+    
+    return [
+        {"role": "system", "content": "You are an expert counselor providing analysis. Give ONLY the analysis in the specified format in bullet points, with NO meta-commentary."},
+        {"role": "user", "content": prompt}
+    ]
+
+def parse_feedback(analysis: str, structured: bool = False, offset: int = 0) -> Dict:
+    """Turn a feedback completion into the feedback payload sent to the frontend."""
+    fields = feedback_parser.parse(analysis, structured=structured, offset=offset)
     
     return {
-        "analysis": analysis,
-        "suggested_questions": questions[:3],  # Ensure we only return 3 questions
+        # Structured responses are rendered in the text format the frontend displays
+        "analysis": render_analysis(fields) if structured or fields['repaired'] else analysis,
+        "emotional_state": fields['emotional_state'],
+        "key_concerns": fields['key_concerns'],
+        "suggested_questions": fields['suggested_questions'],
+        "warning_signs": fields['warning_signs'],
         "timestamp": time.time()
-    } 
+    }
+
+def build_fallback_feedback(conversation_history: List[Dict[str, str]]) -> Dict:
+    """Build generic feedback locally for when the feedback model is unavailable."""
+    # Rotate through the fallback questions so consecutive turns do not repeat
+    offset = len(conversation_history) % len(FALLBACK_SUGGESTED_QUESTIONS)
+    rotated = FALLBACK_SUGGESTED_QUESTIONS[offset:] + FALLBACK_SUGGESTED_QUESTIONS[:offset]
+    fields = {
+        "emotional_state": ["Unavailable (AI analysis is temporarily offline)"],
+        "key_concerns": ["Listen for what the student identifies as most pressing"],
+        "suggested_questions": rotated[:3],
+        "warning_signs": ["Watch for any mention of self-harm, hopelessness or withdrawal"]
+    }
+    
+    return {
+        "analysis": render_analysis(fields),
+        **fields,
+        "timestamp": time.time(),
+        "degraded": True
+    }
+
+async def aget_mini_ai_feedback(conversation_history: List[Dict[str, str]], use_cache: Optional[bool] = None,
+                                hedge: Optional[bool] = None) -> Dict:
+    """Get feedback from the mini AI on the LLM client's event loop."""
+    if use_cache is None:
+        use_cache = CACHE_FEEDBACK_RESPONSES
+    if hedge is None:
+        hedge = HEDGE_FEEDBACK_REQUESTS
+    
+    # A risk disclosure always gets a fresh analysis; feedback cached for a
+    # similar conversation would not mention it
+    at_risk = history_has_risk(conversation_history)
+    if at_risk:
+        use_cache = False
+    
+    # Near-identical early conversations share feedback instead of paying for a new analysis.
+    # The shared opening dominates the embedding, so the latest student turn must match exactly:
+    # a new disclosure in it always gets its own analysis
+    semantic_key = None
+    if SEMANTIC_FEEDBACK_CACHE and not at_risk and 0 < len(conversation_history) <= SEMANTIC_CACHE_MAX_MESSAGES:
+        semantic_key = format_conversation_history(conversation_history)
+        latest_turn = latest_student_turn(conversation_history)
+        cached = semantic_cache.get(semantic_key, guard=latest_turn)
+        if cached is not None:
+            feedback = {**cached, "timestamp": time.time()}
+            feedback_scheduler.record(conversation_history, feedback)
+            return feedback
+    
+    structured = FEEDBACK_OUTPUT_FORMAT == 'json'
+    previous, start = incremental_feedback.plan(conversation_history) if INCREMENTAL_FEEDBACK else (None, 0)
+    
+    # Get response from model with system message
+    try:
+        analysis = await acomplete_routed(
+            'feedback',
+            conversation_history,
+            build_feedback_messages(conversation_history, structured, previous, start),
+            FEEDBACK_STRUCTURED_SAMPLING if structured else FEEDBACK_SAMPLING,
+            use_cache=use_cache,
+            hedge=hedge
+        )
+    except CircuitOpenError as e:
+        logger.warning(f"Serving fallback feedback: {e}")
+        return build_fallback_feedback(conversation_history)
+    
+    feedback = parse_feedback(analysis, structured=structured, offset=len(conversation_history))
+    if INCREMENTAL_FEEDBACK:
+        incremental_feedback.record(conversation_history, feedback, delta=previous is not None)
+    feedback_scheduler.record(conversation_history, feedback)
+    if semantic_key is not None:
+        semantic_cache.set(semantic_key, feedback, guard=latest_turn)
+    return feedback
+
+def get_mini_ai_feedback(conversation_history: List[Dict[str, str]], use_cache: Optional[bool] = None,
+                         hedge: Optional[bool] = None) -> Dict:
+    """Get feedback and suggestions from the mini AI about the conversation."""
+    return llm_client.run(aget_mini_ai_feedback(conversation_history, use_cache=use_cache, hedge=hedge))
+
+def reusable_feedback(conversation_history: List[Dict[str, str]]) -> Optional[Dict]:
+    """Return the previous feedback when the scheduler decides this turn is not worth a refresh."""
+    if not ADAPTIVE_FEEDBACK:
+        return None
+    return feedback_scheduler.reuse(conversation_history)
+
+def get_scheduled_feedback(conversation_history: List[Dict[str, str]]) -> Dict:
+    """Get feedback for the latest turn, reusing the previous feedback on low-value turns."""
+    return reusable_feedback(conversation_history) or get_mini_ai_feedback(conversation_history)
+
+def detect_risk(text: str) -> List[Dict]:
+    """Return the risk phrases found in a student message, available before any feedback call."""
+    return text_scanner.scan(text, RISK_SCAN_CATEGORIES)
+
+def latest_student_turn(conversation_history: List[Dict[str, str]]) -> str:
+    """The last student message, normalised to its lower-case words, or '' if the student has not spoken."""
+    for message in reversed(conversation_history):
+        if message.get('speaker') == 'student':
+            return ' '.join(re.findall(r"[a-z0-9']+", message.get('text', '').lower()))
+    return ''
+
+def history_has_risk(conversation_history: List[Dict[str, str]]) -> bool:
+    """Whether any student message in the history contains a risk phrase."""
+    return any(
+        message.get('speaker') == 'student' and text_scanner.contains(message.get('text', ''), RISK_SCAN_CATEGORIES)
+        for message in conversation_history
+    )
+
+def is_end_of_conversation(text: str) -> bool:
+    """Whether a student message signals that the conversation can wrap up."""
+    return text_scanner.contains(text, ['end_of_conversation'])
@@ -0,0 +1,138 @@
+import threading
+import time
+import logging
+from collections import deque
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the provider while the circuit is open."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"LLM provider unavailable; retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+class CircuitBreaker:
+    """Fail fast when the LLM provider is erroring or slow.
+
+    The breaker watches the last `window` provider calls. Once at least
+    `min_calls` have been seen and either the error rate or the share of
+    calls slower than `slow_call_seconds` reaches its threshold, it opens
+    and rejects calls for `reset_timeout` seconds. It then lets up to
+    `half_open_probes` calls through; if they all succeed it closes again,
+    and any failure re-opens it.
+    """
+
+    def __init__(self, window: int = 20, min_calls: int = 10, error_rate: float = 0.5,
+                 slow_call_seconds: float = 20, slow_call_rate: float = 0.5,
+                 reset_timeout: float = 30, half_open_probes: int = 2):
+        self.window = window
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+
+        self.state = CLOSED
+        self._outcomes = deque(maxlen=window)  # (failed, slow) per call
+        self._opened_at = 0.0
+        self._probes_started = 0
+        self._probes_succeeded = 0
+        self._lock = threading.Lock()
+
+        self.trips = 0
+        self.rejections = 0
+
+    def allow(self):
+        """Admit a call or raise CircuitOpenError."""
+        with self._lock:
+            if self.state == OPEN:
+                remaining = self._opened_at + self.reset_timeout - time.monotonic()
+                if remaining > 0:
+                    self.rejections += 1
+                    raise CircuitOpenError(remaining)
+                self.state = HALF_OPEN
+                self._probes_started = 0
+                self._probes_succeeded = 0
+                logger.info("Circuit breaker half-open; probing provider")
+
+            if self.state == HALF_OPEN:
+                if self._probes_started >= self.half_open_probes:
+                    self.rejections += 1
+                    raise CircuitOpenError(1)
+                self._probes_started += 1
+
+    def check(self):
+        """Raise CircuitOpenError if a call would be rejected now, without admitting one.
+
+        Lets callers fail fast before doing work that a rejected call would
+        leave half done; it does not take a half-open probe slot.
+        """
+        with self._lock:
+            if self.state == OPEN:
+                remaining = self._opened_at + self.reset_timeout - time.monotonic()
+                if remaining > 0:
+                    self.rejections += 1
+                    raise CircuitOpenError(remaining)
+            elif self.state == HALF_OPEN and self._probes_started >= self.half_open_probes:
+                self.rejections += 1
+                raise CircuitOpenError(1)
+
+    def release(self):
+        """Hand back the admission of a call that never reached the provider, without an outcome."""
+        with self._lock:
+            if self.state == HALF_OPEN and self._probes_started > self._probes_succeeded:
+                self._probes_started -= 1
+
+    def record(self, success: bool, seconds: float):
+        """Record the outcome and latency of an admitted call."""
+        slow = seconds >= self.slow_call_seconds
+        with self._lock:
+            if self.state == HALF_OPEN:
+                if success and not slow:
+                    self._probes_succeeded += 1
+                    if self._probes_succeeded >= self.half_open_probes:
+                        self.state = CLOSED
+                        self._outcomes.clear()
+                        logger.info("Circuit breaker closed; provider recovered")
+                else:
+                    self._trip()
+                return
+
+            self._outcomes.append((not success, slow))
+            if self.state == CLOSED and len(self._outcomes) >= self.min_calls:
+                failures = sum(1 for failed, _ in self._outcomes if failed)
+                slow_calls = sum(1 for _, was_slow in self._outcomes if was_slow)
+                if (failures / len(self._outcomes) >= self.error_rate
+                        or slow_calls / len(self._outcomes) >= self.slow_call_rate):
+                    self._trip()
+
+    def _trip(self):
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self.trips += 1
+        logger.warning(f"Circuit breaker opened for {self.reset_timeout}s")
+
+    def stats(self) -> Dict:
+        """Return the breaker state for monitoring."""
+        with self._lock:
+            failures = sum(1 for failed, _ in self._outcomes if failed)
+            slow_calls = sum(1 for _, was_slow in self._outcomes if was_slow)
+            calls = len(self._outcomes)
+            return {
+                'state': self.state,
+                'recent_calls': calls,
+                'error_rate': failures / calls if calls else 0.0,
+                'slow_call_rate': slow_calls / calls if calls else 0.0,
+                'retry_after': round(max(0.0, self._opened_at + self.reset_timeout - time.monotonic()), 1)
+                if self.state == OPEN else 0.0,
+                'trips': self.trips,
+                'rejections': self.rejections
+            }
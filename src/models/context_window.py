@@ -0,0 +1,108 @@
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from src.models.history import EMPTY_HISTORY_TEXT, RenderedHistory, render_message
+
+logger = logging.getLogger(__name__)
+
+def estimate_tokens(text: str) -> int:
+    """Roughly estimate the token count of `text` (about four characters per token)."""
+    return len(text) // 4 + 1
+
+class ContextState:
+    """Rolling summary of the part of a conversation that has left the verbatim window."""
+
+    def __init__(self):
+        self.summary = ""
+        self.summarized = 0  # Number of leading messages folded into the summary
+        self.pending = False  # A summarization job is queued or running
+        self.lock = threading.Lock()
+
+class ContextManager:
+    """Build token-budgeted prompt context from a conversation history.
+
+    The most recent `verbatim_turns` messages are always rendered verbatim.
+    Older messages are folded into a rolling summary that a background
+    worker regenerates incrementally, feeding only the newly folded messages
+    and the previous summary to `summarize_fn` (along with the history, so
+    the call is accounted to its conversation). Until the summary catches
+    up, not-yet-summarized messages stay verbatim. When the result still
+    exceeds the role's token budget, the oldest verbatim messages are
+    dropped.
+    """
+
+    def __init__(self, summarize_fn: Callable[[str, List[str], List[Dict[str, str]]], str],
+                 budgets: Dict[str, int], verbatim_turns: int = 8,
+                 default_budget: int = 2000, max_workers: int = 2):
+        self.summarize_fn = summarize_fn
+        self.budgets = budgets
+        self.verbatim_turns = verbatim_turns
+        self.default_budget = default_budget
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='summarizer')
+
+    def render(self, history: List[Dict[str, str]], role: str) -> str:
+        """Render the history for a prompt within the token budget of `role`."""
+        if not history:
+            return EMPTY_HISTORY_TEXT
+
+        budget = self.budgets.get(role, self.default_budget)
+        state = self._state_for(history)
+        lines = history.lines() if isinstance(history, RenderedHistory) else [render_message(m) for m in history]
+        window_start = max(0, len(lines) - self.verbatim_turns)
+
+        summary = ""
+        verbatim_start = 0
+        if state is not None:
+            with state.lock:
+                summary, summarized = state.summary, state.summarized
+                if window_start > summarized and not state.pending:
+                    state.pending = True
+                    self._executor.submit(self._summarize, state, history)
+            verbatim_start = min(summarized, window_start)
+
+        used = estimate_tokens(summary) if summary else 0
+        first = len(lines)
+        while first > verbatim_start:
+            cost = estimate_tokens(lines[first - 1])
+            if used + cost > budget and first < len(lines):
+                break
+            used += cost
+            first -= 1
+
+        if not summary and first == 0 and isinstance(history, RenderedHistory):
+            return history.render()
+
+        parts = []
+        if summary:
+            parts.append(f"Summary of earlier conversation: {summary}")
+        if first > verbatim_start:
+            parts.append(f"[{first - verbatim_start} earlier messages omitted]")
+        parts.extend(lines[first:])
+        return "\n".join(parts)
+
+    def _state_for(self, history) -> Optional[ContextState]:
+        if not isinstance(history, RenderedHistory):
+            return None
+        return history.attach('context_state', ContextState)
+
+    def _summarize(self, state: ContextState, history: RenderedHistory):
+        try:
+            # Keep folding until the summary covers everything outside the verbatim window
+            while True:
+                lines = history.lines()
+                upto = len(lines) - self.verbatim_turns
+                with state.lock:
+                    summary, summarized = state.summary, state.summarized
+                if upto <= summarized:
+                    break
+                summary = self.summarize_fn(summary, lines[summarized:upto], history)
+                with state.lock:
+                    state.summary = summary
+                    state.summarized = upto
+        except Exception as e:
+            logger.error(f"Failed to summarize conversation history: {e}", exc_info=True)
+        finally:
+            with state.lock:
+                state.pending = False
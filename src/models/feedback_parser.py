@@ -0,0 +1,245 @@
+import json
+import re
+import threading
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+FEEDBACK_FIELDS = ('emotional_state', 'key_concerns', 'suggested_questions', 'warning_signs')
+
+SUGGESTED_QUESTION_COUNT = 3
+
+# Schema sent as the `response_format` of structured feedback requests
+FEEDBACK_JSON_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'emotional_state': {'type': 'array', 'items': {'type': 'string'}},
+        'key_concerns': {'type': 'array', 'items': {'type': 'string'}},
+        'suggested_questions': {
+            'type': 'array',
+            'items': {'type': 'string'},
+            'minItems': SUGGESTED_QUESTION_COUNT,
+            'maxItems': SUGGESTED_QUESTION_COUNT
+        },
+        'warning_signs': {'type': 'array', 'items': {'type': 'string'}}
+    },
+    'required': list(FEEDBACK_FIELDS),
+    'additionalProperties': False
+}
+
+SECTION_TITLES = {
+    'emotional_state': 'Emotional State',
+    'key_concerns': 'Key Concerns',
+    'suggested_questions': 'Suggested Questions',
+    'warning_signs': 'Warning Signs'
+}
+
+# Section header in the legacy text format, tolerating markdown and a missing number or colon
+_HEADER_RE = re.compile(
+    r'^[#*_\s]*(?:\d+[.)]\s*)?[*_]*\s*(emotional state|key concerns|suggested questions|warning signs)'
+    r'\s*[*_]*\s*:?[*_]*\s*(.*)$',
+    re.IGNORECASE
+)
+# Bullet or numbered list item
+_ITEM_RE = re.compile(r'^(?:[-*•]|\d+[.)])\s+(.*\S)')
+# Question-shaped sentence anywhere in a response, used to salvage questions
+_QUESTION_RE = re.compile(r'[A-Z][^?!."\n]{8,}\?')
+_TRAILING_COMMA_RE = re.compile(r',\s*([}\]])')
+_STRIP_CHARS = ' \t"\'*_`[]'
+_SECTION_KEYS = {title.lower(): key for key, title in SECTION_TITLES.items()}
+
+def _clean(item: str) -> str:
+    return item.strip(_STRIP_CHARS)
+
+def _as_items(field: str, value) -> List[str]:
+    """Coerce a parsed field into a list of non-empty strings."""
+    if isinstance(value, str):
+        value = re.split(r'[,\n]' if field == 'emotional_state' else r'\n', value)
+    elif not isinstance(value, (list, tuple)):
+        return []
+    return [item for item in (_clean(str(v)) for v in value if v is not None) if item]
+
+def _close_truncated_json(text: str) -> str:
+    """Close strings and brackets left open by a response cut off at max_tokens."""
+    stack = []
+    in_string = False
+    escaped = False
+    for ch in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in '{[':
+            stack.append('}' if ch == '{' else ']')
+        elif ch in '}]' and stack:
+            stack.pop()
+    if in_string:
+        text += '"'
+    text = text.rstrip().rstrip(',')
+    if text.endswith(':'):
+        text += ' null'
+    return text + ''.join(reversed(stack))
+
+def render_analysis(fields: Dict[str, List[str]]) -> str:
+    """Render feedback fields in the legacy four-section text format shown to educators."""
+    questions = fields.get('suggested_questions', [])
+    return "\n".join([
+        "1. Emotional State:",
+        ", ".join(fields.get('emotional_state', [])) or "Not identified",
+        "",
+        "2. Key Concerns:",
+        *[f"- {concern}" for concern in fields.get('key_concerns', [])],
+        "",
+        "3. Suggested Questions:",
+        *[f"{i}. {question}" for i, question in enumerate(questions, 1)],
+        "",
+        "4. Warning Signs:",
+        *[f"- {sign}" for sign in fields.get('warning_signs', [])]
+    ])
+
+class FeedbackParser:
+    """Parse feedback completions into fields, repairing bad output locally.
+
+    Structured (JSON) responses are decoded directly; truncated or slightly
+    malformed JSON is repaired before falling back to the text parser.
+    Legacy text responses are parsed in a single pass with precompiled
+    patterns. When fewer than three suggested questions come back, the
+    parser salvages question sentences from the response and then pads from
+    `fallback_questions`, so a bad completion never costs another request.
+    """
+
+    def __init__(self, fallback_questions: Sequence[str] = ()):
+        self.fallback_questions = list(fallback_questions)
+        self._lock = threading.Lock()
+
+        self.parsed = 0
+        self.structured = 0
+        self.json_repaired = 0
+        self.text_parsed = 0
+        self.parse_failures = 0
+        self.questions_repaired = 0
+
+    def _count(self, **increments):
+        with self._lock:
+            for name, amount in increments.items():
+                setattr(self, name, getattr(self, name) + amount)
+
+    def _load_json(self, text: str) -> Tuple[Optional[Dict], bool]:
+        """Decode the JSON object in `text`, returning (fields, repaired) or (None, False)."""
+        start = text.find('{')
+        if start < 0:
+            return None, False
+        candidate = text[start:]
+        end = candidate.rfind('}')
+        if end >= 0:
+            try:
+                data = json.loads(candidate[:end + 1])
+                if isinstance(data, dict):
+                    return data, False
+            except ValueError:
+                pass
+        # Trailing commas inside a complete object, then truncation at max_tokens
+        for attempt in ([candidate[:end + 1]] if end >= 0 else []) + [candidate]:
+            try:
+                data = json.loads(_TRAILING_COMMA_RE.sub(r'\1', _close_truncated_json(attempt)))
+            except ValueError:
+                continue
+            if isinstance(data, dict):
+                return data, True
+        return None, False
+
+    def parse_text(self, text: str) -> Dict[str, List[str]]:
+        """Parse the legacy four-section text format in one pass over its lines."""
+        fields = {field: [] for field in FEEDBACK_FIELDS}
+        current = None
+        for raw in text.splitlines():
+            line = raw.strip()
+            if not line:
+                continue
+            header = _HEADER_RE.match(line)
+            if header:
+                current = _SECTION_KEYS[header.group(1).lower()]
+                rest = header.group(2).strip()
+                if rest:
+                    fields[current].extend(_as_items(current, rest))
+                continue
+            if current is None:
+                continue
+            item = _ITEM_RE.match(line)
+            fields[current].extend(_as_items(current, item.group(1) if item else line))
+        return fields
+
+    def _repair_questions(self, questions: List[str], text: str, offset: int) -> Tuple[List[str], bool]:
+        """Return exactly three distinct questions, and whether any had to be supplied locally."""
+        result = []
+        for question in questions:
+            question = question if question.endswith('?') else question.rstrip('.') + '?'
+            if question not in result:
+                result.append(question)
+        repaired = len(result) != len(questions) or len(result) < SUGGESTED_QUESTION_COUNT
+        if len(result) < SUGGESTED_QUESTION_COUNT:
+            for question in _QUESTION_RE.findall(text):
+                if len(result) >= SUGGESTED_QUESTION_COUNT:
+                    break
+                if question not in result:
+                    result.append(question.strip())
+        if len(result) < SUGGESTED_QUESTION_COUNT and self.fallback_questions:
+            offset %= len(self.fallback_questions)
+            for question in self.fallback_questions[offset:] + self.fallback_questions[:offset]:
+                if len(result) >= SUGGESTED_QUESTION_COUNT:
+                    break
+                if question not in result:
+                    result.append(question)
+        return result[:SUGGESTED_QUESTION_COUNT], repaired
+
+    def parse(self, text: str, structured: bool = False, offset: int = 0) -> Dict:
+        """Parse a feedback completion into its fields.
+
+        Returns a dict with a list for each of FEEDBACK_FIELDS plus
+        `repaired`, which is True when the response needed local repair.
+        `offset` rotates the fallback questions so consecutive turns differ.
+        """
+        data = None
+        repaired = False
+        if structured:
+            data, repaired = self._load_json(text)
+
+        if data is not None:
+            fields = {field: _as_items(field, data.get(field)) for field in FEEDBACK_FIELDS}
+            # Salvage questions from the decoded values rather than the raw JSON
+            text = "\n".join(item for field in FEEDBACK_FIELDS for item in fields[field])
+            self._count(structured=1, json_repaired=int(repaired))
+        else:
+            fields = self.parse_text(text)
+            self._count(text_parsed=1)
+            if structured:
+                repaired = True
+                logger.warning("Structured feedback was not valid JSON; parsed it as text")
+
+        if not any(fields.values()):
+            self._count(parse_failures=1)
+            logger.warning("Could not find any feedback sections in the response")
+
+        fields['suggested_questions'], questions_repaired = self._repair_questions(
+            fields['suggested_questions'], text, offset)
+        self._count(parsed=1, questions_repaired=int(questions_repaired))
+        fields['repaired'] = repaired or questions_repaired
+        return fields
+
+    def stats(self) -> Dict:
+        """Return parse counters for monitoring."""
+        with self._lock:
+            return {
+                'parsed': self.parsed,
+                'structured': self.structured,
+                'json_repaired': self.json_repaired,
+                'text_parsed': self.text_parsed,
+                'parse_failures': self.parse_failures,
+                'questions_repaired': self.questions_repaired
+            }
@@ -0,0 +1,140 @@
+import re
+import threading
+import time
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.models.history import RenderedHistory
+from src.models.text_scanner import PhraseScanner
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+
+def _words(text: str) -> List[str]:
+    return _WORD_RE.findall(text.lower())
+
+class ScheduleState:
+    """The feedback last served for a conversation and when it was computed."""
+
+    def __init__(self):
+        self.feedback = None  # Most recent feedback payload
+        self.covered = 0  # Number of leading messages the feedback was computed on
+        self.refreshed_at = 0.0  # time.monotonic() of the refresh
+        self.lock = threading.Lock()
+
+class FeedbackScheduler:
+    """Decide per turn whether Mini-AI feedback needs refreshing or can be reused.
+
+    Feedback is refreshed when there is none yet, when a new student
+    message contains a risk phrase, when the educator has just asked one
+    of the suggested questions, when a student message is long, once
+    `refresh_turns` substantive student messages (at least `min_words`
+    words) have arrived, or when the feedback is older than `max_age`
+    seconds and something substantive was said since. Otherwise the
+    previous feedback is served again.
+    """
+
+    def __init__(self, risk_scanner: Optional[PhraseScanner] = None,
+                 risk_categories: Sequence[str] = (), min_words: int = 5,
+                 long_message_words: int = 40, refresh_turns: int = 2,
+                 max_age: float = 90, suggestion_match: float = 0.6):
+        self.min_words = min_words
+        self.long_message_words = long_message_words
+        self.refresh_turns = refresh_turns
+        self.max_age = max_age
+        self.suggestion_match = suggestion_match
+        self.risk_scanner = risk_scanner
+        self.risk_categories = list(risk_categories)
+        self._lock = threading.Lock()
+
+        self.refreshes = {}  # reason -> count
+        self.reuses = 0
+
+    def _state_for(self, history) -> Optional[ScheduleState]:
+        if not isinstance(history, RenderedHistory):
+            return None
+        return history.attach('schedule_state', ScheduleState)
+
+    def _used_suggestion(self, message: str, questions: List[str]) -> bool:
+        """Whether an educator message closely matches one of the suggested questions."""
+        said = set(_words(message))
+        if not said:
+            return False
+        for question in questions:
+            suggested = set(_words(question))
+            if suggested and len(said & suggested) / len(said | suggested) >= self.suggestion_match:
+                return True
+        return False
+
+    def decide(self, history: List[Dict[str, str]]) -> Tuple[bool, str]:
+        """Return (refresh, reason) for the latest turn of `history`."""
+        state = self._state_for(history)
+        if state is None:
+            return True, 'untracked'
+        with state.lock:
+            feedback, covered, refreshed_at = state.feedback, state.covered, state.refreshed_at
+        if feedback is None or covered > len(history):
+            return True, 'initial'
+
+        new_messages = history[covered:]
+        if not new_messages:
+            return False, 'no_new_messages'
+
+        substantive = 0
+        for message in new_messages:
+            text = message.get('text', '')
+            if message.get('speaker') == 'educator':
+                if self._used_suggestion(text, feedback.get('suggested_questions', [])):
+                    return True, 'suggestion_used'
+                continue
+            if self.risk_scanner is not None and self.risk_scanner.contains(text, self.risk_categories):
+                return True, 'risk'
+            words = len(_words(text))
+            if words >= self.long_message_words:
+                return True, 'long_message'
+            if words >= self.min_words:
+                substantive += 1
+
+        if substantive >= self.refresh_turns:
+            return True, 'substantive_turns'
+        if substantive and time.monotonic() - refreshed_at >= self.max_age:
+            return True, 'stale'
+        return False, 'low_value_turn'
+
+    def reuse(self, history: List[Dict[str, str]]) -> Optional[Dict]:
+        """Return the previous feedback when this turn does not need a refresh, else None."""
+        refresh, reason = self.decide(history)
+        with self._lock:
+            if refresh:
+                self.refreshes[reason] = self.refreshes.get(reason, 0) + 1
+            else:
+                self.reuses += 1
+        if refresh:
+            return None
+        logger.debug(f"Reusing feedback ({reason})")
+        return history.schedule_state.feedback
+
+    def record(self, history: List[Dict[str, str]], feedback: Dict):
+        """Remember freshly computed feedback for `history`."""
+        state = self._state_for(history)
+        if state is None:
+            return
+        with state.lock:
+            # A slower job for an older snapshot must not overwrite newer feedback
+            if len(history) < state.covered:
+                return
+            state.feedback = feedback
+            state.covered = len(history)
+            state.refreshed_at = time.monotonic()
+
+    def stats(self) -> Dict:
+        """Return refresh counts by reason and how many turns reused feedback."""
+        with self._lock:
+            refreshed = sum(self.refreshes.values())
+            total = refreshed + self.reuses
+            return {
+                'refreshes': dict(self.refreshes),
+                'reuses': self.reuses,
+                'reuse_rate': self.reuses / total if total else 0.0
+            }
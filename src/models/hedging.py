@@ -0,0 +1,102 @@
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+class LatencyTracker:
+    """Rolling window of observed provider latencies per model."""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples = {}  # model -> deque of seconds
+        self._lock = threading.Lock()
+
+    def record(self, model: str, seconds: float):
+        """Record the latency of one successful call."""
+        with self._lock:
+            samples = self._samples.get(model)
+            if samples is None:
+                samples = self._samples[model] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def percentile(self, model: str, q: float, min_samples: int = 1) -> Optional[float]:
+        """Return the `q` quantile (0-1) of recent latencies, or None with too few samples."""
+        with self._lock:
+            samples = sorted(self._samples.get(model, ()))
+        if len(samples) < max(1, min_samples):
+            return None
+        index = min(len(samples) - 1, int(q * len(samples)))
+        return samples[index]
+
+    def stats(self) -> Dict:
+        """Return sample counts and p50/p95/p99 per model."""
+        with self._lock:
+            models = list(self._samples)
+        return {
+            model: {
+                'samples': len(self._samples[model]),
+                'p50': self.percentile(model, 0.50),
+                'p95': self.percentile(model, 0.95),
+                'p99': self.percentile(model, 0.99)
+            }
+            for model in models
+        }
+
+class HedgePolicy:
+    """Decide when to fire a duplicate request and keep hedging within budget.
+
+    A hedge is sent once a call has run past the observed `quantile` latency
+    of its model. At most `max_ratio` hedges are sent per hedge-eligible
+    call, so a ratio of 1.0 can at most double provider spend.
+    """
+
+    def __init__(self, tracker: LatencyTracker, quantile: float = 0.95,
+                 max_ratio: float = 0.1, min_samples: int = 20):
+        self.tracker = tracker
+        self.quantile = quantile
+        self.max_ratio = min(max_ratio, 1.0)
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.budget_denials = 0
+        self.latency_saved = 0.0
+
+    def delay_for(self, model: str) -> Optional[float]:
+        """Count a hedge-eligible call and return how long to wait before hedging it."""
+        with self._lock:
+            self.calls += 1
+        return self.tracker.percentile(model, self.quantile, self.min_samples)
+
+    def try_hedge(self) -> bool:
+        """Reserve budget for one hedge, returning False when the budget is spent."""
+        with self._lock:
+            if self.hedges + 1 > self.max_ratio * self.calls:
+                self.budget_denials += 1
+                return False
+            self.hedges += 1
+            return True
+
+    def record_win(self, model: str, elapsed: float):
+        """Record that the hedge finished first, `elapsed` seconds after the primary started.
+
+        The primary is cancelled, so its true latency is unknown; the saving
+        is estimated against the model's recent p99.
+        """
+        tail = self.tracker.percentile(model, 0.99) or elapsed
+        with self._lock:
+            self.hedge_wins += 1
+            self.latency_saved += max(0.0, tail - elapsed)
+
+    def stats(self) -> Dict:
+        """Return hedge rate, win rate and estimated latency saved."""
+        with self._lock:
+            return {
+                'eligible_calls': self.calls,
+                'hedges': self.hedges,
+                'hedge_rate': self.hedges / self.calls if self.calls else 0.0,
+                'hedge_wins': self.hedge_wins,
+                'budget_denials': self.budget_denials,
+                'estimated_latency_saved': round(self.latency_saved, 3)
+            }
@@ -0,0 +1,106 @@
+from typing import Any, Callable, Dict, List
+
+EMPTY_HISTORY_TEXT = "No previous conversation."
+
+def render_message(message: Dict[str, str]) -> str:
+    """Render a single history entry as a `Speaker: text` line."""
+    speaker = message.get("speaker", "unknown").title()
+    text = message.get("text", "")
+    return f"{speaker}: {text}"
+
+STATE_NAMES = ('context_state', 'feedback_state', 'schedule_state', 'route_state', 'usage_ledger')
+
+def _state_property(name: str) -> property:
+    def get(self):
+        return self._state.get(name)
+
+    def set(self, value):
+        self._state[name] = value
+
+    return property(get, set)
+
+class RenderedHistory(list):
+    """Append-only conversation history that keeps its prompt rendering up to date.
+
+    Each appended message is rendered to a `Speaker: text` line once, so
+    building a prompt does not re-format the whole transcript every turn.
+    The joined text is extended in place on append, so the student and
+    feedback prompt builders share it without re-joining the lines.
+
+    The per-conversation state kept by the agents lives in one mapping that
+    copies share, so state created on a snapshot (for example by a
+    background feedback worker) is seen by the conversation it came from.
+    """
+
+    context_state = _state_property('context_state')  # Rolling-summary state owned by the context manager
+    feedback_state = _state_property('feedback_state')  # Previous feedback analysis used for incremental feedback
+    schedule_state = _state_property('schedule_state')  # Last served feedback used by the feedback scheduler
+    route_state = _state_property('route_state')  # Sticky role -> model routes chosen by the model router
+    usage_ledger = _state_property('usage_ledger')  # Per-role token and latency totals kept by the usage tracker
+
+    def __init__(self, messages=()):
+        super().__init__()
+        self._lines = []
+        self._text = None
+        self._state = {}
+        self.extend(messages)
+
+    def attach(self, name: str, factory: Callable[[], Any]) -> Any:
+        """Return the named state, creating it with `factory` on first use.
+
+        Creation is atomic, so threads working on copies of the same
+        conversation always end up with one shared object.
+        """
+        state = self._state.get(name)
+        if state is None:
+            state = self._state.setdefault(name, factory())
+        return state
+
+    def adopt(self, other: 'RenderedHistory'):
+        """Take over the agent state built on `other`, for a history that continues it."""
+        self._state.update(other._state)
+
+    def append(self, message: Dict[str, str]):
+        super().append(message)
+        line = render_message(message)
+        self._lines.append(line)
+        if self._text is not None:
+            self._text = f"{self._text}\n{line}"
+
+    def extend(self, messages):
+        for message in messages:
+            self.append(message)
+
+    def lines(self) -> List[str]:
+        """Return the rendered `Speaker: text` line of every message."""
+        if len(self._lines) != len(self):
+            # The list was changed through something other than append; start over
+            self._lines = [render_message(message) for message in self]
+            self._text = None
+        return self._lines
+
+    def render(self) -> str:
+        """Return the history as newline-separated `Speaker: text` lines."""
+        self.lines()
+        if not self._lines:
+            return EMPTY_HISTORY_TEXT
+        if self._text is None:
+            self._text = "\n".join(self._lines)
+        return self._text
+
+    def copy(self) -> 'RenderedHistory':
+        """Return a snapshot of the messages that shares this history's agent state."""
+        snapshot = RenderedHistory()
+        list.extend(snapshot, self)
+        snapshot._lines = list(self._lines)
+        snapshot._text = self._text
+        snapshot._state = self._state
+        return snapshot
+
+def format_history(history: List[Dict[str, str]]) -> str:
+    """Render any history list, reusing the cached rendering when available."""
+    if isinstance(history, RenderedHistory):
+        return history.render()
+    if not history:
+        return EMPTY_HISTORY_TEXT
+    return "\n".join(render_message(message) for message in history)
@@ -0,0 +1,99 @@
+import threading
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from src.models.history import RenderedHistory
+
+logger = logging.getLogger(__name__)
+
+# Fields carried from one analysis into the next delta prompt
+CARRIED_FIELDS = ('emotional_state', 'key_concerns', 'warning_signs', 'suggested_questions')
+
+class FeedbackState:
+    """The last feedback analysis of a conversation and how much of it it covered."""
+
+    def __init__(self):
+        self.fields = None  # Parsed fields of the last analysis
+        self.analyzed = 0  # Number of leading messages covered by `fields`
+        self.deltas = 0  # Delta analyses since the last full one
+        self.lock = threading.Lock()
+
+def render_state(fields: Dict[str, List[str]]) -> str:
+    """Render carried analysis fields as the compact state sent with a delta prompt."""
+    return "\n".join([
+        f"Emotional state: {', '.join(fields.get('emotional_state', [])) or 'Not identified'}",
+        f"Key concerns: {'; '.join(fields.get('key_concerns', [])) or 'None yet'}",
+        f"Warning signs: {'; '.join(fields.get('warning_signs', [])) or 'None yet'}",
+        f"Questions already suggested: {' '.join(fields.get('suggested_questions', [])) or 'None'}"
+    ])
+
+class IncrementalFeedback:
+    """Plan feedback as a delta over the previous analysis instead of a full re-read.
+
+    After a full analysis, later calls send the model only the messages
+    added since the last analysis plus the compact previous state. Every
+    `full_every`-th call, or when more than `max_delta_messages` messages
+    have accumulated, the whole conversation is analysed again so the
+    carried state cannot drift. State lives on the `RenderedHistory`, so
+    snapshots taken for background jobs share it.
+    """
+
+    def __init__(self, full_every: int = 5, max_delta_messages: int = 8):
+        self.full_every = full_every
+        self.max_delta_messages = max_delta_messages
+        self._lock = threading.Lock()
+
+        self.full_analyses = 0
+        self.delta_analyses = 0
+
+    def _state_for(self, history) -> Optional[FeedbackState]:
+        if not isinstance(history, RenderedHistory):
+            return None
+        return history.attach('feedback_state', FeedbackState)
+
+    def plan(self, history: List[Dict[str, str]]) -> Tuple[Optional[Dict], int]:
+        """Return the previous fields and the index of the first new message.
+
+        Previous fields of None mean the call should analyse the whole
+        conversation.
+        """
+        state = self._state_for(history)
+        if state is None:
+            return None, 0
+        with state.lock:
+            fields, analyzed, deltas = state.fields, state.analyzed, state.deltas
+        new_messages = len(history) - analyzed
+        if (fields is None or deltas + 1 >= self.full_every
+                or new_messages <= 0 or new_messages > self.max_delta_messages):
+            return None, 0
+        return fields, analyzed
+
+    def record(self, history: List[Dict[str, str]], fields: Dict, delta: bool):
+        """Store the result of an analysis covering all of `history`."""
+        with self._lock:
+            if delta:
+                self.delta_analyses += 1
+            else:
+                self.full_analyses += 1
+
+        state = self._state_for(history)
+        if state is None or not any(fields.get(field) for field in CARRIED_FIELDS[:3]):
+            # Nothing worth carrying forward; the next call starts from scratch
+            return
+        with state.lock:
+            # A slower job for an older snapshot must not overwrite newer state
+            if len(history) < state.analyzed:
+                return
+            state.fields = {field: list(fields.get(field, [])) for field in CARRIED_FIELDS}
+            state.analyzed = len(history)
+            state.deltas = state.deltas + 1 if delta else 0
+
+    def stats(self) -> Dict:
+        """Return how many analyses were full and how many were deltas."""
+        with self._lock:
+            total = self.full_analyses + self.delta_analyses
+            return {
+                'full_analyses': self.full_analyses,
+                'delta_analyses': self.delta_analyses,
+                'delta_rate': self.delta_analyses / total if total else 0.0
+            }
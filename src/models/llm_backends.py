@@ -0,0 +1,273 @@
+import asyncio
+import hashlib
+import json
+import math
+import random
+import logging
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class LLMBackend:
+    """Interface the LLM client uses to reach a chat-completions provider.
+
+    `create` returns a response shaped like the Together SDK's: an object
+    with `choices[0].message.content` and `usage`. With `stream=True` it
+    returns an async iterator of chunks with `choices[0].delta.content`.
+    Provider errors should carry a `status_code` (and optionally a
+    `response.headers` mapping) so the client can classify them.
+    """
+
+    name = 'base'
+
+    async def create(self, **params) -> Any:
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+    def status(self) -> Dict:
+        """Return whether the backend is usable, for the health check."""
+        return {'backend': self.name, 'configured': True, 'error': None}
+
+class TogetherBackend(LLMBackend):
+    """Together AI chat completions over a pooled keep-alive httpx client."""
+
+    name = 'together'
+
+    def __init__(self, api_key: str, base_url: Optional[str] = None,
+                 max_connections: int = 100, max_keepalive_connections: int = 20,
+                 keepalive_expiry: float = 30, timeout: float = 60):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.timeout = timeout
+        self._client = None
+
+    def _get_client(self):
+        # Created on first use so the connection pool belongs to the client's event loop
+        if self._client is None:
+            import httpx
+            from together import AsyncTogether
+
+            self._client = AsyncTogether(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                timeout=self.timeout,
+                # Retries are handled by the LLM client so the limiter sees every attempt
+                max_retries=0,
+                http_client=httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_keepalive_connections,
+                        keepalive_expiry=self.keepalive_expiry
+                    ),
+                    timeout=self.timeout
+                )
+            )
+        return self._client
+
+    async def create(self, **params) -> Any:
+        return await self._get_client().chat.completions.create(**params)
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    def status(self) -> Dict:
+        if not self.api_key:
+            return {'backend': self.name, 'configured': False, 'error': 'Together API key not set'}
+        return {'backend': self.name, 'configured': True, 'error': None}
+
+class MockProviderError(Exception):
+    """Error injected by the mock backend, shaped like an SDK API error."""
+
+    def __init__(self, status_code: int, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        headers = {'retry-after': str(retry_after)} if retry_after is not None else {}
+        self.response = SimpleNamespace(headers=headers)
+
+MOCK_STUDENT_LINES = [
+    "*fidgets with sleeve* Um, I've been feeling really overwhelmed lately... Like, I can't focus in class anymore.",
+    "*looks down* I don't know, it's just... everything feels like too much right now, you know?",
+    "I guess I haven't been sleeping much. I just lie there thinking about stuff.",
+    "*shrugs* My parents keep asking about my grades and I just... I don't want to talk about it with them.",
+    "It's like, I used to like hanging out with my friends, but now I kind of just want to be alone.",
+    "*sighs* I feel like I'm letting everyone down. Like, no matter what I do, it's not enough.",
+    "Um, yeah. I tried talking to my friend about it but she didn't really get it.",
+    "Sometimes I get this tight feeling in my chest before tests, and then my mind just goes blank."
+]
+
+MOCK_EDUCATOR_LINES = [
+    "It sounds like you've been carrying a lot lately. Can you tell me more about when it feels the heaviest?",
+    "Thank you for sharing that with me. It takes courage to talk about how you're feeling.",
+    "That sounds really exhausting. What has helped you get through difficult days before?",
+    "I hear that you feel alone with this. Who else in your life might you be able to lean on?"
+]
+
+MOCK_EMOTIONS = ["Anxious", "Sad", "Overwhelmed", "Tired", "Frustrated", "Lonely", "Worried"]
+
+MOCK_CONCERNS = [
+    "Difficulty concentrating in class",
+    "Poor sleep",
+    "Academic pressure from family",
+    "Withdrawal from friends",
+    "Low self-worth",
+    "Test anxiety"
+]
+
+MOCK_QUESTIONS = [
+    "What usually happens right before you start feeling overwhelmed?",
+    "How has this been affecting your sleep and schoolwork?",
+    "Who do you feel comfortable talking to when things get hard?",
+    "When did you first notice these feelings?",
+    "What helps you feel even a little bit calmer?",
+    "How are things at home right now?"
+]
+
+MOCK_WARNINGS = [
+    "Social withdrawal",
+    "Persistent low mood",
+    "Sleep disturbance",
+    "Declining academic performance"
+]
+
+def mock_usage(messages: List[Dict[str, str]], text: str) -> Dict[str, int]:
+    """Approximate token usage for a mock completion (4 characters per prompt token, one per word)."""
+    prompt_tokens = sum(len(m.get('content', '')) for m in messages) // 4 + 1
+    completion_tokens = len(text.split(' '))
+    return {
+        'prompt_tokens': prompt_tokens,
+        'completion_tokens': completion_tokens,
+        'total_tokens': prompt_tokens + completion_tokens
+    }
+
+class MockBackend(LLMBackend):
+    """Deterministic local backend for load tests and offline development.
+
+    Outputs depend only on `seed` and the prompt, so replaying a run gives
+    the same transcript. Latency is time-to-first-token drawn from a
+    seeded distribution plus completion tokens divided by
+    `tokens_per_second`. Errors are injected at `error_rate` (HTTP 500)
+    and `throttle_rate` (HTTP 429 with Retry-After).
+    """
+
+    name = 'mock'
+
+    def __init__(self, seed: int = 42, latency_distribution: str = 'lognormal',
+                 latency_median: float = 0.5, latency_sigma: float = 0.5,
+                 tokens_per_second: float = 50, error_rate: float = 0.0,
+                 throttle_rate: float = 0.0, retry_after: float = 1.0):
+        self.seed = seed
+        self.latency_distribution = latency_distribution
+        self.latency_median = latency_median
+        self.latency_sigma = latency_sigma
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self._timing = random.Random(seed)
+        self.calls = 0
+
+    def sample_latency(self) -> float:
+        """Draw a time-to-first-token from the configured distribution."""
+        if self.latency_distribution == 'fixed':
+            return self.latency_median
+        if self.latency_distribution == 'uniform':
+            spread = self.latency_median * self.latency_sigma
+            return max(0.0, self._timing.uniform(self.latency_median - spread, self.latency_median + spread))
+        return self._timing.lognormvariate(math.log(max(self.latency_median, 1e-6)), self.latency_sigma)
+
+    def sample_fault(self) -> Optional[int]:
+        """Return the HTTP status to inject for the next call (429 or 500), or None."""
+        roll = self._timing.random()
+        if roll < self.throttle_rate:
+            return 429
+        if roll < self.throttle_rate + self.error_rate:
+            return 500
+        return None
+
+    def _rng_for(self, messages: List[Dict[str, str]]) -> random.Random:
+        digest = hashlib.sha256(repr((self.seed, messages)).encode('utf-8')).hexdigest()
+        return random.Random(int(digest[:16], 16))
+
+    def generate(self, messages: List[Dict[str, str]], max_tokens: Optional[int] = None,
+                 response_format: Optional[Dict] = None) -> str:
+        """Return the deterministic reply to `messages`, cut to `max_tokens` words.
+
+        Feedback requests with a JSON `response_format` get a JSON object
+        with the fields of the structured feedback schema.
+        """
+        rng = self._rng_for(messages)
+        system = messages[0]['content'].lower() if messages else ''
+        if 'analysis' in system and (response_format or {}).get('type') in ('json_schema', 'json_object'):
+            text = json.dumps({
+                'emotional_state': rng.sample(MOCK_EMOTIONS, 3),
+                'key_concerns': rng.sample(MOCK_CONCERNS, 3),
+                'suggested_questions': rng.sample(MOCK_QUESTIONS, 3),
+                'warning_signs': rng.sample(MOCK_WARNINGS, 2)
+            })
+        elif 'analysis' in system:
+            emotions = ", ".join(rng.sample(MOCK_EMOTIONS, 3))
+            concerns = "\n".join(f"- {c}" for c in rng.sample(MOCK_CONCERNS, 3))
+            questions = "\n".join(f"{i}. {q}" for i, q in enumerate(rng.sample(MOCK_QUESTIONS, 3), 1))
+            warnings = "\n".join(f"- {w}" for w in rng.sample(MOCK_WARNINGS, 2))
+            text = (f"1. Emotional State:\n{emotions}\n\n2. Key Concerns:\n{concerns}\n\n"
+                    f"3. Suggested Questions:\n{questions}\n\n4. Warning Signs:\n{warnings}")
+        elif 'summar' in system:
+            text = "The student has described " + ", ".join(rng.sample(MOCK_CONCERNS, 2)).lower() + "."
+        elif 'counselor supporting' in system:
+            text = rng.choice(MOCK_EDUCATOR_LINES)
+        else:
+            text = rng.choice(MOCK_STUDENT_LINES)
+
+        words = text.split(' ')
+        if max_tokens and len(words) > max_tokens:
+            text = ' '.join(words[:max_tokens])
+        return text
+
+    async def create(self, stream: bool = False, **params) -> Any:
+        self.calls += 1
+        messages = params.get('messages', [])
+        await asyncio.sleep(self.sample_latency())
+        status = self.sample_fault()
+        if status == 429:
+            raise MockProviderError(429, "Mock rate limit exceeded", retry_after=self.retry_after)
+        if status == 500:
+            raise MockProviderError(500, "Mock internal server error")
+
+        text = self.generate(messages, params.get('max_tokens'), params.get('response_format'))
+        words = text.split(' ')
+        usage = SimpleNamespace(**mock_usage(messages, text))
+
+        if stream:
+            return self._stream(words, usage)
+
+        await asyncio.sleep(len(words) / self.tokens_per_second)
+        return SimpleNamespace(
+            model=params.get('model'),
+            choices=[SimpleNamespace(message=SimpleNamespace(role='assistant', content=text), finish_reason='stop')],
+            usage=usage
+        )
+
+    async def _stream(self, words: List[str], usage) -> AsyncIterator:
+        for i, word in enumerate(words):
+            await asyncio.sleep(1 / self.tokens_per_second)
+            content = word if i == 0 else ' ' + word
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))], usage=None)
+        yield SimpleNamespace(choices=[], usage=usage)
+
+def create_backend(name: str, **options) -> LLMBackend:
+    """Build the backend selected in config (`together` or `mock`)."""
+    backends = {
+        TogetherBackend.name: TogetherBackend,
+        MockBackend.name: MockBackend
+    }
+    if name not in backends:
+        raise ValueError(f"Unknown LLM backend: {name}")
+    return backends[name](**options)
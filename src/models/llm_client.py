@@ -0,0 +1,334 @@
+import asyncio
+import queue
+import threading
+import time
+import logging
+import sys
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, Optional
+
+from src.models.rate_limiter import AdaptiveLimiter, RateLimitExceeded, retry_after_seconds
+from src.models.hedging import HedgePolicy, LatencyTracker
+from src.models.circuit_breaker import CircuitBreaker, CircuitOpenError
+from src.models.llm_backends import LLMBackend
+
+logger = logging.getLogger(__name__)
+
+# Sentinel marking the end of a bridged async stream
+_STREAM_END = object()
+
+def classify_error(error: BaseException) -> str:
+    """Classify a failed call as 'throttled', 'retryable' or 'fatal'."""
+    status = getattr(error, 'status_code', None)
+    if status == 429:
+        return 'throttled'
+    if isinstance(error, (asyncio.TimeoutError, RateLimitExceeded)) or (status is not None and status >= 500):
+        return 'retryable'
+    # httpx is only loaded by the Together backend; if it was never imported no transport error can exist
+    httpx = sys.modules.get('httpx')
+    if httpx is not None and isinstance(error, httpx.TransportError):
+        return 'retryable'
+    return 'fatal'
+
+def provider_failure(error: BaseException) -> bool:
+    """Whether `error` was a transient failure of the provider rather than of the request or local queueing."""
+    return not isinstance(error, (RateLimitExceeded, CircuitOpenError)) and classify_error(error) != 'fatal'
+
+class BreakerScope:
+    """Circuit-breaker admission for one logical call that may span several provider requests.
+
+    The breaker admits the call on its first provider request and records a
+    single outcome when the scope exits, so a call that fails over to
+    another model counts once. Its latency is timed from the first request
+    that got past the rate limiter, so local queueing never looks like a
+    slow provider, and a call that never got past it is handed back to the
+    breaker without an outcome. Calls answered without reaching the provider
+    (cache hits) never touch the breaker. Use as `async with`.
+    """
+
+    def __init__(self, breaker: CircuitBreaker):
+        self.breaker = breaker
+        self.admitted = False
+        self.started = None
+
+    def admit(self):
+        """Ask the breaker to admit the call, once; raises CircuitOpenError."""
+        if not self.admitted:
+            self.breaker.allow()
+            self.admitted = True
+
+    def start(self):
+        """Mark the first provider request of the call as sent."""
+        if self.started is None:
+            self.started = time.monotonic()
+
+    async def __aenter__(self) -> 'BreakerScope':
+        return self
+
+    async def __aexit__(self, exc_type, error, tb) -> bool:
+        if not self.admitted:
+            return False
+        if self.started is None:
+            self.breaker.release()
+            return False
+        # Errors the provider answered promptly (bad requests), local queue timeouts and cancellations
+        # do not count against it
+        failed = isinstance(error, Exception) and provider_failure(error)
+        self.breaker.record(not failed, time.monotonic() - self.started)
+        return False
+
+class CallMetrics:
+    """Timing, retry and token counts for one logical completion, across retries and hedges."""
+
+    def __init__(self):
+        self.queue_wait = 0.0  # seconds spent waiting for the limiter
+        self.provider_latency = 0.0  # seconds spent in provider calls
+        self.attempts = 0
+        self.retries = 0
+        self.hedges = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached = False
+
+    def add_usage(self, usage):
+        """Add the token counts of a provider `usage` object, if there is one."""
+        if usage is None:
+            return
+        self.prompt_tokens += getattr(usage, 'prompt_tokens', 0) or 0
+        self.completion_tokens += getattr(usage, 'completion_tokens', 0) or 0
+
+class LLMClient:
+    """asyncio-native chat-completions client over a pluggable `LLMBackend`.
+
+    All requests run on a single background event loop that owns the
+    backend and its connection pool. Async callers on
+    that loop await `acreate`/`astream` directly; synchronous callers (Flask
+    request threads, the simulation engine) use `run`, `create` and `stream`,
+    which are safe to call from any thread.
+
+    Every call is admitted through a shared `AdaptiveLimiter` and retried
+    with jittered backoff on throttling, timeouts and 5xx responses.
+    Calls made with `hedge=True` fire a duplicate request once they run
+    past the model's observed tail latency; the first response wins.
+    A `CircuitBreaker` rejects calls up front while the provider is failing.
+    """
+
+    def __init__(self, backend: LLMBackend, timeout: float = 60,
+                 limiter: Optional[AdaptiveLimiter] = None, queue_timeout: float = 30,
+                 max_retries: int = 2, hedging: Optional[HedgePolicy] = None,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.backend = backend
+        self.timeout = timeout
+        self.limiter = limiter or AdaptiveLimiter()
+        self.queue_timeout = queue_timeout
+        self.max_retries = max_retries
+        self.hedging = hedging or HedgePolicy(LatencyTracker())
+        self.latency = self.hedging.tracker
+        self.breaker = breaker or CircuitBreaker()
+
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Start the background event loop and connection pool on first use."""
+        with self._lock:
+            if self._loop is not None:
+                return self._loop
+
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run_loop():
+                asyncio.set_event_loop(loop)
+                ready.set()
+                loop.run_forever()
+
+            self._thread = threading.Thread(target=run_loop, name='llm-client-loop', daemon=True)
+            self._thread.start()
+            ready.wait()
+            self._loop = loop
+            logger.info("LLM client event loop started")
+            return loop
+
+    async def _admit(self, call, model: str, timeout: Optional[float], metrics: Optional[CallMetrics] = None,
+                     scope: Optional[BreakerScope] = None):
+        """Run `call()` under the limiter, retrying throttled and transient failures.
+
+        Each request that gets past the limiter starts the `scope`'s latency clock.
+        """
+        metrics = metrics or CallMetrics()
+        deadline = time.monotonic() + self.queue_timeout
+        attempt = 0
+        while True:
+            queued = time.monotonic()
+            await self.limiter.acquire(deadline)
+            started = time.monotonic()
+            if scope is not None:
+                scope.start()
+            metrics.queue_wait += started - queued
+            metrics.attempts += 1
+            try:
+                result = await asyncio.wait_for(call(), timeout=timeout or self.timeout)
+            except asyncio.CancelledError:
+                metrics.provider_latency += time.monotonic() - started
+                await asyncio.shield(self.limiter.release('error'))
+                raise
+            except Exception as e:
+                metrics.provider_latency += time.monotonic() - started
+                kind = classify_error(e)
+                retry_after = retry_after_seconds(e) if kind == 'throttled' else None
+                await self.limiter.release('throttled' if kind == 'throttled' else 'error', retry_after)
+                if kind == 'fatal' or attempt >= self.max_retries:
+                    raise
+                delay = self.limiter.backoff(attempt, retry_after)
+                logger.warning(f"LLM call failed ({e}); retry {attempt + 1} in {delay:.2f}s")
+                attempt += 1
+                metrics.retries += 1
+                await asyncio.sleep(delay)
+                continue
+            metrics.provider_latency += time.monotonic() - started
+            self.latency.record(model, time.monotonic() - started)
+            await self.limiter.release('success')
+            return result
+
+    async def _hedged(self, call, model: str, timeout: Optional[float], metrics: Optional[CallMetrics] = None,
+                      scope: Optional[BreakerScope] = None):
+        """Run `call()` and race a duplicate against it if it runs past the hedge delay."""
+        metrics = metrics or CallMetrics()
+        delay = self.hedging.delay_for(model)
+        started = time.monotonic()
+        primary = asyncio.ensure_future(self._admit(call, model, timeout, metrics, scope))
+        tasks = {primary}
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done and self.hedging.try_hedge():
+                    logger.info(f"Hedging slow {model} call after {delay:.2f}s")
+                    metrics.hedges += 1
+                    tasks.add(asyncio.ensure_future(self._admit(call, model, timeout, metrics, scope)))
+
+            error = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.hedging.record_win(model, time.monotonic() - started)
+                        return task.result()
+                    if error is None or task is primary:
+                        error = task.exception()
+            raise error
+        finally:
+            # Cancel the losing request, or both if the caller went away
+            for task in tasks:
+                task.cancel()
+
+    def breaker_scope(self) -> BreakerScope:
+        """Return a scope that admits and records a multi-request call on the breaker once."""
+        return BreakerScope(self.breaker)
+
+    async def _guarded(self, request: Callable[[BreakerScope], Awaitable], scope: Optional[BreakerScope] = None) -> Any:
+        """Await `request(scope)` behind the circuit breaker.
+
+        Without a `scope` the request is its own logical call and its outcome
+        is recorded here; with one, the scope's owner records it.
+        """
+        own = scope is None
+        scope = scope or self.breaker_scope()
+        scope.admit()
+        if not own:
+            return await request(scope)
+        async with scope:
+            return await request(scope)
+
+    async def acreate(self, timeout: Optional[float] = None, hedge: bool = False,
+                      metrics: Optional[CallMetrics] = None, scope: Optional[BreakerScope] = None,
+                      **params) -> Any:
+        """Create a chat completion. Must be awaited on the client's event loop.
+
+        Queue wait, provider time, retries and token usage are added to
+        `metrics` when one is given. Pass the `scope` of an enclosing
+        logical call to leave the breaker outcome to it.
+        """
+        metrics = metrics or CallMetrics()
+        call = lambda: self.backend.create(**params)
+        send = self._hedged if hedge else self._admit
+        response = await self._guarded(lambda scope: send(call, params.get('model'), timeout, metrics, scope), scope)
+        metrics.add_usage(getattr(response, 'usage', None))
+        return response
+
+    async def astream(self, timeout: Optional[float] = None, metrics: Optional[CallMetrics] = None,
+                      scope: Optional[BreakerScope] = None, **params) -> AsyncIterator[str]:
+        """Stream a chat completion as text fragments. Must run on the client's event loop."""
+        metrics = metrics or CallMetrics()
+        stream = await self._guarded(lambda scope: self._admit(
+            lambda: self.backend.create(stream=True, **params),
+            params.get('model'),
+            timeout,
+            metrics,
+            scope
+        ), scope)
+        async for chunk in stream:
+            # Providers report usage on the final chunk of a stream
+            metrics.add_usage(getattr(chunk, 'usage', None))
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            text = getattr(delta, 'content', None) if delta is not None else None
+            if text:
+                yield text
+
+    def run(self, coro: Awaitable, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the client's event loop and block the calling thread for its result."""
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            future.cancel()
+            raise
+
+    def create(self, timeout: Optional[float] = None, **params) -> Any:
+        """Thread-safe synchronous shim around `acreate`."""
+        return self.run(self.acreate(timeout=timeout, **params))
+
+    def iterate(self, agen: AsyncIterator) -> Iterator:
+        """Consume an async iterator on the client's event loop from a synchronous thread."""
+        loop = self._ensure_loop()
+        items = queue.Queue()
+
+        async def pump():
+            try:
+                async for item in agen:
+                    items.put(item)
+            except BaseException as e:
+                items.put(e)
+            finally:
+                items.put(_STREAM_END)
+
+        future = asyncio.run_coroutine_threadsafe(pump(), loop)
+        try:
+            while True:
+                item = items.get()
+                if item is _STREAM_END:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            # Stop the producer if the consumer went away early
+            future.cancel()
+
+    def stream(self, timeout: Optional[float] = None, **params) -> Iterator[str]:
+        """Thread-safe synchronous shim around `astream`."""
+        return self.iterate(self.astream(timeout=timeout, **params))
+
+    def close(self):
+        """Close the connection pool and stop the event loop."""
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.backend.close(), loop).result(5)
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join(5)
@@ -0,0 +1,132 @@
+import threading
+import time
+import logging
+from collections import deque
+from typing import Dict, List, Optional, Sequence
+
+from src.models.hedging import LatencyTracker
+from src.models.history import RenderedHistory
+
+logger = logging.getLogger(__name__)
+
+class ModelRouter:
+    """Pick a model per call from each role's ordered list of candidates.
+
+    Candidates whose error rate over the last `error_window` calls reaches
+    `max_error_rate` are benched for `cooldown` seconds. Among the healthy
+    candidates, the router picks the fastest one whose observed `quantile`
+    latency (from the shared `LatencyTracker`) is within the role's SLO;
+    candidates without enough samples count as meeting the SLO exactly, so
+    a measured fast model wins and an unmeasured one is tried before a
+    known slow one. When nothing meets the SLO the fastest healthy
+    candidate is used, and when nothing is healthy the first candidate is.
+
+    Routes are sticky per conversation: once a role has a model for a
+    history, it keeps it while that model stays healthy and within SLO so
+    the persona's voice does not change mid-conversation.
+    """
+
+    def __init__(self, candidates: Dict[str, Sequence[str]], tracker: LatencyTracker,
+                 slos: Dict[str, float], quantile: float = 0.95, min_samples: int = 5,
+                 error_window: int = 20, min_calls: int = 5, max_error_rate: float = 0.5,
+                 cooldown: float = 30):
+        self.candidates = {role: list(models) for role, models in candidates.items()}
+        self.tracker = tracker
+        self.slos = slos
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.error_window = error_window
+        self.min_calls = min_calls
+        self.max_error_rate = max_error_rate
+        self.cooldown = cooldown
+
+        self._outcomes = {}  # model -> deque of failed flags
+        self._benched_until = {}  # model -> time.monotonic() when it may be tried again
+        self._lock = threading.Lock()
+
+        self.routed = {}  # role -> {model: count}
+        self.failovers = 0
+        self.sticky_switches = 0
+
+    def _healthy(self, model: str, now: float) -> bool:
+        return self._benched_until.get(model, 0.0) <= now
+
+    def _latency(self, model: str, role: str) -> float:
+        observed = self.tracker.percentile(model, self.quantile, self.min_samples)
+        return observed if observed is not None else self.slos.get(role, float('inf'))
+
+    def _within_slo(self, model: str, role: str) -> bool:
+        return self._latency(model, role) <= self.slos.get(role, float('inf'))
+
+    def choose(self, role: str, history: Optional[List[Dict[str, str]]] = None,
+               exclude: Sequence[str] = ()) -> str:
+        """Return the model to use for the next `role` call, honouring the conversation's sticky route."""
+        candidates = [m for m in self.candidates[role] if m not in exclude] or self.candidates[role]
+        routes = None
+        if isinstance(history, RenderedHistory):
+            routes = history.attach('route_state', dict)
+
+        now = time.monotonic()
+        with self._lock:
+            healthy = [m for m in candidates if self._healthy(m, now)]
+        current = routes.get(role) if routes is not None else None
+        if current in healthy and self._within_slo(current, role):
+            model = current
+        elif healthy:
+            within = [m for m in healthy if self._within_slo(m, role)]
+            # min() keeps list order on ties, so unmeasured candidates are tried in preference order
+            model = min(within or healthy, key=lambda m: self._latency(m, role))
+        else:
+            model = candidates[0]
+
+        with self._lock:
+            counts = self.routed.setdefault(role, {})
+            counts[model] = counts.get(model, 0) + 1
+            if current is not None and model != current:
+                self.sticky_switches += 1
+        if routes is not None:
+            if current is not None and model != current:
+                logger.info(f"Switching {role} model from {current} to {model}")
+            routes[role] = model
+        return model
+
+    def record(self, model: str, success: bool):
+        """Record the outcome of a call, benching the model if it keeps failing."""
+        with self._lock:
+            outcomes = self._outcomes.get(model)
+            if outcomes is None:
+                outcomes = self._outcomes[model] = deque(maxlen=self.error_window)
+            outcomes.append(not success)
+            if success or len(outcomes) < self.min_calls:
+                return
+            if sum(outcomes) / len(outcomes) >= self.max_error_rate:
+                self._benched_until[model] = time.monotonic() + self.cooldown
+                outcomes.clear()
+                logger.warning(f"Benching model {model} for {self.cooldown}s after repeated errors")
+
+    def record_failover(self, role: str, model: str, error: Exception):
+        """Count a call that moved on to the next candidate after `model` failed."""
+        with self._lock:
+            self.failovers += 1
+        logger.warning(f"{role} call to {model} failed ({error}); failing over")
+
+    def stats(self) -> Dict:
+        """Return per-role routing counts and per-model health for monitoring."""
+        now = time.monotonic()
+        with self._lock:
+            models = {m for models in self.candidates.values() for m in models}
+            health = {
+                model: {
+                    'healthy': self._healthy(model, now),
+                    'error_rate': sum(self._outcomes[model]) / len(self._outcomes[model])
+                    if self._outcomes.get(model) else 0.0,
+                    'latency': self.tracker.percentile(model, self.quantile, self.min_samples)
+                }
+                for model in models
+            }
+            return {
+                'routed': {role: dict(counts) for role, counts in self.routed.items()},
+                'failovers': self.failovers,
+                'sticky_switches': self.sticky_switches,
+                'models': health
+            }
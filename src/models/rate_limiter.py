@@ -0,0 +1,144 @@
+import asyncio
+import random
+import time
+import logging
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class RateLimitExceeded(Exception):
+    """Raised when a call could not be admitted before its deadline."""
+
+    def __init__(self, retry_after: float):
+        super().__init__("Timed out waiting for LLM provider capacity")
+        self.retry_after = retry_after
+
+class AdaptiveLimiter:
+    """Token-bucket rate limiter with AIMD concurrency control for provider calls.
+
+    Admission needs both a token from the bucket (refilled at `rate` per
+    second up to `burst`) and a free concurrency slot. The concurrency limit
+    grows by roughly one slot per window of successful calls and is cut by
+    `decrease_factor` whenever the provider throttles us; a `Retry-After`
+    hint pauses admission entirely until it has passed. Callers wait in FIFO
+    order and are rejected once their deadline expires.
+
+    Must be used from a single asyncio event loop.
+    """
+
+    def __init__(self, rate: float = 10, burst: int = 20, initial_limit: int = 16,
+                 min_limit: int = 1, max_limit: int = 64, decrease_factor: float = 0.5,
+                 backoff_base: float = 0.5, backoff_max: float = 20):
+        self.rate = rate
+        self.burst = burst
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.tokens = float(burst)
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self._refilled_at = time.monotonic()
+        self._waiters = []
+        self._condition = None
+
+        self.admitted = 0
+        self.throttled = 0
+        self.errors = 0
+        self.rejections = 0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def _wait_hint(self, now: float) -> float:
+        """Seconds until admission could next become possible without a release."""
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.tokens < 1:
+            return (1 - self.tokens) / self.rate
+        return 1.0
+
+    async def acquire(self, deadline: Optional[float] = None):
+        """Wait for a token and a concurrency slot, or raise RateLimitExceeded at `deadline` (monotonic)."""
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+
+        ticket = object()
+        async with self._condition:
+            self._waiters.append(ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if (self._waiters[0] is ticket and now >= self.blocked_until
+                            and self.tokens >= 1 and self.in_flight < int(self.limit)):
+                        self.tokens -= 1
+                        self.in_flight += 1
+                        self.admitted += 1
+                        return
+
+                    wait = self._wait_hint(now)
+                    if deadline is not None:
+                        if now >= deadline:
+                            self.rejections += 1
+                            raise RateLimitExceeded(wait)
+                        wait = min(wait, deadline - now)
+                    try:
+                        await asyncio.wait_for(self._condition.wait(), timeout=wait)
+                    except asyncio.TimeoutError:
+                        pass
+            finally:
+                self._waiters.remove(ticket)
+                self._condition.notify_all()
+
+    async def release(self, outcome: str = 'success', retry_after: Optional[float] = None):
+        """Return a slot and adapt the limit: `outcome` is 'success', 'throttled' or 'error'."""
+        async with self._condition:
+            self.in_flight -= 1
+            if outcome == 'success':
+                self.limit = min(self.max_limit, self.limit + 1 / max(self.limit, 1))
+            elif outcome == 'throttled':
+                self.throttled += 1
+                self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+                if retry_after:
+                    self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+                logger.warning(f"Provider throttled request; concurrency limit now {int(self.limit)}")
+            else:
+                self.errors += 1
+            self._condition.notify_all()
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Full-jitter exponential backoff delay for retry `attempt`, never shorter than `retry_after`."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        return max(delay, retry_after or 0)
+
+    def stats(self) -> Dict:
+        """Return the controller state for monitoring."""
+        now = time.monotonic()
+        return {
+            'concurrency_limit': int(self.limit),
+            'in_flight': self.in_flight,
+            'queue_depth': len(self._waiters),
+            'tokens': round(min(self.burst, self.tokens + (now - self._refilled_at) * self.rate), 2),
+            'blocked_for': round(max(0.0, self.blocked_until - now), 2),
+            'admitted': self.admitted,
+            'throttled': self.throttled,
+            'errors': self.errors,
+            'rejections': self.rejections
+        }
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Extract a Retry-After delay in seconds from a provider error, if present."""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    value = headers.get('retry-after') or headers.get('Retry-After')
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
@@ -0,0 +1,178 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class ResponseCache:
+    """Content-addressed cache for completion text.
+
+    Keys are a SHA-256 digest of the model, the prompt messages and the
+    sampling parameters. Entries live in an in-memory LRU tier bounded by
+    `max_bytes` and, when `db_path` is set, in an SQLite tier that survives
+    restarts. Both tiers expire entries after `ttl` seconds; expired rows
+    are pruned from the database at most once every `prune_interval`
+    seconds. `aget`/`aset` serve the memory tier inline and run SQLite
+    access on a dedicated thread, so disk I/O never blocks an event loop.
+    """
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024, ttl: float = 3600,
+                 db_path: Optional[str] = None, prune_interval: float = 300):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.db_path = db_path
+        self.prune_interval = prune_interval
+
+        self._entries = OrderedDict()  # key -> (value, stored_at, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._db = None
+        self._db_lock = threading.Lock()
+        self._db_executor = None
+        self._pruned_at = 0.0
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_by_stored_at ON responses (stored_at)")
+            self._db.commit()
+            self._db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='response-cache')
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict[str, str]], params: Dict) -> str:
+        """Build the cache key for a completion request."""
+        payload = json.dumps(
+            {'model': model, 'messages': messages, 'params': params},
+            sort_keys=True, separators=(',', ':')
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value for `key`, or None on a miss."""
+        now = time.time()
+        value = self._get_memory(key, now)
+        return value if value is not None else self._get_disk(key, now)
+
+    async def aget(self, key: str) -> Optional[str]:
+        """Like `get`, reading the SQLite tier off the event loop."""
+        now = time.time()
+        value = self._get_memory(key, now)
+        if value is not None or self._db is None:
+            return value if value is not None else self._get_disk(key, now)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._db_executor, self._get_disk, key, now)
+
+    def set(self, key: str, value: str):
+        """Store `value` under `key` in every tier."""
+        stored_at = time.time()
+        with self._lock:
+            self._insert(key, value, stored_at)
+        if self._db is not None:
+            self._set_disk(key, value, stored_at)
+
+    async def aset(self, key: str, value: str):
+        """Like `set`, writing the SQLite tier off the event loop."""
+        stored_at = time.time()
+        with self._lock:
+            self._insert(key, value, stored_at)
+        if self._db is not None:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self._db_executor, self._set_disk, key, value, stored_at)
+
+    def clear(self):
+        """Drop every cached entry."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def _get_memory(self, key: str, now: float) -> Optional[str]:
+        """Return the memory-tier value for `key`, counting only hits."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, stored_at, size = entry
+            if now - stored_at <= self.ttl:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return value
+            self._remove(key)
+            return None
+
+    def _get_disk(self, key: str, now: float) -> Optional[str]:
+        """Return the SQLite-tier value for `key`, promoting it to memory; counts the hit or the miss."""
+        row = None
+        if self._db is not None:
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT value, stored_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+        with self._lock:
+            if row is not None and now - row[1] <= self.ttl:
+                self._insert(key, row[0], row[1])
+                self.disk_hits += 1
+                return row[0]
+            self.misses += 1
+            return None
+
+    def _set_disk(self, key: str, value: str, stored_at: float):
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, stored_at) VALUES (?, ?, ?)",
+                (key, value, stored_at)
+            )
+            if stored_at - self._pruned_at >= self.prune_interval:
+                self._db.execute("DELETE FROM responses WHERE stored_at < ?", (stored_at - self.ttl,))
+                self._pruned_at = stored_at
+            self._db.commit()
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters and memory usage."""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0
+            }
+
+    def _insert(self, key: str, value: str, stored_at: float):
+        size = len(key) + len(value.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (value, stored_at, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: str):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
@@ -0,0 +1,158 @@
+import re
+import threading
+import time
+import zlib
+import logging
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+class HashingVectorizer:
+    """Embed text as an L2-normalised bag of hashed word unigrams and bigrams.
+
+    Features are hashed with CRC32 into `n_features` buckets with a hash
+    derived sign, so embeddings are stable across processes and need no
+    fitted vocabulary. Counts are damped with log1p so repeated filler
+    words do not dominate.
+    """
+
+    def __init__(self, n_features: int = 4096):
+        self.n_features = n_features
+
+    def transform(self, text: str) -> 'np.ndarray':
+        import numpy as np  # Deferred so importing the cache does not load NumPy at startup
+
+        tokens = _TOKEN_RE.findall(text.lower())
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        vector = np.zeros(self.n_features, dtype=np.float32)
+        if not features:
+            return vector
+
+        hashes = np.fromiter((zlib.crc32(f.encode('utf-8')) for f in features), dtype=np.uint32, count=len(features))
+        signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+        np.add.at(vector, (hashes % self.n_features).astype(np.intp), signs)
+        vector = np.sign(vector) * np.log1p(np.abs(vector))
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+class SemanticCache:
+    """Cache values by text similarity rather than exact match.
+
+    Entries are stored as rows of a preallocated matrix, so a lookup is one
+    matrix-vector product over all live entries. A lookup hits when the best
+    cosine similarity is at least `threshold`. An entry stored with a
+    `guard` is only considered by lookups passing an equal guard, for the
+    part of a key that must match exactly however similar the rest is.
+    Entries expire after `ttl`
+    seconds; when the cache is full the least recently used entry
+    (`eviction='lru'`) or the oldest one (`eviction='fifo'`) is replaced.
+    """
+
+    def __init__(self, vectorizer: Optional[HashingVectorizer] = None, capacity: int = 512,
+                 threshold: float = 0.92, ttl: float = 1800, eviction: str = 'lru'):
+        if eviction not in ('lru', 'fifo'):
+            raise ValueError(f"Unknown eviction policy: {eviction}")
+        self.vectorizer = vectorizer or HashingVectorizer()
+        self.capacity = capacity
+        self.threshold = threshold
+        self.ttl = ttl
+        self.eviction = eviction
+
+        # Allocated on first use so an idle cache costs neither memory nor the NumPy import
+        self._vectors = None
+        self._created = None
+        self._used = None
+        self._values = [None] * capacity
+        self._guards = [None] * capacity
+        self._size = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.best_similarity = 0.0  # Similarity of the most recent lookup, hit or miss
+
+    def _allocate(self):
+        import numpy as np
+
+        self._vectors = np.zeros((self.capacity, self.vectorizer.n_features), dtype=np.float32)
+        self._created = np.full(self.capacity, -np.inf)
+        self._used = np.full(self.capacity, -np.inf)
+
+    def get(self, text: str, guard: Optional[str] = None) -> Optional[Any]:
+        """Return the value stored for the most similar text with the same `guard`, or None below the threshold."""
+        import numpy as np
+
+        vector = self.vectorizer.transform(text)
+        now = time.monotonic()
+        with self._lock:
+            if self._size:
+                similarities = self._vectors[:self._size] @ vector
+                similarities[self._created[:self._size] < now - self.ttl] = -1.0
+                mismatched = np.fromiter((stored != guard for stored in self._guards[:self._size]),
+                                         dtype=bool, count=self._size)
+                similarities[mismatched] = -1.0
+                best = int(np.argmax(similarities))
+                self.best_similarity = float(similarities[best])
+                if self.best_similarity >= self.threshold:
+                    self._used[best] = now
+                    self.hits += 1
+                    return self._values[best]
+            self.misses += 1
+            return None
+
+    def set(self, text: str, value: Any, guard: Optional[str] = None):
+        """Store `value` under the embedding of `text`, matched only by lookups with the same `guard`."""
+        import numpy as np
+
+        vector = self.vectorizer.transform(text)
+        if not vector.any():
+            return
+        now = time.monotonic()
+        with self._lock:
+            if self._vectors is None:
+                self._allocate()
+            expired = np.flatnonzero(self._created[:self._size] < now - self.ttl)
+            if self._size < self.capacity:
+                slot = self._size
+                self._size += 1
+            elif expired.size:
+                slot = int(expired[0])
+            else:
+                slot = int(np.argmin(self._used if self.eviction == 'lru' else self._created))
+                self.evictions += 1
+            self._vectors[slot] = vector
+            self._created[slot] = now
+            self._used[slot] = now
+            self._values[slot] = value
+            self._guards[slot] = guard
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            if self._vectors is not None:
+                self._created[:] = -float('inf')
+                self._used[:] = -float('inf')
+            self._values = [None] * self.capacity
+            self._guards = [None] * self.capacity
+            self._size = 0
+
+    def stats(self) -> Dict:
+        """Return hit rate, size and eviction counts for monitoring."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': self._size,
+                'capacity': self.capacity,
+                'threshold': self.threshold,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'last_similarity': round(self.best_similarity, 4)
+            }
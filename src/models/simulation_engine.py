@@ -1,3 +1,5 @@
+import os
+import sys
 import time
 import threading
 import datetime
@@ -5,7 +7,15 @@ import json
 import random
 from models import Session
 from extensions import db
-from ai_agents import simulate_student_turn, simulate_educator_turn, get_mini_ai_feedback
+
+# Import the agents through the package so the engine shares their module state
+# (client, caches, scheduler) and its history passes their RenderedHistory checks
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../'))
+from src.models.ai_agents import (
+    simulate_student_turn, simulate_educator_turn, get_mini_ai_feedback, reusable_feedback,
+    detect_risk, is_end_of_conversation
+)
+from src.models.history import RenderedHistory
 
 class SimulationEngine:
     def __init__(self, session_id, socketio, app):
@@ -13,7 +23,7 @@ class SimulationEngine:
         self.socketio = socketio
         self.app = app
         self.running = False
-        self.conversation_history = []
+        self.conversation_history = RenderedHistory()
         self.lock = threading.Lock()
         self.current_feedback = None
         self.client_connected = False  # New flag to track connection
@@ -95,6 +105,9 @@ class SimulationEngine:
             # Send via WebSocket
             self.socketio.emit('session_update', message_data, room=self.session_id)
             
+            # Flag risk phrases right away instead of waiting for the Mini AI's warning signs
+            self._send_risk_signals(student_message)
+            
             # Get feedback from Mini AI
             self._get_and_send_feedback()
             
@@ -150,8 +163,25 @@ class SimulationEngine:
             traceback.print_exc()
             raise
     
+    def _send_risk_signals(self, message):
+        """Send any risk phrases found in a student message via WebSocket."""
+        signals = detect_risk(message)
+        if not signals:
+            return
+        risk_data = {
+            "session_id": self.session_id,
+            "type": "risk",
+            "signals": signals,
+            "timestamp": datetime.datetime.utcnow().isoformat()
+        }
+        self.socketio.emit('session_update', risk_data, room=self.session_id)
+    
     def _get_and_send_feedback(self):
         """Get feedback from Mini AI and send it to the frontend."""
+        # Keep the current suggestions when this turn is not worth a new analysis
+        if reusable_feedback(self.conversation_history) is not None:
+            return
+        
         # Get feedback based on the latest conversation
         feedback = get_mini_ai_feedback(self.conversation_history)
         self.current_feedback = feedback
@@ -201,20 +231,7 @@ class SimulationEngine:
     
     def _check_end_condition(self, message):
         """Check if the message indicates the conversation should end."""
-        end_phrases = [
-            "i feel better", 
-            "thanks for talking", 
-            "that helps a lot",
-            "i should go now",
-            "thank you for your help"
-        ]
-        
-        message_lower = message.lower()
-        for phrase in end_phrases:
-            if phrase in message_lower:
-                return True
-        
-        return False
+        return is_end_of_conversation(message)
     
     def _end_simulation(self):
         """End the simulation and update the database."""
@@ -0,0 +1,116 @@
+import re
+import threading
+import logging
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+def _normalize(phrase: str) -> str:
+    return ' '.join(phrase.lower().replace('’', "'").split())
+
+def _trie_pattern(node: Dict) -> str:
+    """Render a character trie as a regex with shared prefixes factored out."""
+    end = '' in node
+    branches = []
+    for char in sorted(c for c in node if c):
+        if char == ' ':
+            token = r'\s+'
+        elif char == "'":
+            token = "['’]"
+        else:
+            token = re.escape(char)
+        branches.append(token + _trie_pattern(node[char]))
+    if not branches:
+        return ''
+    body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    # Optional tail: greedy, so the longest phrase sharing this prefix is tried first
+    return f'(?:{body})?' if end else body
+
+class PhraseScanner:
+    """Find every configured phrase in a message in a single pass.
+
+    All phrases from all sets are compiled into one regex whose
+    alternation is factored into a trie and matched against the lowercased
+    message, so at each position the engine follows at most one branch per
+    character instead of trying every phrase in turn. Phrases match on
+    word boundaries, tolerate extra whitespace and curly apostrophes, and a
+    phrase listed in several sets is reported once per set. Results for
+    recently scanned texts are memoised so the same message is only
+    scanned once however many callers ask about it.
+    """
+
+    def __init__(self, phrase_sets: Dict[str, Sequence[str]], cache_size: int = 1024):
+        self.phrase_sets = {name: list(phrases) for name, phrases in phrase_sets.items()}
+        self._categories = {}  # normalized phrase -> categories listing it
+        trie = {}
+        for name, phrases in self.phrase_sets.items():
+            for phrase in phrases:
+                key = _normalize(phrase)
+                if not key:
+                    continue
+                categories = self._categories.setdefault(key, [])
+                if name not in categories:
+                    categories.append(name)
+                node = trie
+                for char in key:
+                    node = node.setdefault(char, {})
+                node[''] = True
+
+        pattern = r'(?<!\w)(?:' + _trie_pattern(trie) + r')(?!\w)' if trie else None
+        # Matching lowercased text without IGNORECASE is about twice as fast; the
+        # case-insensitive pattern is only needed when lowercasing shifts offsets
+        self._pattern = re.compile(pattern) if pattern else None
+        self._pattern_ignorecase = re.compile(pattern, re.IGNORECASE) if pattern else None
+        self._scan_cached = lru_cache(maxsize=cache_size)(self._scan)
+        self._lock = threading.Lock()
+
+        self.scans = 0
+        self.matches = {name: 0 for name in self.phrase_sets}
+
+    def _scan(self, text: str) -> Tuple[Dict, ...]:
+        if self._pattern is None:
+            return ()
+        lowered = text.lower()
+        if len(lowered) == len(text):
+            matches = self._pattern.finditer(lowered)
+        else:
+            matches = self._pattern_ignorecase.finditer(text)
+        found = []
+        for match in matches:
+            phrase = _normalize(match.group())
+            for category in self._categories.get(phrase, ()):
+                found.append({
+                    'category': category,
+                    'phrase': phrase,
+                    'start': match.start(),
+                    'end': match.end()
+                })
+        with self._lock:
+            self.scans += 1
+            for item in found:
+                self.matches[item['category']] += 1
+        return tuple(found)
+
+    def scan(self, text: str, categories: Optional[Iterable[str]] = None) -> List[Dict]:
+        """Return every phrase match in `text`, optionally limited to `categories`, in text order."""
+        found = self._scan_cached(text or '')
+        if categories is None:
+            return [dict(item) for item in found]
+        wanted = set(categories)
+        return [dict(item) for item in found if item['category'] in wanted]
+
+    def contains(self, text: str, categories: Optional[Iterable[str]] = None) -> bool:
+        """Whether `text` contains any phrase from `categories` (all sets when None)."""
+        return bool(self.scan(text, categories))
+
+    def stats(self) -> Dict:
+        """Return scan counts, memo hits and matches per phrase set."""
+        info = self._scan_cached.cache_info()
+        with self._lock:
+            return {
+                'scans': self.scans,
+                'memo_hits': info.hits,
+                'matches': dict(self.matches),
+                'phrases': len(self._categories)
+            }
@@ -0,0 +1,98 @@
+import threading
+from typing import Dict, List, Optional
+
+from src.models.history import RenderedHistory
+from src.models.llm_client import CallMetrics
+
+USAGE_FIELDS = ('calls', 'errors', 'cache_hits', 'prompt_tokens', 'completion_tokens',
+                'queue_wait', 'provider_latency', 'wall_time', 'retries', 'hedges')
+
+def _empty_totals() -> Dict:
+    return {field: 0 for field in USAGE_FIELDS}
+
+def _add(totals: Dict, metrics: CallMetrics, wall_time: float, success: bool):
+    totals['calls'] += 1
+    totals['errors'] += 0 if success else 1
+    totals['cache_hits'] += 1 if metrics.cached else 0
+    totals['prompt_tokens'] += metrics.prompt_tokens
+    totals['completion_tokens'] += metrics.completion_tokens
+    totals['queue_wait'] += metrics.queue_wait
+    totals['provider_latency'] += metrics.provider_latency
+    totals['wall_time'] += wall_time
+    totals['retries'] += metrics.retries
+    totals['hedges'] += metrics.hedges
+
+def _report(by_role: Dict[str, Dict]) -> Dict:
+    """Round the per-role totals, add averages and an overall total."""
+    overall = _empty_totals()
+    roles = {}
+    for role, totals in by_role.items():
+        for field in USAGE_FIELDS:
+            overall[field] += totals[field]
+        roles[role] = _summarize(totals)
+    return {'roles': roles, 'total': _summarize(overall)}
+
+def _summarize(totals: Dict) -> Dict:
+    calls = totals['calls'] or 1
+    summary = {field: round(value, 3) if isinstance(value, float) else value for field, value in totals.items()}
+    summary['total_tokens'] = totals['prompt_tokens'] + totals['completion_tokens']
+    summary['avg_prompt_tokens'] = round(totals['prompt_tokens'] / calls, 1)
+    summary['avg_queue_wait'] = round(totals['queue_wait'] / calls, 3)
+    summary['avg_provider_latency'] = round(totals['provider_latency'] / calls, 3)
+    summary['avg_wall_time'] = round(totals['wall_time'] / calls, 3)
+    return summary
+
+class UsageLedger:
+    """Token and latency totals per role for one conversation."""
+
+    def __init__(self):
+        self.by_role = {}
+        self.lock = threading.Lock()
+        self.revision = 0  # Calls recorded; changes whenever the totals do
+
+    def totals(self) -> Dict:
+        """Return per-role and overall totals with averages."""
+        with self.lock:
+            return _report({role: dict(totals) for role, totals in self.by_role.items()})
+
+class UsageTracker:
+    """Roll up the cost and timing of every LLM call per conversation, per role and per model.
+
+    Each logical call (including its retries, hedges and failovers) is
+    recorded once. Conversation totals live in a `UsageLedger` on the
+    `RenderedHistory`, so snapshots taken for background jobs add to the
+    same ledger; process-wide totals are kept here.
+    """
+
+    def __init__(self):
+        self._by_role = {}
+        self._by_model = {}
+        self._lock = threading.Lock()
+        self.revision = 0  # Calls recorded across all conversations
+
+    def ledger_for(self, history) -> Optional[UsageLedger]:
+        """Return the conversation ledger of `history`, creating it on first use."""
+        if not isinstance(history, RenderedHistory):
+            return None
+        return history.attach('usage_ledger', UsageLedger)
+
+    def record(self, history: Optional[List[Dict[str, str]]], role: str, model: str,
+               metrics: CallMetrics, wall_time: float, success: bool = True):
+        """Record one logical call made for `role` on behalf of `history` (None for no conversation)."""
+        with self._lock:
+            _add(self._by_role.setdefault(role, _empty_totals()), metrics, wall_time, success)
+            _add(self._by_model.setdefault(model, _empty_totals()), metrics, wall_time, success)
+            self.revision += 1
+
+        ledger = self.ledger_for(history)
+        if ledger is not None:
+            with ledger.lock:
+                _add(ledger.by_role.setdefault(role, _empty_totals()), metrics, wall_time, success)
+                ledger.revision += 1
+
+    def stats(self) -> Dict:
+        """Return process-wide totals per role and per model."""
+        with self._lock:
+            report = _report({role: dict(totals) for role, totals in self._by_role.items()})
+            report['models'] = {model: _summarize(dict(totals)) for model, totals in self._by_model.items()}
+            return report
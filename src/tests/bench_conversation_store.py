@@ -0,0 +1,126 @@
+"""
+Benchmark for the conversation stores.
+
+Measures the per-request overhead each store adds to a message turn (look
+the conversation up, append the educator message, append the student reply)
+and then runs several worker processes appending to the same conversations
+through the SQLite store, retrying on conflicts, to check that optimistic
+concurrency neither loses nor duplicates messages.
+
+Usage:
+    python src/tests/bench_conversation_store.py [--requests 2000] [--workers 4]
+"""
+
+import argparse
+import datetime
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../'))
+from src.api.conversation_store import ConversationConflict, create_conversation_store
+from src.models.history import RenderedHistory
+
+MESSAGE_TEXT = "*fidgets with sleeve* Um, I've been feeling really overwhelmed lately... Like, I can't focus in class anymore."
+
+class Conversation:
+    """Minimal stand-in for the server's conversation object."""
+
+    def __init__(self, conversation_id, created_at=None):
+        self.conversation_id = conversation_id
+        self.history = RenderedHistory()
+        self.created_at = created_at or datetime.datetime.utcnow()
+        self.version = 0
+
+def message(speaker):
+    return {
+        'id': str(uuid.uuid4()),
+        'speaker': speaker,
+        'text': MESSAGE_TEXT,
+        'timestamp': datetime.datetime.utcnow().isoformat()
+    }
+
+def turn(store, conversation_id):
+    """One message request: look the conversation up and append both sides of the turn."""
+    conversation = store.get(conversation_id)
+    version = conversation.version
+    store.append(conversation, message('educator'), version)
+    store.append(conversation, message('student'), version + 1)
+
+def measure(store, requests, conversations):
+    """Return the mean seconds per message request over `conversations` conversations."""
+    ids = [str(uuid.uuid4()) for _ in range(conversations)]
+    for conversation_id in ids:
+        store.create(conversation_id)
+    start = time.perf_counter()
+    for i in range(requests):
+        turn(store, ids[i % conversations])
+    return (time.perf_counter() - start) / requests
+
+def contend(path, conversation_ids, appends, results):
+    """Worker process: append `appends` messages to shared conversations, retrying on conflicts."""
+    store = create_conversation_store('sqlite', Conversation, path=path)
+    conflicts = 0
+    for i in range(appends):
+        conversation_id = conversation_ids[i % len(conversation_ids)]
+        while True:
+            conversation = store.get(conversation_id)
+            try:
+                store.append(conversation, message('student'), conversation.version)
+                break
+            except ConversationConflict:
+                conflicts += 1
+    results.put(conflicts)
+
+def main():
+    parser = argparse.ArgumentParser(description="Conversation store benchmark")
+    parser.add_argument("--requests", type=int, default=2000, help="Message requests per store")
+    parser.add_argument("--conversations", type=int, default=50, help="Conversations the requests are spread over")
+    parser.add_argument("--workers", type=int, default=4, help="Processes in the contention run")
+    parser.add_argument("--appends", type=int, default=400, help="Appends per process in the contention run")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'conversations.db')
+        stores = [
+            create_conversation_store('memory', Conversation),
+            create_conversation_store('sqlite', Conversation, path=path)
+        ]
+
+        print(f"{'store':>8} {'us/request':>12}")
+        for store in stores:
+            per_request = measure(store, args.requests, args.conversations)
+            print(f"{store.name:>8} {per_request * 1e6:>12.1f}")
+
+        # Several processes appending to the same few conversations
+        setup = create_conversation_store('sqlite', Conversation, path=path)
+        shared = [str(uuid.uuid4()) for _ in range(2)]
+        for conversation_id in shared:
+            setup.create(conversation_id)
+
+        results = multiprocessing.Queue()
+        workers = [
+            multiprocessing.Process(target=contend, args=(path, shared, args.appends, results))
+            for _ in range(args.workers)
+        ]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        conflicts = sum(results.get() for _ in workers)
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+
+        stored = sum(len(setup.get(conversation_id).history) for conversation_id in shared)
+        expected = args.workers * args.appends
+        print()
+        print(f"Contention: {args.workers} processes, {expected} appends in {elapsed:.2f} s, {conflicts} conflicts retried")
+        print(f"Messages stored: {stored} of {expected} ({'OK' if stored == expected else 'MISMATCH'})")
+        if stored != expected:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
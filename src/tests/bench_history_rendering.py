@@ -0,0 +1,80 @@
+"""
+Micro-benchmark for conversation history rendering.
+
+Simulates a session turn by turn and measures the formatting work done per
+turn by the legacy full re-render and by the incremental RenderedHistory.
+Each turn renders the history twice, once for the student prompt and once
+for the feedback prompt, as the simulation engine does.
+
+Usage:
+    python src/tests/bench_history_rendering.py [--turns 400] [--repeat 5]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../'))
+from src.models.history import RenderedHistory
+
+MESSAGE_TEXT = "*fidgets with sleeve* Um, I've been feeling really overwhelmed lately... Like, I can't focus in class anymore."
+
+def legacy_format(history):
+    """The original format_conversation_history implementation."""
+    if not history:
+        return "No previous conversation."
+
+    formatted = []
+    for msg in history:
+        speaker = msg.get("speaker", "unknown").title()
+        text = msg.get("text", "")
+        formatted.append(f"{speaker}: {text}")
+
+    return "\n".join(formatted)
+
+def run_session(history, render, turns):
+    """Return the seconds spent appending and rendering for every turn."""
+    timings = []
+    for turn in range(turns):
+        speaker = 'student' if turn % 2 == 0 else 'educator'
+        start = time.perf_counter()
+        history.append({'speaker': speaker, 'text': MESSAGE_TEXT})
+        render(history)
+        render(history)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def best_of(repeat, history_factory, render, turns):
+    """Run the session `repeat` times and keep the fastest timing per turn."""
+    runs = [run_session(history_factory(), render, turns) for _ in range(repeat)]
+    return [min(run[turn] for run in runs) for turn in range(turns)]
+
+def growth(timings):
+    """Ratio of the mean per-turn cost in the last tenth of turns to the first tenth."""
+    window = max(1, len(timings) // 10)
+    first = sum(timings[:window]) / window
+    last = sum(timings[-window:]) / window
+    return last / first
+
+def main():
+    parser = argparse.ArgumentParser(description="History rendering micro-benchmark")
+    parser.add_argument("--turns", type=int, default=400, help="Messages per simulated session")
+    parser.add_argument("--repeat", type=int, default=5, help="Sessions per implementation")
+    args = parser.parse_args()
+
+    legacy = best_of(args.repeat, list, legacy_format, args.turns)
+    incremental = best_of(args.repeat, RenderedHistory, RenderedHistory.render, args.turns)
+
+    print(f"{'turns':>6} {'legacy us/turn':>16} {'incremental us/turn':>20}")
+    step = max(1, args.turns // 10)
+    for turn in range(step - 1, args.turns, step):
+        print(f"{turn + 1:>6} {legacy[turn] * 1e6:>16.1f} {incremental[turn] * 1e6:>20.1f}")
+
+    print()
+    print(f"Total legacy:      {sum(legacy) * 1e3:.2f} ms")
+    print(f"Total incremental: {sum(incremental) * 1e3:.2f} ms")
+    print(f"Per-turn growth (last/first tenth): legacy {growth(legacy):.1f}x, incremental {growth(incremental):.1f}x")
+
+if __name__ == "__main__":
+    main()
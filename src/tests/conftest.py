@@ -0,0 +1,46 @@
+"""
+Shared setup for the unit tests.
+
+The agent and API modules read their configuration when they are imported,
+so the environment is pinned here first: the offline mock LLM backend with
+no simulated latency, and a scratch working directory so logs, spilled
+conversations and databases never land in the source tree.
+
+Run from the repository root with:
+    python -m pytest -q src/tests
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+sys.path.insert(0, ROOT)
+
+os.environ.update({
+    'LLM_BACKEND': 'mock',
+    'MOCK_LATENCY_DISTRIBUTION': 'fixed',
+    'MOCK_LATENCY_MEDIAN': '0',
+    'MOCK_TOKENS_PER_SECOND': '100000',
+    'MOCK_ERROR_RATE': '0',
+    'MOCK_THROTTLE_RATE': '0',
+    'CONVERSATION_STORE': 'memory'
+})
+os.chdir(tempfile.mkdtemp(prefix='copilot-tests-'))
+
+# Scripts that drive a live server rather than unit tests
+collect_ignore = ['test_backend.py', 'test_client.py', 'simple_test.py']
+
+@pytest.fixture
+def server(monkeypatch):
+    """The API server module with the opener pool disabled, so tests control every LLM call."""
+    from src.api import server
+    monkeypatch.setattr(server.opener_pool, 'size', 0)
+    return server
+
+@pytest.fixture
+def api(server):
+    """Flask test client for the API server."""
+    return server.app.test_client()
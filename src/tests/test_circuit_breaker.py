@@ -0,0 +1,126 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.models.circuit_breaker import CircuitBreaker, CircuitOpenError
+from src.models.llm_backends import LLMBackend
+from src.models.llm_client import LLMClient
+from src.models.rate_limiter import AdaptiveLimiter, RateLimitExceeded
+
+def fail(breaker, calls, seconds=0.1):
+    for _ in range(calls):
+        breaker.allow()
+        breaker.record(False, seconds)
+
+def test_opens_at_the_error_rate_after_min_calls():
+    breaker = CircuitBreaker(window=10, min_calls=4, error_rate=0.5)
+    fail(breaker, 3)
+    assert breaker.state == 'closed'
+    fail(breaker, 1)
+    assert breaker.state == 'open'
+    with pytest.raises(CircuitOpenError) as raised:
+        breaker.allow()
+    assert 0 < raised.value.retry_after <= breaker.reset_timeout
+    assert breaker.stats()['rejections'] == 1
+
+def test_opens_on_slow_calls():
+    breaker = CircuitBreaker(min_calls=2, slow_call_seconds=1, slow_call_rate=0.5)
+    for _ in range(2):
+        breaker.allow()
+        breaker.record(True, 5)
+    assert breaker.state == 'open'
+
+def test_half_open_probes_close_the_breaker():
+    breaker = CircuitBreaker(min_calls=1, reset_timeout=0, half_open_probes=2)
+    fail(breaker, 1)
+    breaker.allow()
+    breaker.allow()
+    assert breaker.state == 'half_open'
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    breaker.record(True, 0.1)
+    breaker.record(True, 0.1)
+    assert breaker.state == 'closed'
+
+def test_failed_probe_reopens_the_breaker():
+    breaker = CircuitBreaker(min_calls=1, reset_timeout=0.05)
+    fail(breaker, 1)
+    time.sleep(0.06)
+    breaker.allow()
+    breaker.record(False, 0.1)
+    assert breaker.state == 'open'
+    assert breaker.trips == 2
+
+def test_check_rejects_without_admitting():
+    breaker = CircuitBreaker(min_calls=1, reset_timeout=60)
+    breaker.check()
+    fail(breaker, 1)
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+def test_check_does_not_take_a_probe():
+    breaker = CircuitBreaker(reset_timeout=0, half_open_probes=1)
+    breaker._trip()
+    breaker.check()
+    breaker.allow()
+    assert breaker.state == 'half_open'
+
+def test_release_hands_back_a_probe():
+    breaker = CircuitBreaker(reset_timeout=0, half_open_probes=1)
+    breaker._trip()
+    breaker.allow()
+    breaker.release()
+    breaker.allow()
+    assert breaker.state == 'half_open'
+
+class SlowBackend(LLMBackend):
+    """Backend that answers every request after `seconds`."""
+
+    name = 'slow'
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    async def create(self, **params):
+        await asyncio.sleep(self.seconds)
+        message = SimpleNamespace(content="Reply.")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+def saturated_client(queue_timeout):
+    """Client whose limiter admits one call at a time, in front of a healthy provider."""
+    breaker = CircuitBreaker(window=20, min_calls=4, slow_call_seconds=0.2)
+    limiter = AdaptiveLimiter(rate=1000, burst=1000, initial_limit=1, min_limit=1, max_limit=1)
+    return LLMClient(SlowBackend(0.05), limiter=limiter, queue_timeout=queue_timeout, breaker=breaker)
+
+def test_limiter_saturation_does_not_open_the_breaker():
+    client = saturated_client(queue_timeout=0.1)
+    try:
+        async def burst():
+            return await asyncio.gather(*(client.acreate(model='m', messages=[]) for _ in range(20)),
+                                        return_exceptions=True)
+
+        results = client.run(burst())
+    finally:
+        client.close()
+
+    rejected = [result for result in results if isinstance(result, RateLimitExceeded)]
+    assert rejected and all(result.retry_after > 0 for result in rejected)
+    assert client.breaker.state == 'closed'
+    assert not any(failed for failed, slow in client.breaker._outcomes)
+
+def test_queue_wait_does_not_count_as_a_slow_call():
+    client = saturated_client(queue_timeout=5)
+    try:
+        async def burst():
+            return await asyncio.gather(*(client.acreate(model='m', messages=[]) for _ in range(8)))
+
+        client.run(burst())
+    finally:
+        client.close()
+
+    # The last calls queued for far longer than the slow-call threshold, but the provider answered each in 50ms
+    assert client.breaker.state == 'closed'
+    assert len(client.breaker._outcomes) == 8
+    assert not any(slow for failed, slow in client.breaker._outcomes)
@@ -0,0 +1,24 @@
+import time
+
+from src.models.context_window import ContextManager
+from src.models.history import RenderedHistory
+
+def wait_for_summary(state, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and (state.pending or not state.summarized):
+        time.sleep(0.01)
+
+def test_summary_is_requested_for_the_conversation():
+    calls = []
+
+    def summarize(summary, lines, history):
+        calls.append((lines, history))
+        return f"{len(lines)} lines"
+
+    manager = ContextManager(summarize, budgets={}, verbatim_turns=2)
+    history = RenderedHistory({'speaker': 'student', 'text': f"Line {i}."} for i in range(5))
+    manager.render(history, 'student')
+    wait_for_summary(history.context_state)
+
+    assert calls == [(history.lines()[:3], history)]
+    assert "Summary of earlier conversation: 3 lines" in manager.render(history, 'student')
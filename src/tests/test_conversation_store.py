@@ -0,0 +1,160 @@
+import pytest
+
+from src.api.conversation_store import ConversationConflict, InMemoryConversationStore, SQLiteConversationStore
+from src.models.history import RenderedHistory
+
+class Conversation:
+    def __init__(self, conversation_id, created_at=None):
+        self.conversation_id = conversation_id
+        self.created_at = created_at
+        self.history = RenderedHistory()
+        self.version = 0
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path):
+    if request.param == 'memory':
+        return InMemoryConversationStore(Conversation, spill_dir=str(tmp_path / 'spill'), max_resident=1)
+    return SQLiteConversationStore(Conversation, path=str(tmp_path / 'conversations.db'))
+
+def test_exists(store):
+    store.create('a')
+    assert store.exists('a')
+    assert 'a' in store
+    assert not store.exists('missing')
+
+    store.delete('a')
+    assert not store.exists('a')
+
+def test_exists_does_not_load_spilled_conversations(tmp_path):
+    store = InMemoryConversationStore(Conversation, spill_dir=str(tmp_path), max_resident=1)
+    store.create('a')
+    store.create('b')
+    assert store.resident('a') is None
+
+    assert store.exists('a')
+    assert store.resident('a') is None
+    assert store.rehydrations == 0
+
+def test_spill_dir_is_created_on_first_spill(tmp_path):
+    spill_dir = tmp_path / 'spill'
+    store = InMemoryConversationStore(Conversation, spill_dir=str(spill_dir), max_resident=1)
+    store.create('a')
+    assert not spill_dir.exists()
+
+    store.create('b')
+    assert (spill_dir / 'a.json').exists()
+    assert store.resident_conversations() == [store.resident('b')]
+
+def add(store, conversation, text, expected_version=None):
+    return store.append(conversation, {'speaker': 'student', 'text': text}, expected_version)
+
+def test_append_is_compare_and_set(store):
+    conversation = store.create('a')
+    assert add(store, conversation, "one", expected_version=0) == 1
+    with pytest.raises(ConversationConflict) as raised:
+        add(store, conversation, "stale", expected_version=0)
+    assert (raised.value.expected, raised.value.actual) == (0, 1)
+    assert store.stats()['conflicts'] == 1
+
+def test_sqlite_workers_see_each_others_appends(tmp_path):
+    path = str(tmp_path / 'conversations.db')
+    first = SQLiteConversationStore(Conversation, path=path)
+    second = SQLiteConversationStore(Conversation, path=path)
+    add(first, first.create('a'), "one")
+
+    theirs = second.get('a')
+    add(second, theirs, "two")
+    mine = first.get('a')
+    assert [message['text'] for message in mine.history] == ["one", "two"]
+    with pytest.raises(ConversationConflict):
+        add(second, second.resident('a'), "stale", expected_version=1)
+
+def test_spilled_conversation_is_rehydrated(tmp_path):
+    store = InMemoryConversationStore(Conversation, spill_dir=str(tmp_path), max_resident=1)
+    add(store, store.create('a'), "kept on disk")
+    store.create('b')
+
+    conversation = store.get('a')
+    assert [message['text'] for message in conversation.history] == ["kept on disk"]
+    assert conversation.version == 1
+    assert store.rehydrations == 1
+    assert len(store) == 2
+
+def test_spill_files_are_picked_up_by_a_new_store(tmp_path):
+    store = InMemoryConversationStore(Conversation, spill_dir=str(tmp_path), max_resident=1)
+    add(store, store.create('a'), "hello")
+    store.create('b')
+
+    restarted = InMemoryConversationStore(Conversation, spill_dir=str(tmp_path))
+    [summary], cursor = restarted.page()
+    assert summary['id'] == 'a'
+    assert summary['last_message']['text'] == "hello"
+
+def test_paging_walks_every_conversation_once(store):
+    for index in range(5):
+        conversation = store.create(f'c{index}')
+        for _ in range(index):
+            add(store, conversation, "message")
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = store.page('created', cursor=cursor, limit=2)
+        seen.extend(summary['id'] for summary in page)
+        if cursor is None:
+            break
+    assert sorted(seen) == [f'c{index}' for index in range(5)]
+    assert len(seen) == 5
+
+    page, _ = store.page('activity', limit=10, min_messages=3)
+    assert sorted(summary['id'] for summary in page) == ['c3', 'c4']
+
+def test_malformed_cursor_is_rejected(store):
+    with pytest.raises(ValueError):
+        store.page('created', cursor='not-a-cursor')
+
+def test_generation_changes_on_every_write(store):
+    tokens = [store.generation()]
+    conversation = store.create('a')
+    tokens.append(store.generation())
+    add(store, conversation, "hello")
+    tokens.append(store.generation())
+    assert store.generation() == tokens[-1]
+    store.delete('a')
+    tokens.append(store.generation())
+    assert len(set(tokens)) == 4
+
+def watched(store_class, tmp_path=None, **options):
+    """A store whose eviction and removal callbacks record the conversation ids they were given."""
+    events = []
+    store = store_class(Conversation, on_evict=lambda conversation_id: events.append(('evict', conversation_id)),
+                        on_remove=lambda conversation_id: events.append(('remove', conversation_id)), **options)
+    return store, events
+
+def test_callbacks_follow_spilling_expiry_and_deletion(tmp_path):
+    store, events = watched(InMemoryConversationStore, spill_dir=str(tmp_path), max_resident=1, spill_ttl=60)
+    store.create('a')
+    store.create('b')
+    assert events == [('evict', 'a')]
+
+    store._spilled['a'] -= 120
+    store.generation()
+    assert events[-1] == ('remove', 'a')
+
+    store.delete('b')
+    assert events[-1] == ('remove', 'b')
+
+def test_eviction_without_a_spill_dir_removes_the_conversation():
+    store, events = watched(InMemoryConversationStore, max_resident=1)
+    store.create('a')
+    store.create('b')
+    assert events == [('remove', 'a')]
+    assert not store.exists('a')
+    assert [summary['id'] for summary in store.page()[0]] == ['b']
+
+def test_sqlite_eviction_keeps_the_conversation(tmp_path):
+    store, events = watched(SQLiteConversationStore, path=str(tmp_path / 'conversations.db'), max_resident=1)
+    store.create('a')
+    store.create('b')
+    assert events == [('evict', 'a')]
+    store.delete('a')
+    assert events[-1] == ('remove', 'a')
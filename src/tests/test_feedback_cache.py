@@ -0,0 +1,61 @@
+import pytest
+
+from src.models import ai_agents
+from src.models.history import RenderedHistory
+from src.models.response_cache import ResponseCache
+from src.models.semantic_cache import HashingVectorizer, SemanticCache
+
+@pytest.fixture
+def caches(monkeypatch):
+    """Fresh, enabled feedback caches."""
+    semantic, responses = SemanticCache(HashingVectorizer()), ResponseCache()
+    monkeypatch.setattr(ai_agents, 'SEMANTIC_FEEDBACK_CACHE', True)
+    monkeypatch.setattr(ai_agents, 'CACHE_FEEDBACK_RESPONSES', True)
+    monkeypatch.setattr(ai_agents, 'semantic_cache', semantic)
+    monkeypatch.setattr(ai_agents, 'response_cache', responses)
+    return semantic, responses
+
+def conversation(text):
+    return RenderedHistory([
+        {'speaker': 'educator', 'text': "How have you been this week?"},
+        {'speaker': 'student', 'text': text}
+    ])
+
+def test_benign_history_is_served_from_the_semantic_cache(caches):
+    semantic, responses = caches
+    first = ai_agents.get_mini_ai_feedback(conversation("Exams have me stressed."))
+    second = ai_agents.get_mini_ai_feedback(conversation("Exams have me stressed."))
+    assert semantic.stats()['hits'] == 1
+    assert second['suggested_questions'] == first['suggested_questions']
+
+def test_risk_history_never_gets_a_cache_hit(caches):
+    semantic, responses = caches
+    benign = ai_agents.get_mini_ai_feedback(conversation("Exams have me stressed."))
+    semantic.set(ai_agents.format_conversation_history(conversation("I want to kill myself.")), benign)
+
+    for _ in range(2):
+        ai_agents.get_mini_ai_feedback(conversation("I want to kill myself."))
+
+    assert semantic.stats()['hits'] == 0
+    assert responses.stats()['memory_hits'] + responses.stats()['disk_hits'] == 0
+
+def test_new_disclosure_in_the_last_turn_is_never_served_from_the_cache(caches):
+    semantic, responses = caches
+    opening = [
+        {'speaker': 'student', 'text': "I've been feeling really stressed about school lately, especially with "
+                                       "exams coming up and all the homework piling on top of everything else."},
+        {'speaker': 'educator', 'text': "That sounds like a lot to carry. What has been weighing on you the most "
+                                        "over the last few weeks?"},
+        {'speaker': 'student', 'text': "Mostly the exams. I'm not sleeping well, I keep waking up at night "
+                                       "worrying that I'll fail and let everyone down."}
+    ]
+    ai_agents.get_mini_ai_feedback(RenderedHistory(opening))
+
+    disclosure = RenderedHistory(opening + [{'speaker': 'student', 'text': "My dad hits me when he's drunk."}])
+    # The phrase list does not catch it and the shared opening makes the histories look alike
+    assert not ai_agents.history_has_risk(disclosure)
+    assert semantic.vectorizer.transform(disclosure.render()) @ semantic.vectorizer.transform(
+        RenderedHistory(opening).render()) >= semantic.threshold
+
+    ai_agents.get_mini_ai_feedback(disclosure)
+    assert semantic.stats()['hits'] == 0
@@ -0,0 +1,52 @@
+import json
+
+from src.models.feedback_parser import FeedbackParser, render_analysis
+
+FALLBACK = ["What feels hardest right now?", "Who do you talk to?", "What helps you relax?"]
+
+FIELDS = {
+    'emotional_state': ["anxious", "tired"],
+    'key_concerns': ["Exam pressure"],
+    'suggested_questions': ["How are you sleeping?", "What worries you most?", "Who can you ask for help?"],
+    'warning_signs': ["Withdrawing from friends"]
+}
+
+def test_text_format_round_trips():
+    fields = FeedbackParser(FALLBACK).parse(render_analysis(FIELDS))
+    assert {field: fields[field] for field in FIELDS} == FIELDS
+    assert fields['repaired'] is False
+
+def test_markdown_headers_are_tolerated():
+    text = "**Emotional State:** anxious, tired\n## Suggested Questions\n- How are you?\n- Why?\n* What next?"
+    fields = FeedbackParser(FALLBACK).parse(text)
+    assert fields['emotional_state'] == ["anxious", "tired"]
+    assert fields['suggested_questions'] == ["How are you?", "Why?", "What next?"]
+
+def test_structured_json_is_decoded():
+    parser = FeedbackParser(FALLBACK)
+    fields = parser.parse(json.dumps(FIELDS), structured=True)
+    assert fields['key_concerns'] == ["Exam pressure"]
+    assert fields['repaired'] is False
+    assert parser.stats()['structured'] == 1
+
+def test_truncated_json_is_repaired():
+    # Cut off at max_tokens in the middle of the last warning sign
+    text = json.dumps(FIELDS)[:-10]
+    parser = FeedbackParser(FALLBACK)
+    fields = parser.parse(text, structured=True)
+    assert fields['emotional_state'] == ["anxious", "tired"]
+    assert fields['warning_signs'] == ["Withdrawing from"]
+    assert fields['repaired'] is True
+    assert parser.stats()['json_repaired'] == 1
+
+def test_missing_questions_are_padded_from_the_fallbacks():
+    fields = FeedbackParser(FALLBACK).parse("1. Emotional State:\nanxious\n3. Suggested Questions:\n1. How are you?",
+                                            offset=1)
+    assert fields['suggested_questions'] == ["How are you?", FALLBACK[1], FALLBACK[2]]
+    assert fields['repaired'] is True
+
+def test_unparseable_response_counts_a_failure():
+    parser = FeedbackParser(FALLBACK)
+    fields = parser.parse("I'm sorry, I can't help with that.")
+    assert fields['suggested_questions'] == FALLBACK
+    assert parser.stats()['parse_failures'] == 1
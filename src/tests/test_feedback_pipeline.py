@@ -0,0 +1,92 @@
+import threading
+
+from src.api.feedback_pipeline import FeedbackPipeline
+from src.models import ai_agents
+from src.models.history import RenderedHistory
+
+def test_snapshot_shares_state_created_later():
+    history = RenderedHistory([{'speaker': 'student', 'text': "Hi."}])
+    snapshot = history.copy()
+    state = ai_agents.incremental_feedback._state_for(snapshot)
+    assert history.feedback_state is state
+
+    snapshot.append({'speaker': 'educator', 'text': "Hello."})
+    assert len(history) == 1
+
+def test_async_feedback_runs_delta_analyses(monkeypatch):
+    monkeypatch.setattr(ai_agents, 'SEMANTIC_FEEDBACK_CACHE', False)
+    pipeline = FeedbackPipeline(lambda history: ai_agents.get_mini_ai_feedback(history, use_cache=False))
+    history = RenderedHistory()
+    before = ai_agents.incremental_feedback.stats()['delta_analyses']
+    try:
+        sequence = 0
+        for turn in range(3):
+            history.append({'speaker': 'educator', 'text': f"Question {turn}?"})
+            history.append({'speaker': 'student', 'text': f"Answer {turn}."})
+            sequence = pipeline.submit('conversation-1', history)
+            assert pipeline.wait('conversation-1', since=sequence - 1, timeout=5)['status'] == 'ready'
+    finally:
+        pipeline.shutdown()
+
+    assert history.feedback_state is not None
+    assert history.feedback_state.analyzed == len(history)
+    assert ai_agents.incremental_feedback.stats()['delta_analyses'] >= before + 2
+
+def test_stale_results_never_replace_newer_ones():
+    release_first = threading.Event()
+
+    def feedback(history):
+        if len(history) == 1:
+            release_first.wait(2)
+        return {'covered': len(history)}
+
+    pipeline = FeedbackPipeline(feedback, max_workers=2)
+    try:
+        history = RenderedHistory([{'speaker': 'student', 'text': "Hi."}])
+        assert pipeline.submit('c', history) == 1
+        history.append({'speaker': 'educator', 'text': "Hello."})
+        assert pipeline.submit('c', history) == 2
+
+        assert pipeline.wait('c', since=0, timeout=2)['feedback'] == {'covered': 2}
+        release_first.set()
+        pipeline.shutdown(wait=True)
+        assert pipeline.latest('c')['sequence'] == 2
+    finally:
+        release_first.set()
+
+def test_wait_times_out_as_pending_and_discard_forgets_results():
+    pipeline = FeedbackPipeline(lambda history: {})
+    try:
+        result = pipeline.wait('unknown', timeout=0)
+        assert result == {'status': 'pending', 'sequence': 0, 'latest_sequence': 0}
+
+        assert pipeline.publish('c', {'suggested_questions': []}) == 1
+        assert pipeline.wait('c', since=0, timeout=0)['status'] == 'ready'
+        pipeline.discard('c')
+        assert pipeline.latest('c') is None
+    finally:
+        pipeline.shutdown()
+
+def test_failed_jobs_report_the_error():
+    def feedback(history):
+        raise RuntimeError("provider down")
+
+    pipeline = FeedbackPipeline(feedback)
+    try:
+        pipeline.submit('c', [])
+        result = pipeline.wait('c', timeout=2)
+    finally:
+        pipeline.shutdown()
+    assert result['status'] == 'error'
+    assert result['error'] == "provider down"
+
+def test_release_drops_the_result_but_keeps_the_sequence():
+    pipeline = FeedbackPipeline(lambda history: {})
+    try:
+        pipeline.publish('c', {'suggested_questions': []})
+        pipeline.release('c')
+        assert pipeline.latest('c') is None
+        assert pipeline.stats() == {'conversations': 1, 'results': 0}
+        assert pipeline.publish('c', {'suggested_questions': []}) == 2
+    finally:
+        pipeline.shutdown()
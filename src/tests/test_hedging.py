@@ -0,0 +1,60 @@
+import asyncio
+from types import SimpleNamespace
+
+from src.models.hedging import HedgePolicy, LatencyTracker
+from src.models.llm_backends import LLMBackend
+from src.models.llm_client import CallMetrics, LLMClient
+
+def test_percentile_needs_min_samples():
+    tracker = LatencyTracker(window=10)
+    for seconds in range(1, 11):
+        tracker.record('m', seconds)
+    assert tracker.percentile('m', 0.5) == 6
+    assert tracker.percentile('m', 0.95) == 10
+    assert tracker.percentile('m', 0.5, min_samples=11) is None
+    assert tracker.percentile('other', 0.5) is None
+
+def test_window_keeps_recent_samples():
+    tracker = LatencyTracker(window=3)
+    for seconds in (100, 1, 2, 3):
+        tracker.record('m', seconds)
+    assert tracker.percentile('m', 0.99) == 3
+
+def test_hedges_stay_within_budget():
+    policy = HedgePolicy(LatencyTracker(), max_ratio=0.25, min_samples=1)
+    granted = 0
+    for _ in range(8):
+        policy.delay_for('m')
+        granted += policy.try_hedge()
+    assert granted == 2
+    assert policy.stats()['budget_denials'] == 6
+
+class SlowFirstBackend(LLMBackend):
+    """Backend whose first request hangs and whose later requests answer at once."""
+
+    name = 'slow-first'
+
+    def __init__(self):
+        self.calls = 0
+
+    async def create(self, **params):
+        self.calls += 1
+        if self.calls == 1:
+            await asyncio.sleep(5)
+        message = SimpleNamespace(content=f"call {self.calls}")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+def test_hedge_wins_when_the_primary_is_slow():
+    tracker = LatencyTracker()
+    for _ in range(5):
+        tracker.record('m', 0.01)
+    client = LLMClient(SlowFirstBackend(), hedging=HedgePolicy(tracker, max_ratio=1.0, min_samples=5))
+    metrics = CallMetrics()
+    try:
+        response = client.run(client.acreate(model='m', messages=[], hedge=True, metrics=metrics))
+    finally:
+        client.close()
+
+    assert response.choices[0].message.content == "call 2"
+    assert metrics.hedges == 1
+    assert client.hedging.stats()['hedge_wins'] == 1
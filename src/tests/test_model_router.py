@@ -0,0 +1,101 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src.models import ai_agents
+from src.models.circuit_breaker import CircuitBreaker
+from src.models.hedging import LatencyTracker
+from src.models.history import RenderedHistory
+from src.models.llm_backends import LLMBackend, MockProviderError
+from src.models.llm_client import LLMClient
+from src.models.model_router import ModelRouter
+
+class ScriptedBackend(LLMBackend):
+    """Backend that raises the error scripted for a model and answers every other call."""
+
+    name = 'scripted'
+
+    def __init__(self, errors):
+        self.errors = errors
+        self.calls = []
+
+    async def create(self, **params):
+        model = params['model']
+        self.calls.append(model)
+        if model in self.errors:
+            raise self.errors[model]
+        message = SimpleNamespace(content=f"Reply from {model}.")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+@pytest.fixture
+def routed(monkeypatch):
+    """Point the agents at a scripted backend with a 'primary' and a 'fallback' student model."""
+    def install(errors):
+        backend = ScriptedBackend(errors)
+        client = LLMClient(backend, max_retries=0, breaker=CircuitBreaker(window=10, min_calls=4))
+        router = ModelRouter({'student': ['primary', 'fallback']}, client.latency, {'student': 5}, min_calls=100)
+        monkeypatch.setattr(ai_agents, 'llm_client', client)
+        monkeypatch.setattr(ai_agents, 'model_router', router)
+        clients.append(client)
+        return backend, client, router
+
+    clients = []
+    yield install
+    for client in clients:
+        client.close()
+
+def student_turn():
+    return ai_agents.simulate_student_turn([{'speaker': 'educator', 'text': "Hi."}], use_cache=False, hedge=False)
+
+def test_failover_counts_once_against_the_breaker(routed):
+    backend, client, router = routed({'primary': MockProviderError(500, "server error")})
+    for _ in range(12):
+        assert student_turn() == "Reply from fallback."
+
+    # The router prefers the fallback once it has measured it, so failovers stop before the turns do
+    assert router.failovers >= client.breaker.min_calls
+    assert client.breaker.state == 'closed'
+    assert not any(failed for failed, slow in client.breaker._outcomes)
+
+def test_request_errors_do_not_fail_over(routed):
+    backend, client, router = routed({'primary': MockProviderError(400, "bad request")})
+    with pytest.raises(MockProviderError):
+        student_turn()
+    assert backend.calls == ['primary']
+    assert router.failovers == 0
+
+def test_exhausted_candidates_count_as_one_failure(routed):
+    error = MockProviderError(503, "unavailable")
+    backend, client, router = routed({'primary': error, 'fallback': error})
+    with pytest.raises(MockProviderError):
+        student_turn()
+    assert backend.calls == ['primary', 'fallback']
+    assert list(client.breaker._outcomes) == [(True, False)]
+
+def test_router_prefers_the_first_candidate_until_measured():
+    router = ModelRouter({'student': ['a', 'b']}, LatencyTracker(), {'student': 5})
+    assert router.choose('student') == 'a'
+
+def test_router_picks_a_fast_model_over_a_slow_one():
+    tracker = LatencyTracker()
+    for _ in range(5):
+        tracker.record('a', 9)
+        tracker.record('b', 1)
+    router = ModelRouter({'student': ['a', 'b']}, tracker, {'student': 5})
+    assert router.choose('student') == 'b'
+
+def test_router_benches_failing_models():
+    router = ModelRouter({'student': ['a', 'b']}, LatencyTracker(), {'student': 5}, min_calls=2, cooldown=60)
+    router.record('a', False)
+    router.record('a', False)
+    assert router.choose('student') == 'b'
+    assert router.stats()['models']['a']['healthy'] is False
+
+def test_routes_are_sticky_per_conversation():
+    tracker = LatencyTracker()
+    router = ModelRouter({'student': ['a', 'b']}, tracker, {'student': 5})
+    history = RenderedHistory()
+    history.route_state = {'student': 'b'}
+    assert router.choose('student', history) == 'b'
+    assert router.choose('student', history.copy()) == 'b'
+    assert router.stats()['sticky_switches'] == 0
@@ -0,0 +1,88 @@
+import time
+
+from src.api.opener_pool import OpenerPool
+
+def feedback_for(history):
+    return {'suggested_questions': ['How are you?'], 'timestamp': time.time()}
+
+def degraded_feedback_for(history):
+    return {**feedback_for(history), 'degraded': True}
+
+def wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+def test_pool_fills_and_serves_each_opener_once():
+    pool = OpenerPool(lambda history: "Hi.", feedback_for, size=2, low_water=1, ttl=60)
+    try:
+        pool.start()
+        assert wait_until(lambda: pool.stats()['available'] == 2)
+        first, second = pool.take(), pool.take()
+        assert first is not second
+        assert first['feedback']['suggested_questions'] == ['How are you?']
+    finally:
+        pool.stop()
+
+    stats = pool.stats()
+    assert stats['served'] == 2
+    assert stats['generated'] >= 2
+    assert stats['refills'] >= 1
+
+def test_empty_pool_counts_a_miss():
+    pool = OpenerPool(lambda history: "Hi.", feedback_for, size=0)
+    assert pool.take() is None
+    assert pool.stats()['misses'] == 1
+
+def test_degraded_feedback_is_never_pooled():
+    pool = OpenerPool(lambda history: "Hi.", degraded_feedback_for, size=2, low_water=1, ttl=60, retry_delay=0.01)
+    try:
+        pool.take()
+        assert wait_until(lambda: pool.stats()['degraded'] >= 2)
+        assert pool.take() is None
+        assert pool.stats()['available'] == 0
+    finally:
+        pool.stop()
+
+def test_expired_openers_are_dropped():
+    pool = OpenerPool(lambda history: "Hi.", feedback_for, size=1, low_water=0, ttl=60)
+    pool._entries.append({'text': "Old.", 'feedback': feedback_for([]), 'created_at': time.time() - 120})
+    stats = pool.stats()
+    assert stats['available'] == 0
+    assert stats['expired'] == 1
+
+def test_health_reports_the_pool(api):
+    health = api.get('/health').get_json()
+    assert health['opener_pool']['size'] == 0
+    assert 'degraded' in health['opener_pool']
+
+def test_opener_usage_travels_with_the_entry(monkeypatch):
+    from src.models import ai_agents
+    monkeypatch.setattr(ai_agents, 'SEMANTIC_FEEDBACK_CACHE', False)
+
+    pool = OpenerPool(ai_agents.simulate_student_turn, ai_agents.get_mini_ai_feedback, size=0)
+    entry = pool._generate()
+    assert set(entry['history'].usage_ledger.totals()['roles']) == {'student', 'feedback'}
+
+def test_pooled_opener_state_seeds_the_conversation(api, server, monkeypatch):
+    from src.models import ai_agents
+    monkeypatch.setattr(ai_agents, 'SEMANTIC_FEEDBACK_CACHE', False)
+    monkeypatch.setattr(server, 'async_feedback', False)
+
+    pool = OpenerPool(ai_agents.simulate_student_turn, ai_agents.get_mini_ai_feedback, size=0)
+    entry = pool._generate()
+    monkeypatch.setattr(server.opener_pool, 'take', lambda: entry)
+
+    conversation_id = api.post('/api/conversations').get_json()['conversation_id']
+    history = server.conversation_store.get(conversation_id).history
+    assert history.feedback_state is entry['history'].feedback_state
+    assert history.route_state == entry['history'].route_state
+
+    # The first real turn builds on the opener's analysis instead of starting over
+    api.post(f'/api/conversations/{conversation_id}/message', json={'message': "What's on your mind?"})
+    fields, analyzed = ai_agents.incremental_feedback.plan(history)
+    assert fields is not None
+    assert analyzed == 1
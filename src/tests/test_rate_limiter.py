@@ -0,0 +1,72 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.models.rate_limiter import AdaptiveLimiter, RateLimitExceeded, retry_after_seconds
+
+def run(coro):
+    return asyncio.run(coro)
+
+def test_concurrency_limit_queues_and_rejects_at_the_deadline():
+    async def scenario():
+        limiter = AdaptiveLimiter(rate=100, burst=10, initial_limit=1)
+        await limiter.acquire()
+        with pytest.raises(RateLimitExceeded):
+            await limiter.acquire(deadline=time.monotonic() + 0.05)
+        await limiter.release('success')
+        await limiter.acquire(deadline=time.monotonic() + 0.05)
+        return limiter.stats()
+
+    stats = run(scenario())
+    assert stats['admitted'] == 2
+    assert stats['rejections'] == 1
+    assert stats['in_flight'] == 1
+
+def test_token_bucket_limits_the_rate():
+    async def scenario():
+        limiter = AdaptiveLimiter(rate=1, burst=2, initial_limit=10)
+        for _ in range(2):
+            await limiter.acquire()
+        with pytest.raises(RateLimitExceeded):
+            await limiter.acquire(deadline=time.monotonic() + 0.05)
+
+    run(scenario())
+
+def test_limit_grows_on_success_and_halves_on_throttling():
+    async def scenario():
+        limiter = AdaptiveLimiter(initial_limit=8, decrease_factor=0.5)
+        await limiter.acquire()
+        await limiter.release('success')
+        grown = limiter.limit
+        await limiter.acquire()
+        await limiter.release('throttled')
+        return grown, limiter
+
+    grown, limiter = run(scenario())
+    assert grown == pytest.approx(8 + 1 / 8)
+    assert limiter.limit == pytest.approx(grown / 2)
+    assert limiter.throttled == 1
+
+def test_retry_after_pauses_admission():
+    async def scenario():
+        limiter = AdaptiveLimiter(initial_limit=4)
+        await limiter.acquire()
+        await limiter.release('throttled', retry_after=60)
+        with pytest.raises(RateLimitExceeded):
+            await limiter.acquire(deadline=time.monotonic() + 0.05)
+        return limiter.stats()
+
+    assert run(scenario())['blocked_for'] > 59
+
+def test_backoff_respects_retry_after_and_cap():
+    limiter = AdaptiveLimiter(backoff_base=0.5, backoff_max=2)
+    assert all(0 <= limiter.backoff(attempt) <= 2 for attempt in range(10))
+    assert limiter.backoff(0, retry_after=5) == 5
+
+def test_retry_after_seconds_reads_the_header():
+    error = SimpleNamespace(response=SimpleNamespace(headers={'retry-after': '3'}))
+    assert retry_after_seconds(error) == 3.0
+    assert retry_after_seconds(SimpleNamespace(response=SimpleNamespace(headers={'retry-after': 'soon'}))) is None
+    assert retry_after_seconds(ValueError()) is None
@@ -0,0 +1,82 @@
+import asyncio
+import threading
+import time
+
+from src.models.response_cache import ResponseCache
+
+MESSAGES = [{'role': 'user', 'content': "Hi"}]
+
+def test_key_depends_on_model_messages_and_sampling():
+    key = ResponseCache.make_key('m', MESSAGES, {'temperature': 0.7})
+    assert key == ResponseCache.make_key('m', list(MESSAGES), {'temperature': 0.7})
+    assert key != ResponseCache.make_key('other', MESSAGES, {'temperature': 0.7})
+    assert key != ResponseCache.make_key('m', MESSAGES, {'temperature': 0.3})
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = ResponseCache(max_bytes=3 * (1 + 10))
+    for key in 'abc':
+        cache.set(key, key * 10)
+    cache.get('a')
+    cache.set('d', 'd' * 10)
+    assert cache.get('b') is None
+    assert cache.get('a') == 'a' * 10
+    assert cache.stats()['evictions'] == 1
+
+def test_entries_expire(monkeypatch):
+    cache = ResponseCache(ttl=10)
+    cache.set('k', 'value')
+    now = time.time()
+    monkeypatch.setattr(time, 'time', lambda: now + 11)
+    assert cache.get('k') is None
+
+def test_disk_tier_survives_a_restart(tmp_path):
+    path = str(tmp_path / 'responses.db')
+    ResponseCache(db_path=path).set('k', 'value')
+    cache = ResponseCache(db_path=path)
+    assert cache.get('k') == 'value'
+    assert cache.get('k') == 'value'
+    stats = cache.stats()
+    assert (stats['disk_hits'], stats['memory_hits']) == (1, 1)
+
+def test_async_access_runs_disk_io_off_the_event_loop(tmp_path, monkeypatch):
+    cache = ResponseCache(db_path=str(tmp_path / 'responses.db'))
+    threads = []
+
+    def recorded(method):
+        def run(*args):
+            threads.append(threading.current_thread().name)
+            return method(*args)
+        return run
+
+    for name in ('_get_disk', '_set_disk'):
+        monkeypatch.setattr(cache, name, recorded(getattr(cache, name)))
+
+    async def scenario():
+        await cache.aset('k', 'value')
+        cache._entries.clear()
+        return await cache.aget('k'), threading.current_thread().name
+
+    value, loop_thread = asyncio.run(scenario())
+    assert value == 'value'
+    assert len(threads) == 2 and loop_thread not in threads
+    assert cache.stats()['disk_hits'] == 1
+
+def test_expired_rows_are_pruned_periodically(tmp_path, monkeypatch):
+    cache = ResponseCache(ttl=10, db_path=str(tmp_path / 'responses.db'), prune_interval=60)
+    now = time.time()
+    monkeypatch.setattr(time, 'time', lambda: now)
+    cache.set('old', 'value')
+
+    # Writes within the interval leave expired rows alone; the first one after it prunes them
+    monkeypatch.setattr(time, 'time', lambda: now + 30)
+    cache.set('a', 'value')
+    assert cache._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0] == 2
+    monkeypatch.setattr(time, 'time', lambda: now + 61)
+    cache.set('b', 'value')
+    keys = {key for (key,) in cache._db.execute("SELECT key FROM responses")}
+    assert keys == {'b'}
+
+def test_expiry_scans_use_an_index(tmp_path):
+    cache = ResponseCache(db_path=str(tmp_path / 'responses.db'))
+    plan = cache._db.execute("EXPLAIN QUERY PLAN DELETE FROM responses WHERE stored_at < 0").fetchall()
+    assert 'responses_by_stored_at' in ' '.join(str(row) for row in plan)
@@ -0,0 +1,40 @@
+import pytest
+
+from src.models.semantic_cache import HashingVectorizer, SemanticCache
+
+TEXT = "Student: I can't sleep before exams and I feel anxious all the time."
+
+def test_vectors_are_normalised_and_stable():
+    vectorizer = HashingVectorizer(n_features=256)
+    vector = vectorizer.transform(TEXT)
+    assert float(vector @ vector) == pytest.approx(1.0, abs=1e-5)
+    assert (vector == HashingVectorizer(n_features=256).transform(TEXT)).all()
+    assert not vectorizer.transform("").any()
+
+def test_near_duplicates_hit_and_different_texts_miss():
+    cache = SemanticCache(HashingVectorizer(), threshold=0.8)
+    cache.set(TEXT, 'feedback')
+    assert cache.get(TEXT.replace("all the time", "all the time.")) == 'feedback'
+    assert cache.get("Student: My parents are getting divorced.") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_full_cache_evicts_least_recently_used():
+    cache = SemanticCache(HashingVectorizer(), capacity=2, threshold=0.99)
+    cache.set("first conversation about exams", 1)
+    cache.set("second conversation about friends", 2)
+    cache.get("first conversation about exams")
+    cache.set("third conversation about family", 3)
+    assert cache.get("second conversation about friends") is None
+    assert cache.get("first conversation about exams") == 1
+    assert cache.evictions == 1
+
+def test_unknown_eviction_policy_is_rejected():
+    with pytest.raises(ValueError):
+        SemanticCache(eviction='random')
+
+def test_guarded_entries_only_match_the_same_guard():
+    cache = SemanticCache(HashingVectorizer(), threshold=0.8)
+    cache.set(TEXT, 'feedback', guard="i feel anxious")
+    assert cache.get(TEXT, guard="my dad hits me") is None
+    assert cache.get(TEXT) is None
+    assert cache.get(TEXT, guard="i feel anxious") == 'feedback'
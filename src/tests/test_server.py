@@ -0,0 +1,171 @@
+import pytest
+
+from src.models.circuit_breaker import CircuitBreaker
+
+def trip_breaker(server, monkeypatch):
+    """Replace the client's circuit breaker with one that is open."""
+    breaker = CircuitBreaker(reset_timeout=60)
+    breaker._trip()
+    monkeypatch.setattr(server.llm_client, 'breaker', breaker)
+    return breaker
+
+def start(api):
+    body = api.post('/api/conversations').get_json()
+    assert body['status'] == 'success'
+    return body['conversation_id']
+
+def test_open_breaker_leaves_the_conversation_unchanged(api, server, monkeypatch):
+    conversation_id = start(api)
+    before = server.conversation_store.get(conversation_id)
+    version, length = before.version, len(before.history)
+
+    trip_breaker(server, monkeypatch)
+    for path in ('message', 'message/stream'):
+        response = api.post(f'/api/conversations/{conversation_id}/{path}', json={'message': 'How are you?'})
+        assert response.status_code == 503
+        assert int(response.headers['Retry-After']) >= 1
+
+    after = server.conversation_store.get(conversation_id)
+    assert after.version == version
+    assert len(after.history) == length
+
+def test_open_breaker_rejects_new_conversations(api, server, monkeypatch):
+    trip_breaker(server, monkeypatch)
+    response = api.post('/api/conversations')
+    assert response.status_code == 503
+    assert response.get_json()['retry_after'] > 0
+
+def test_streamed_turn_stores_both_messages(api, server):
+    conversation_id = start(api)
+    body = api.post(f'/api/conversations/{conversation_id}/message/stream', json={'message': "How are you?"}).data
+    assert b'event: done' in body
+    history = server.conversation_store.get(conversation_id).history
+    assert [message['speaker'] for message in history] == ['student', 'educator', 'student']
+    assert [message['seq'] for message in history] == [0, 1, 2]
+
+def test_failed_stream_leaves_the_conversation_unchanged(api, server, monkeypatch):
+    conversation_id = start(api)
+    version = server.conversation_store.get(conversation_id).version
+
+    def failing_stream(history):
+        yield "I feel"
+        raise RuntimeError("provider dropped the stream")
+
+    monkeypatch.setattr(server, 'stream_student_turn', failing_stream)
+    body = api.post(f'/api/conversations/{conversation_id}/message/stream', json={'message': "How are you?"}).data
+    assert b'event: error' in body
+
+    conversation = server.conversation_store.get(conversation_id)
+    assert conversation.version == version
+    assert [message['speaker'] for message in conversation.history] == ['student']
+
+def test_limiter_timeouts_are_503_with_retry_after(api, server, monkeypatch):
+    from src.models.rate_limiter import RateLimitExceeded
+    conversation_id = start(api)
+
+    def saturated(history, *args, **kwargs):
+        raise RateLimitExceeded(2.4)
+
+    monkeypatch.setattr(server, 'simulate_student_turn', saturated)
+    response = api.post(f'/api/conversations/{conversation_id}/message', json={'message': 'How are you?'})
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '2'
+
+def test_first_turn_usage_is_charged_to_the_conversation(api, monkeypatch):
+    from src.models import ai_agents
+    monkeypatch.setattr(ai_agents, 'SEMANTIC_FEEDBACK_CACHE', False)
+
+    conversation_id = start(api)
+    feedback = api.get(f'/api/conversations/{conversation_id}/feedback?since=0&timeout=5').get_json()
+    assert feedback['feedback_status'] == 'ready'
+
+    usage = api.get(f'/api/conversations/{conversation_id}').get_json()['metadata']['usage']
+    assert set(usage['roles']) == {'student', 'feedback'}
+
+def test_feedback_for_unknown_conversation_is_404(api):
+    assert api.get('/api/conversations/missing/feedback?timeout=0').status_code == 404
+
+def test_inline_feedback_is_returned_with_the_turn(api, server, monkeypatch):
+    monkeypatch.setattr(server, 'async_feedback', False)
+    body = api.post('/api/conversations').get_json()
+    assert body['suggestions']['suggested_questions']
+    assert 'feedback' not in body
+
+def test_stats_do_not_load_evicted_conversations(api, server, monkeypatch):
+    start(api)
+    store = server.conversation_store
+    for loader in ('get', '_load'):
+        monkeypatch.setattr(store, loader, lambda conversation_id: pytest.fail("stats loaded a conversation"))
+
+    stats = api.get('/api/stats').get_json()
+    assert stats['active_conversations'] == len(store)
+    assert stats['resident_conversations'] == len(store.resident_conversations())
+
+def test_conversation_etag_changes_when_feedback_completes(api, server):
+    conversation_id = start(api)
+    api.get(f'/api/conversations/{conversation_id}/feedback?since=0&timeout=5')
+    response = api.get(f'/api/conversations/{conversation_id}')
+    etag = response.headers['ETag']
+    assert api.get(f'/api/conversations/{conversation_id}', headers={'If-None-Match': etag}).status_code == 304
+
+    # Feedback that arrives without a new message or a recorded call still changes the representation
+    server.feedback_pipeline.publish(conversation_id, {'suggested_questions': ["What helps?"]})
+    response = api.get(f'/api/conversations/{conversation_id}', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['feedback_sequence'] == 2
+    assert response.headers['ETag'] != etag
+
+def test_conversation_list_is_revalidated_with_etags(api):
+    start(api)
+    response = api.get('/api/conversations?limit=1')
+    etag = response.headers['ETag']
+    assert response.headers['Cache-Control'] == 'no-cache'
+    assert api.get('/api/conversations?limit=1', headers={'If-None-Match': etag}).status_code == 304
+    # The query is part of the representation
+    assert api.get('/api/conversations?limit=2', headers={'If-None-Match': etag}).status_code == 200
+
+    start(api)
+    assert api.get('/api/conversations?limit=1', headers={'If-None-Match': etag}).status_code == 200
+
+def test_transcript_deltas_follow_the_since_cursor(api):
+    conversation_id = start(api)
+    body = api.post(f'/api/conversations/{conversation_id}/message?since=0',
+                    json={'message': "How are you?"}).get_json()
+    assert [message['speaker'] for message in body['messages']] == ['educator', 'student']
+
+def test_open_breaker_is_reported_without_failing_health(api, server, monkeypatch):
+    trip_breaker(server, monkeypatch)
+    response = api.get('/health')
+    assert response.status_code == 200
+    health = response.get_json()
+    assert health['degraded'] is True
+    assert health['breaker'] == 'open'
+    assert 'rate_limiter' in health
+
+def test_evicted_conversations_release_their_feedback(api, server, monkeypatch):
+    monkeypatch.setattr(server.conversation_store, 'max_resident', 1)
+    first = start(api)
+    server.feedback_pipeline.publish(first, {'suggested_questions': []})
+    assert server.feedback_pipeline.latest(first) is not None
+
+    start(api)
+    assert server.feedback_pipeline.latest(first) is None
+
+def test_misconfigured_backend_still_reports_the_store(api, server, monkeypatch):
+    monkeypatch.setattr(server.llm_client.backend, 'status',
+                        lambda: {'configured': False, 'backend': 'together', 'error': "no API key"})
+    response = api.get('/health')
+    assert response.status_code == 503
+    assert 'evicted' in response.get_json()['conversation_store']
+
+def test_calls_for_other_conversations_keep_the_list_etag(api, server):
+    conversation_id = start(api)
+    api.get(f'/api/conversations/{conversation_id}/feedback?since=0&timeout=5')
+    etag = api.get('/api/conversations?limit=1').headers['ETag']
+
+    # An opener-pool refill or background summary records usage for no listed conversation
+    server.simulate_student_turn([])
+    assert api.get('/api/conversations?limit=1', headers={'If-None-Match': etag}).status_code == 304
+
+    server.simulate_student_turn(server.conversation_store.get(conversation_id).history)
+    assert api.get('/api/conversations?limit=1', headers={'If-None-Match': etag}).status_code == 200
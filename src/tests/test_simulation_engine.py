@@ -0,0 +1,48 @@
+import sys
+import types
+
+import pytest
+
+from src.models import history as history_module
+
+class RecordingSocket:
+    def __init__(self):
+        self.events = []
+
+    def emit(self, event, data, room=None):
+        self.events.append(data)
+
+@pytest.fixture
+def engine(monkeypatch):
+    """A SimulationEngine with its database layer replaced; the engine runs inside the Flask-SocketIO app."""
+    monkeypatch.setitem(sys.modules, 'models', types.SimpleNamespace(Session=None))
+    monkeypatch.setitem(sys.modules, 'extensions', types.SimpleNamespace(db=None))
+    monkeypatch.delitem(sys.modules, 'src.models.simulation_engine', raising=False)
+    from src.models.simulation_engine import SimulationEngine
+
+    engine = SimulationEngine('session-1', RecordingSocket(), app=None)
+    monkeypatch.setattr(engine, '_save_message_to_db', lambda message_data: None)
+    return engine
+
+def test_history_is_the_shared_rendered_history(engine):
+    history = engine.conversation_history
+    assert isinstance(history, history_module.RenderedHistory)
+
+    history.append({'speaker': 'student', 'text': "I can't sleep."})
+    assert history_module.format_history(history) is history.render()
+
+def test_low_value_turn_keeps_the_current_feedback(engine):
+    from src.models.ai_agents import feedback_scheduler
+
+    history = engine.conversation_history
+    history.append({'speaker': 'student', 'text': "I can't sleep before exams and it is getting worse."})
+    engine._get_and_send_feedback()
+    assert [event['type'] for event in engine.socketio.events] == ['feedback']
+
+    reuses = feedback_scheduler.reuses
+    history.append({'speaker': 'educator', 'text': "I see."})
+    history.append({'speaker': 'student', 'text': "Yeah."})
+    engine._get_and_send_feedback()
+
+    assert feedback_scheduler.reuses == reuses + 1
+    assert [event['type'] for event in engine.socketio.events] == ['feedback']
@@ -0,0 +1,61 @@
+"""
+Cold-start check for the API server.
+
+Imports the server module in fresh interpreters under `python -X importtime`
+and fails when the best import takes longer than the budget
+(`STARTUP_BUDGET_MS`, default 400) or when a heavy dependency that should
+only be loaded on first use (NumPy, httpx, the Together SDK) is imported at
+startup. The interpreters run in a scratch directory so the logs and data
+files the server creates never land in the source tree.
+"""
+
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+
+MODULE = 'src.api.server'
+BUDGET_MS = float(os.environ.get('STARTUP_BUDGET_MS', '400'))
+REPEAT = 3
+
+# Packages that must stay out of the startup import graph
+DEFERRED_PACKAGES = ('numpy', 'httpx', 'together')
+
+def import_once(module, cwd):
+    """Import `module` in a new interpreter and return its parsed importtime rows."""
+    env = dict(os.environ, LLM_BACKEND='mock', PYTHONPATH=ROOT)
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=cwd, env=env, capture_output=True, text=True
+    )
+    assert result.returncode == 0, f"Importing {module} failed:\n{result.stderr[-2000:]}"
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((int(self_us), int(cumulative_us), name.strip()))
+    return rows
+
+def module_time_ms(rows, module):
+    return next(cumulative for _, cumulative, name in rows if name == module) / 1e3
+
+def slowest(rows, top=15):
+    """Format the slowest imports in importtime layout."""
+    lines = ["import time: self [us] | cumulative | imported package"]
+    for self_us, cumulative_us, name in sorted(rows, key=lambda row: row[1], reverse=True)[:top]:
+        lines.append(f"import time: {self_us:>9} | {cumulative_us:>10} | {name}")
+    return "\n".join(lines)
+
+def test_server_import_is_within_budget(tmp_path):
+    rows = min((import_once(MODULE, tmp_path) for _ in range(REPEAT)), key=lambda rows: module_time_ms(rows, MODULE))
+    elapsed = module_time_ms(rows, MODULE)
+    assert elapsed <= BUDGET_MS, (
+        f"import of {MODULE} took {elapsed:.1f} ms, over the {BUDGET_MS:.0f} ms budget\n{slowest(rows)}"
+    )
+
+def test_heavy_packages_are_not_imported_at_startup(tmp_path):
+    imported = {name for _, _, name in import_once(MODULE, tmp_path)}
+    assert [package for package in DEFERRED_PACKAGES if package in imported] == []
@@ -0,0 +1,36 @@
+import pytest
+
+from src.config.config import RISK_SCAN_CATEGORIES, SCAN_PHRASE_SETS
+from src.models.text_scanner import PhraseScanner
+
+scanner = PhraseScanner(SCAN_PHRASE_SETS)
+
+@pytest.mark.parametrize('text', [
+    "Sometimes I just want to die.",
+    "I've been cutting myself again",
+    "Everyone would be better off dead without me... I mean, I'd be better off dead.",
+    "I keep   thinking about suicide",
+    "I don’t want to be here anymore",
+    "It's hopeless, nobody cares",
+])
+def test_risk_phrases_are_detected(text):
+    assert scanner.contains(text, RISK_SCAN_CATEGORIES)
+
+@pytest.mark.parametrize('text', [
+    "I'm dead tired from cutting class all week.",
+    "My phone is dead and I almost died laughing.",
+    "The battery is going to die soon.",
+    "Mom was cutting vegetables when I got home.",
+    "I feel fine today, honestly.",
+])
+def test_everyday_language_is_not_a_risk(text):
+    assert scanner.scan(text, RISK_SCAN_CATEGORIES) == []
+
+def test_matches_report_category_and_phrase():
+    [match] = scanner.scan("I want to die", ['self_harm'])
+    assert match['category'] == 'self_harm'
+    assert match['phrase'] == 'want to die'
+
+def test_phrases_match_on_word_boundaries():
+    assert not scanner.contains("unhopelessly", RISK_SCAN_CATEGORIES)
+    assert scanner.contains("I feel better, thanks for talking", ['end_of_conversation'])